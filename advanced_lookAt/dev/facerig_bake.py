@@ -0,0 +1,117 @@
+"""
+Bakes every face control of a character, for rig handoff:
+
+    facerig_bake.bake_character('charA')
+    facerig_bake.bake_character('charA', keys_only=True, startframe=1001, endframe=1120)
+
+The keyable channels of get_facerig_controls driven by anything but their own anim curve
+(constraints, driven keys, expressions, pair blends) are evaluated in one pass over the range with
+lookat_utilities.sample_attributes: time is the outer loop, so the rig is evaluated once per frame
+for all the channels and the current time never changes. Each channel is then disconnected from
+its driver and written with one addKeys call, instead of scrubbing time1.outTime and keying one node
+at a time like snap_objects. The disconnects and the keys are recorded in one AnimCurveEdit: the bake
+is one undo step, and a failure puts the drivers back and leaves no keys behind.
+
+With keys_only a channel that already has time keys in the range is only keyed on those times (and
+the range ends), the others on every frame: set driven keys (animCurveU*) are keyed on driver values,
+not times, so their channels are baked on every frame too.
+"""
+import time
+
+from maya import cmds
+
+import numpy
+
+import lookat_sampling
+import lookat_utilities
+
+# Curves driven by time: a channel driven straight by one of these is already baked.
+TIME_CURVE_TYPES = ['animCurveTL', 'animCurveTA', 'animCurveTT', 'animCurveTU']
+
+
+def get_driven_channels(controls):
+    """Returns ([(driver plug, driven plug)], [channel]) of the controls: the connections driving
+    keyable channels, and the "node.attribute" channels they drive. Channels driven straight by a
+    time anim curve are left out."""
+    connections = []
+    channels = []
+    for control in controls:
+        keyable = set(cmds.listAttr(control, keyable=True, unlocked=True, scalar=True) or [])
+        pairs = cmds.listConnections(control, source=True, destination=False, connections=True, plugs=True) or []
+        for destination, source in zip(pairs[::2], pairs[1::2]):
+            attribute = destination.split('.', 1)[1]
+            if attribute in keyable:
+                driven = [attribute]
+            else:
+                # Compound inputs (a constraint driving translate) drive their keyable children.
+                children = cmds.attributeQuery(attribute, node=control, listChildren=True) \
+                    if cmds.attributeQuery(attribute, node=control, exists=True) else None
+                driven = [child for child in children or [] if child in keyable]
+            if not driven or cmds.nodeType(source.split('.', 1)[0]) in TIME_CURVE_TYPES:
+                continue
+            connections.append((source, destination))
+            channels.extend('{0}.{1}'.format(control, child) for child in driven)
+    return connections, channels
+
+
+def get_channel_key_times(channels, startframe, endframe):
+    """Returns the existing key times of each channel in the range, with the range ends, or None for
+    channels without keys there or driven by a curve that isn't keyed on time"""
+    channel_times = []
+    for channel in channels:
+        curves = cmds.keyframe(channel, query=True, name=True) or []
+        times = None
+        if curves and all(cmds.nodeType(curve) in TIME_CURVE_TYPES for curve in curves):
+            times = cmds.keyframe(curves, query=True, time=(startframe, endframe), timeChange=True)
+        channel_times.append(lookat_sampling.merge_times([startframe], times, [endframe]) if times else None)
+    return channel_times
+
+
+@lookat_utilities.undo_able
+def bake_character(namespace, startframe=None, endframe=None, keys_only=False, filter_tongue=True):
+    """
+    Bakes the driven channels of the namespace's face controls over the range (the timeline range by
+    default), see the module's doc. Returns {'controls', 'channels', 'samples', 'keys', 'seconds'}.
+    """
+    start = time.time()
+    if startframe is None or endframe is None:
+        startframe, endframe = lookat_utilities.get_timeline_range()
+    controls = lookat_utilities.get_facerig_controls(namespace, filter_tongue)
+    connections, channels = get_driven_channels(controls)
+    stats = {'controls': len(controls), 'channels': len(channels), 'samples': 0, 'keys': 0}
+    if not channels:
+        stats['seconds'] = time.time() - start
+        return stats
+
+    frames = lookat_sampling.merge_times(range(int(startframe), int(endframe) + 1))
+    channel_times = [frames] * len(channels)
+    if keys_only:
+        channel_times = [frames if times is None else times
+                         for times in get_channel_key_times(channels, startframe, endframe)]
+    # One pass over the union of every channel's times.
+    sample_times = lookat_sampling.merge_times(*channel_times)
+    values = lookat_utilities.sample_attributes(channels, sample_times)
+    stats['samples'] = len(sample_times)
+
+    cmds.refresh(suspend=True)
+    try:
+        with lookat_utilities.AnimCurveEdit() as edit:
+            try:
+                # Everything is sampled, the drivers can go.
+                for source, destination in connections:
+                    edit.modifier.disconnect(lookat_utilities.get_plug(source), lookat_utilities.get_plug(destination))
+                edit.modifier.doIt()
+                for channel, channel_values, times in zip(channels, values, channel_times):
+                    indices = numpy.searchsorted(sample_times, times)
+                    lookat_utilities.set_anim_curve_keys(channel, times, channel_values[indices], edit=edit)
+                    stats['keys'] += len(times)
+            except Exception:
+                edit.roll_back()
+                raise
+    finally:
+        cmds.refresh(suspend=False)
+
+    stats['seconds'] = time.time() - start
+    lookat_utilities.log.info("Baked {channels} channels of {controls} controls, {samples} samples, {keys} keys in "
+                              "{seconds:.2f}s for {0}".format(namespace, **stats))
+    return stats
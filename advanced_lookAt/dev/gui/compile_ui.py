@@ -0,0 +1,38 @@
+"""
+Compiles the Qt Designer files of the tool into python modules, so opening the tool doesn't have to
+parse them with QUiLoader. Run it with mayapy after editing a .ui file:
+
+    mayapy compile_ui.py
+
+The compiled modules record a checksum of the .ui file they were built from, the tools fall back to
+QUiLoader when the .ui file has changed since.
+"""
+import os
+
+from pyside2uic import compileUi
+
+import qt_gui
+
+# .ui file: compiled module
+UI_MODULES = {'lookat.ui': 'ui_lookat.py',
+              'timerange_bar.ui': 'ui_timerange_bar.py'}
+
+
+def compile_ui_files(root_path=None):
+    root_path = root_path or os.path.dirname(os.path.abspath(__file__))
+    current_path = os.getcwd()
+    # Relative paths keep the machine's directories out of the generated headers.
+    os.chdir(root_path)
+    try:
+        for ui_name, module_name in sorted(UI_MODULES.items()):
+            with open(ui_name) as ui_file:
+                with open(module_name, 'w') as module_file:
+                    compileUi(ui_file, module_file, from_imports=False)
+                    module_file.write("\nUI_CHECKSUM = '{0}'\n".format(qt_gui.get_ui_checksum(ui_name)))
+            print "Compiled {0} -> {1}".format(ui_name, module_name)
+    finally:
+        os.chdir(current_path)
+
+
+if __name__ == '__main__':
+    compile_ui_files()
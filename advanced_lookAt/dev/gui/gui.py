@@ -1,9 +1,9 @@
 import os
 
+from PySide2 import QtCore
 from PySide2 import QtGui
 from PySide2 import QtWidgets
 from PySide2.QtCore import QSettings
-from PySide2.QtUiTools import QUiLoader
 import maya.cmds as cmds
 
 from maya import OpenMaya
@@ -14,14 +14,26 @@ from maya import OpenMaya
 # from facerig_anim.libs import styles
 # from facerig_anim.libs.widgets import help_bar
 import qt_gui
+import namespace_model
 import timerange_bar
+import ui_lookat
+import lookat_telemetry
 import lookat_utilities
 
+# Only needed once something is plotted, imported on first use to keep the tool quick to open.
+lookat_sampling = lookat_utilities.LazyModule('lookat_sampling')
+lookat_plan = lookat_utilities.LazyModule('lookat_plan')
+lookat_cost = lookat_utilities.LazyModule('lookat_cost')
+lookat_plotter = lookat_utilities.LazyModule('lookat_plotter')
+
+tool_data = {'name': 'Advanced LookAt',
+             'object_name': 'advanced_lookat_tool'}
+
 
 class LookAtTool(QtWidgets.QMainWindow):
     def __init__(self, parent=qt_gui.get_maya_window()):
         super(LookAtTool, self).__init__(parent=parent)
-        # self.object_name = tool_data.get('object_name')
+        self.object_name = tool_data.get('object_name')
         self.setWindowTitle("Advanced LookAt")
         self.setObjectName(self.object_name)
         # self.setWindowIcon(QtGui.QIcon(icons.images.get('facerig_logo.png')))
@@ -35,42 +47,22 @@ class LookAtTool(QtWidgets.QMainWindow):
         self.setCentralWidget(self.central_widget)
         self.main_layout = QtWidgets.QVBoxLayout(self.central_widget)
         root_path = os.path.dirname(os.path.abspath(__file__))
-        ui_file = '{0}/look_at.ui'.format(root_path)
-        self.ui = QUiLoader().load(os.path.abspath(ui_file))
+        ui_file = '{0}/lookat.ui'.format(root_path)
+        self.ui = qt_gui.load_ui(os.path.abspath(ui_file), ui_lookat)
         # self.help_widget = help_bar.HelpToolBar(self.object_name, self)
         self.timerange_widget = timerange_bar.TimeRangeBar()
-        self.main_layout.addWidget(self.help_widget)
+        # self.main_layout.addWidget(self.help_widget)
         self.ui.timeline_layout.addWidget(self.timerange_widget)
         self.main_layout.addWidget(self.ui)
         self.setFixedSize(self.main_layout.sizeHint())
 
+        # Filled in and kept up to date by maya callbacks once the window is shown.
+        self.namespace_model = namespace_model.NamespaceModel(self)
+        self.ui.cb_namespace.setModel(self.namespace_model)
         self.namespace = self.ui.cb_namespace.currentText()
 
-        self.look_at_main_control_curve = 'lookat_ctl'
-        self.look_at_left_control_curve = 'L_lookat_ctl'
-        self.look_at_right_control_curve = 'R_lookat_ctl'
-
-        self.au_eyes_main_control_curve = 'au_eyes_ctl'
-        self.au_eyes_left_control_curve = 'L_au_eyes_ctl'
-        self.au_eyes_right_control_curve = 'R_au_eyes_ctl'
-
-        self.main_lookat_final_translation = 'C_absolute_position_loc'
-        self.left_lookat_final_translation = 'L_absolute_position_loc'
-        self.right_lookat_final_translation = 'R_absolute_position_loc'
-
-        self.eyes_combined_values = 'eyes_combined_values'
-        self.plot_to_au_values = 'plot_to_au_values'
-        self.user_defined_distance_loc = 'user_defined_distance_loc'
-
-        self.control_vis = 'control_vis'
-
-        self.controls = {"LookAt": "lookat_ctl",
-                         "AUEyes": "au_eyes_ctl"
-                         }
-
-        self.control_transform_dict = {}
-        self.control_curve_tuple_list = []
-        self.combined_keys_to_plot = []
+        self.profile_history = None
+        self.scene_values_initialized = False
 
         self.__init_default_values()
         self.__connections()
@@ -81,444 +73,169 @@ class LookAtTool(QtWidgets.QMainWindow):
         self.ui.btn_plot_anim.clicked.connect(self.plot_animation_switch)
         self.ui.btn_align_lookat.clicked.connect(self.align_lookat_position)
         self.ui.cb_namespace.activated.connect(self.set_namespace)
+        self.ui.cb_namespace.currentIndexChanged.connect(self.set_namespace)
+        self.namespace_model.namespace_selected.connect(self.select_namespace)
+        self.ui.cb_sampling.currentIndexChanged.connect(self.update_sampling_widgets)
+
+        # Keep the cost estimate in sync with everything it depends on.
+        for check_box in [self.ui.cb_smart_bake, self.ui.cb_key_on_frames, self.ui.cb_update_au_eyes,
+                          self.ui.rb_world, self.ui.rb_local, self.ui.rb_au_eyes, self.ui.rb_user_defined_distance]:
+            check_box.toggled.connect(self.update_cost_estimate)
+        self.ui.cb_sampling.currentIndexChanged.connect(self.update_cost_estimate)
+        self.ui.dsb_sampling_step.valueChanged.connect(self.update_cost_estimate)
+        self.ui.le_sample_times.editingFinished.connect(self.update_cost_estimate)
+        self.ui.cb_namespace.activated.connect(self.update_cost_estimate)
+        self.timerange_widget.ui.le_ranges.editingFinished.connect(self.update_cost_estimate)
+        self.namespace_model.namespace_selected.connect(self.update_cost_estimate)
 
     def __init_default_values(self):
         """ sets default values in the ui """
-        self.refresh_namespaces()
         self.time_from_timeline()
 
+    def init_scene_values(self):
+        """
+        Fills in what needs a scene scan (the namespaces) and the cost estimate. Runs once, after the
+        window is first shown, so opening the tool doesn't wait for it.
+        """
+        if self.scene_values_initialized:
+            return
+        self.scene_values_initialized = True
+
+        history_file = os.path.join(cmds.internalVar(userPrefDir=True), 'advanced_lookat_profiles.json')
+        self.profile_history = lookat_cost.ProfileHistory(history_file)
+        self.refresh_namespaces()
+        self.namespace_model.start()
+        self.update_cost_estimate()
+
+    def showEvent(self, event):
+        super(LookAtTool, self).showEvent(event)
+        if not self.scene_values_initialized:
+            QtCore.QTimer.singleShot(0, self.init_scene_values)
+        elif not lookat_utilities.CallbacksPool.getInstance().get(owner=self.namespace_model):
+            # Shown again after being closed, the scene may have changed in between.
+            self.refresh_namespaces()
+            self.namespace_model.start()
+
+    def closeEvent(self, event):
+        self.namespace_model.stop()
+        lookat_utilities.get_control_registry().stop()
+        super(LookAtTool, self).closeEvent(event)
+
     def align_lookat_position(self):
         """Initializes Position of the LookAt control"""
-        user_defined_distance = self.ui.spin_box_user_defined_distance.value()
-
-        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.user_defined_distance_loc), user_defined_distance)
-        cmds.matchTransform('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
-                            '{0}:{1}'.format(self.namespace, self.user_defined_distance_loc))
-
-    def get_active_eye_controls(self):
-        active_control = ''
-        if cmds.getAttr('{0}:control_vis.enable_lookat'.format(self.namespace)) == 0:
-            active_control = 'au_eyes'
-        elif cmds.getAttr('{0}:control_vis.enable_lookat'.format(self.namespace)) == 1 \
-                and cmds.getAttr('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace)) == 0:
-            active_control = 'lookat_world'
-        elif cmds.getAttr('{0}:control_vis.enable_lookat'.format(self.namespace)) == 1 \
-                and cmds.getAttr('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace)) == 1:
-            active_control = 'lookat_local'
-        return active_control
+        self.set_namespace()
+        self.get_plotter().align_lookat_position()
 
     @lookat_utilities.undo_able
     @lookat_utilities.disable_viewport
     def plot_animation_switch(self):
         """queries the ui for the namespace and control to plot animation to."""
         self.set_namespace()
-        current_frame = lookat_utilities.get_current_frame()
-
-        aim_ctl = "{0}:{1}".format(self.namespace, self.controls.get("LookAt"))
-
-        # Check if the animation can be plotted
-        if not cmds.objExists(aim_ctl):
-            raise RuntimeError("The selected namespace doesn't appear to have a LookAt Control")
-
-        source_ctl = self.get_active_eye_controls()
-        target_ctl = ''
-
-        if self.ui.rb_world.isChecked():
-            target_ctl = 'lookat_world'
-        elif self.ui.rb_local.isChecked():
-            target_ctl = 'lookat_local'
-        elif self.ui.rb_au_eyes.isChecked():
-            target_ctl = 'au_eyes'
-
-        if source_ctl == 'au_eyes' and target_ctl == 'lookat_local':
-            self.plot_au_to_local()
-        if source_ctl == 'au_eyes' and target_ctl == 'lookat_world':
-            self.plot_au_to_world()
-        if source_ctl == 'lookat_local' and target_ctl == 'lookat_local':
-            self.plot_local_to_local()
-        if source_ctl == 'lookat_local' and target_ctl == 'lookat_world':
-            self.plot_local_to_world()
-        if source_ctl == 'lookat_local' and target_ctl == 'au_eyes':
-            self.plot_local_to_au()
-        if source_ctl == 'lookat_world' and target_ctl == 'lookat_local':
-            self.plot_world_to_local()
-        if source_ctl == 'lookat_world' and target_ctl == 'lookat_world':
-            self.plot_world_to_world()
-        if source_ctl == 'lookat_world' and target_ctl == 'au_eyes':
-            self.plot_world_to_au()
-
-        cmds.currentTime(current_frame)
-
-    def plot_au_to_local(self):
-        if self.ui.rb_user_defined_distance.isChecked():
-            self.reset_lookat()
-            cmds.cutKey('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace))
-            cmds.setAttr("{0}:lookat_ctl.SpaceWorldHead".format(self.namespace), 1)
-            self.align_lookat_position()
-            self.capture_plot_frames_for_lookat()
-            self.write_plot_frames_to_lookat()
-
-        if self.ui.rb_maintain_distance.isChecked():
-            cmds.cutKey('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace))
-            cmds.setAttr("{0}:lookat_ctl.SpaceWorldHead".format(self.namespace), 1)
-            self.capture_plot_frames_for_lookat()
-            self.write_plot_frames_to_lookat()
-
-        cmds.setAttr('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis), 1)
-        cmds.select('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve))
-
-    def plot_au_to_world(self):
-        if self.ui.rb_user_defined_distance.isChecked():
-            self.reset_lookat()
-            cmds.cutKey('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace))
-            cmds.setAttr("{0}:lookat_ctl.SpaceWorldHead".format(self.namespace), 0)
-            self.align_lookat_position()
-            self.capture_plot_frames_for_lookat()
-            self.write_plot_frames_to_lookat()
-
-        if self.ui.rb_maintain_distance.isChecked():
-            cmds.cutKey('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace))
-            cmds.setAttr("{0}:lookat_ctl.SpaceWorldHead".format(self.namespace), 0)
-            self.capture_plot_frames_for_lookat()
-            self.write_plot_frames_to_lookat()
-
-        cmds.setAttr('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis), 1)
-        cmds.select('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve))
-
-    def plot_local_to_local(self):
-        self.plot_local_to_au()
-        self.plot_au_to_local()
-
-    def plot_local_to_world(self):
-        if self.ui.rb_user_defined_distance.isChecked():
-            self.plot_local_to_au()
-            self.plot_au_to_world()
-        if self.ui.rb_maintain_distance.isChecked():
-            self.capture_plot_frames_for_space_swap()
-            self.reset_lookat()
-            cmds.cutKey('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace))
-            cmds.setAttr("{0}:lookat_ctl.SpaceWorldHead".format(self.namespace), 0)
-            self.write_plot_frames_for_space_swap()
-
-    def plot_local_to_au(self):
-        self.capture_plot_frames_for_au_eyes()
-        self.write_plot_frames_to_au_eyes()
-        cmds.setAttr('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis), 0)
-        cmds.select('{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve))
-
-    def plot_world_to_world(self):
-        self.plot_world_to_au()
-        self.plot_au_to_world()
-
-    def plot_world_to_local(self):
-        if self.ui.rb_user_defined_distance.isChecked():
-            self.plot_local_to_au()
-            self.plot_au_to_local()
-        if self.ui.rb_maintain_distance.isChecked():
-            self.capture_plot_frames_for_space_swap()
-            self.reset_lookat()
-            cmds.cutKey('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace))
-            cmds.setAttr("{0}:lookat_ctl.SpaceWorldHead".format(self.namespace), 1)
-            self.write_plot_frames_for_space_swap()
-
-    def plot_world_to_au(self):
-        self.capture_plot_frames_for_au_eyes()
-        self.write_plot_frames_to_au_eyes()
-        cmds.setAttr('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis), 0)
-        cmds.select('{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve))
-
-    def capture_plot_frames_for_space_swap(self):
-        smart_bake = self.ui.cb_smart_bake.isChecked()
-        startframe, endframe = self.timerange_widget.get_timerange()
-
-        control_curve_tuple_list = [
-            ('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
-             '{0}:{1}'.format(self.namespace, self.main_lookat_final_translation)),
-
-            ('{0}:{1}'.format(self.namespace, self.look_at_left_control_curve),
-             '{0}:{1}'.format(self.namespace, self.left_lookat_final_translation)),
-
-            ('{0}:{1}'.format(self.namespace, self.look_at_right_control_curve),
-             '{0}:{1}'.format(self.namespace, self.right_lookat_final_translation))
-        ]
-
-        combined_keys_to_plot = []
-        if not smart_bake:
-            combined_keys_to_plot = range(startframe, endframe + 1)
-        else:
-            for control_curve_tuple in control_curve_tuple_list:
-                # Unpack control_curve_tuples
-                source_control = control_curve_tuple[0]
-                keys_to_plot = self.get_sparse_bake_index(source_control)
-                # Combine control keys into a single list.
-                for key in keys_to_plot:
-                    if key not in combined_keys_to_plot:
-                        combined_keys_to_plot.append(key)
-
-        # Record final position of "lookAt" controls
-        control_transform_dict = {}
-        for key in combined_keys_to_plot:
-            key_list = []
-            cmds.currentTime(key)
-            for control_curve_tuple in control_curve_tuple_list:
-                target_control = control_curve_tuple[0]
-                final_translation = control_curve_tuple[0]
-                transform_list = cmds.xform(final_translation, query=True, worldSpace=True, rotatePivot=True)
-                key_list.append((target_control, transform_list))
-            control_transform_dict[key] = key_list
-
-        # Flatten animation curves that we will be replacing
-        flatten_curve_list = [
-            '{0}:lookat_ctl.tx'.format(self.namespace),
-            '{0}:lookat_ctl.ty'.format(self.namespace),
-            '{0}:lookat_ctl.tz'.format(self.namespace),
-            '{0}:L_lookat_ctl.tx'.format(self.namespace),
-            '{0}:L_lookat_ctl.ty'.format(self.namespace),
-            '{0}:L_lookat_ctl.tz'.format(self.namespace),
-            '{0}:R_lookat_ctl.tx'.format(self.namespace),
-            '{0}:R_lookat_ctl.ty'.format(self.namespace),
-            '{0}:R_lookat_ctl.tz'.format(self.namespace)
-        ]
-        lookat_utilities.flatten_anim_curve(flatten_curve_list, startframe, endframe)
-        self.control_transform_dict = control_transform_dict
-
-    def write_plot_frames_for_space_swap(self):
-        for key, value in self.control_transform_dict.iteritems():
-
-            keyframe = key
-
-            main_ctl_tupple = value[0]
-            main_ctl = main_ctl_tupple[0]
-            main_ctl_xform = main_ctl_tupple[1]
-
-            left_ctl_tupple = value[1]
-            left_ctl = left_ctl_tupple[0]
-            left_ctl_xform = left_ctl_tupple[1]
-
-            right_ctl_tupple = value[2]
-            right_ctl = right_ctl_tupple[0]
-            right_ctl_xform = right_ctl_tupple[1]
-
-            cmds.currentTime(key)
-
-            cmds.xform(main_ctl, translation=main_ctl_xform, worldSpace=True)
-            cmds.xform(left_ctl, translation=left_ctl_xform, worldSpace=True)
-            cmds.xform(right_ctl, translation=right_ctl_xform, worldSpace=True)
-
-            cmds.setKeyframe(main_ctl, attribute='tx', time=[keyframe, keyframe])
-            cmds.setKeyframe(main_ctl, attribute='ty', time=[keyframe, keyframe])
-            cmds.setKeyframe(main_ctl, attribute='tz', time=[keyframe, keyframe])
-
-            cmds.setKeyframe(left_ctl, attribute='tx', time=[keyframe, keyframe])
-            cmds.setKeyframe(left_ctl, attribute='ty', time=[keyframe, keyframe])
-            cmds.setKeyframe(left_ctl, attribute='tz', time=[keyframe, keyframe])
-
-            cmds.setKeyframe(right_ctl, attribute='tx', time=[keyframe, keyframe])
-            cmds.setKeyframe(right_ctl, attribute='ty', time=[keyframe, keyframe])
-            cmds.setKeyframe(right_ctl, attribute='tz', time=[keyframe, keyframe])
-
-    def capture_plot_frames_for_lookat(self):
-        smart_bake = self.ui.cb_smart_bake.isChecked()
-        startframe, endframe = self.timerange_widget.get_timerange()
-
-        control_curve_tuple_list = [
-            ('{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve),
-             '{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
-             '{0}:{1}'.format(self.namespace, self.main_lookat_final_translation)),
-
-            ('{0}:{1}'.format(self.namespace, self.au_eyes_left_control_curve),
-             '{0}:{1}'.format(self.namespace, self.look_at_left_control_curve),
-             '{0}:{1}'.format(self.namespace, self.left_lookat_final_translation)),
-
-            ('{0}:{1}'.format(self.namespace, self.au_eyes_right_control_curve),
-             '{0}:{1}'.format(self.namespace, self.look_at_right_control_curve),
-             '{0}:{1}'.format(self.namespace, self.right_lookat_final_translation))
-        ]
-
-        # Get list of keys for all of the "eyes_au" controls
-        combined_keys_to_plot = []
-        if not smart_bake:
-            combined_keys_to_plot = range(startframe, endframe + 1)
-        else:
-            for control_curve_tuple in control_curve_tuple_list:
-                # Unpack control_curve_tuples
-                source_control = control_curve_tuple[0]
-                keys_to_plot = self.get_sparse_bake_index(source_control)
-                # Combine control keys into a single list.
-                for key in keys_to_plot:
-                    if key not in combined_keys_to_plot:
-                        combined_keys_to_plot.append(key)
-
-        # Record final position of "lookAt" controls
-        control_transform_dict = {}
-        for key in combined_keys_to_plot:
-            cmds.currentTime(key)
-            if self.ui.rb_user_defined_distance.isChecked():
-                self.align_lookat_position()
-            for control_curve_tuple in control_curve_tuple_list:
-                target_control = control_curve_tuple[1]
-                final_translation = control_curve_tuple[2]
-                cmds.matchTransform(target_control, final_translation,
-                                    position=True, rotation=False)
-                transform_list = cmds.xform(target_control, query=True, translation=True)
-
-                key_control_tuple = (key, target_control)
-                control_transform_dict[key_control_tuple] = transform_list
-
-        # Flatten animation curves that we will be replacing
-        flatten_curve_list = [
-            '{0}:lookat_ctl.tx'.format(self.namespace),
-            '{0}:lookat_ctl.ty'.format(self.namespace),
-            '{0}:lookat_ctl.tz'.format(self.namespace),
-            '{0}:L_lookat_ctl.tx'.format(self.namespace),
-            '{0}:L_lookat_ctl.ty'.format(self.namespace),
-            '{0}:L_lookat_ctl.tz'.format(self.namespace),
-            '{0}:R_lookat_ctl.tx'.format(self.namespace),
-            '{0}:R_lookat_ctl.ty'.format(self.namespace),
-            '{0}:R_lookat_ctl.tz'.format(self.namespace)
-        ]
-        lookat_utilities.flatten_anim_curve(flatten_curve_list, startframe, endframe)
-        self.control_transform_dict = control_transform_dict
-
-    def write_plot_frames_to_lookat(self):
-        for key, value in self.control_transform_dict.iteritems():
-            keyframe = key[0]
-            target_control = key[1]
-            x_val = value[0]
-            y_val = value[1]
-            z_val = value[2]
-
-            cmds.setKeyframe(target_control, value=x_val, attribute='tx', time=[keyframe, keyframe])
-            cmds.setKeyframe(target_control, value=y_val, attribute='ty', time=[keyframe, keyframe])
-            cmds.setKeyframe(target_control, value=z_val, attribute='tz', time=[keyframe, keyframe])
-
-    def capture_plot_frames_for_au_eyes(self):
+        plotter = self.get_plotter()
+        try:
+            plotter.plot()
+        except Exception as error:
+            self.record_plot(plotter.result, error)
+            raise
+        self.record_plot(plotter.result)
+        self.update_cost_estimate()
+
+    def record_plot(self, result, error=None):
+        """Sends the plot's telemetry: what was plotted, how long each phase took and the error, if any"""
+        if not result.get('conversion') and error is None:
+            # Nothing was plotted (AU eyes to AU eyes).
+            return
+        event = dict((key, value) for key, value in result.items() if key != 'namespace')
+        event['characters'] = 1
+        if error is not None:
+            event['error'] = '{0}: {1}'.format(type(error).__name__, error)
+        lookat_telemetry.record(lookat_telemetry.PLOT, **event)
+
+    def get_plot_options(self):
+        """Builds the lookat_plotter.PlotOptions from the ui"""
         smart_bake = self.ui.cb_smart_bake.isChecked()
-        startframe, endframe = self.timerange_widget.get_timerange()
-
-        # Flatten animation keys that we will be replacing
-        flatten_curve_list = [
-            '{0}:au_eyes_ctl.tx'.format(self.namespace),
-            '{0}:au_eyes_ctl.ty'.format(self.namespace),
-            '{0}:L_au_eyes_ctl.tx'.format(self.namespace),
-            '{0}:L_au_eyes_ctl.ty'.format(self.namespace),
-            '{0}:R_au_eyes_ctl.tx'.format(self.namespace),
-            '{0}:R_au_eyes_ctl.ty'.format(self.namespace),
-        ]
-        lookat_utilities.flatten_anim_curve(flatten_curve_list, startframe, endframe)
-
-        self.control_curve_tuple_list = [
-            ('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
-             '{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve),
-             'C_TX',
-             'C_TY'),
-            ('{0}:{1}'.format(self.namespace, self.look_at_left_control_curve),
-             '{0}:{1}'.format(self.namespace, self.au_eyes_left_control_curve),
-             'L_TX',
-             'L_TY'),
-            ('{0}:{1}'.format(self.namespace, self.look_at_right_control_curve),
-             '{0}:{1}'.format(self.namespace, self.au_eyes_right_control_curve),
-             'R_TX',
-             'R_TY')
-        ]
-
-        # Get list of keys for all "au_eyes" controls
-        combined_keys_to_plot = []
-        if not smart_bake:
-            combined_keys_to_plot = range(startframe, endframe + 1)
-        else:
-            for control_curve_tuple in self.control_curve_tuple_list:
-                # Unpack control_curve_tuples
-                source_control = control_curve_tuple[0]
-                keys_to_plot = self.get_sparse_bake_index(source_control)
-                # Combine control keys into a single list.
-                for key in keys_to_plot:
-                    if key not in combined_keys_to_plot:
-                        combined_keys_to_plot.append(key)
-
-        self.combined_keys_to_plot = combined_keys_to_plot
-
-    def write_plot_frames_to_au_eyes(self):
-        for key in self.combined_keys_to_plot:
-            cmds.currentTime(key)
-            for control_curve_tuple in self.control_curve_tuple_list:
-                # Unpack control_curve_tuples
-                target_control = control_curve_tuple[1]
-                x_attribute = control_curve_tuple[2]
-                y_attribute = control_curve_tuple[3]
-                x_key_value = cmds.getAttr('{0}:{1}.{2}'.format(self.namespace, self.plot_to_au_values, x_attribute))
-                y_key_value = cmds.getAttr('{0}:{1}.{2}'.format(self.namespace, self.plot_to_au_values, y_attribute))
-                cmds.setAttr('{0}.tx'.format(target_control), x_key_value)
-                cmds.setAttr('{0}.ty'.format(target_control), y_key_value)
-                cmds.setKeyframe('{0}.tx'.format(target_control))
-                cmds.setKeyframe('{0}.ty'.format(target_control))
-
-    def reset_lookat(self):
-        """
-        Clears all animation on the lookAt control and reset's its' position to 0,0,0.
-        """
-        cmds.cutKey('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve))
-        cmds.cutKey('{0}:{1}'.format(self.namespace, self.look_at_left_control_curve))
-        cmds.cutKey('{0}:{1}'.format(self.namespace, self.look_at_right_control_curve))
-
-        # Cut existing keys on the lookAt to force the user defined distance.
-        cmds.setAttr('{0}:{1}.tx'.format(self.namespace, self.look_at_main_control_curve), 0)
-        cmds.setAttr('{0}:{1}.ty'.format(self.namespace, self.look_at_main_control_curve), 0)
-        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.look_at_main_control_curve), 0)
-
-        cmds.setAttr('{0}:{1}.tx'.format(self.namespace, self.look_at_left_control_curve), 0)
-        cmds.setAttr('{0}:{1}.ty'.format(self.namespace, self.look_at_left_control_curve), 0)
-        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.look_at_left_control_curve), 0)
-
-        cmds.setAttr('{0}:{1}.tx'.format(self.namespace, self.look_at_right_control_curve), 0)
-        cmds.setAttr('{0}:{1}.ty'.format(self.namespace, self.look_at_right_control_curve), 0)
-        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.look_at_right_control_curve), 0)
-
-    def get_sparse_bake_index(self, control_curve):
-        """
-        Returns a list of sparse keys for plotting a single control curve.
-        """
-        startframe, endframe = self.timerange_widget.get_timerange()
-
-        tx_key_index = cmds.keyframe(control_curve, at='tx', query=True)
-        ty_key_index = cmds.keyframe(control_curve, at='ty', query=True)
-        tz_key_index = cmds.keyframe(control_curve, at='tz', query=True)
-
-        compiled_key_index = []
-        if tx_key_index:
-            for key in ty_key_index:
-                if key not in compiled_key_index:
-                    compiled_key_index.append(key)
-        if ty_key_index:
-            for key in tx_key_index:
-                if key not in compiled_key_index:
-                    compiled_key_index.append(key)
-        if tz_key_index:
-            for key in tz_key_index:
-                if key not in compiled_key_index:
-                    compiled_key_index.append(key)
-
-        sparse_bake_index = [float(startframe)] +\
-                            [key for key in compiled_key_index if startframe <= key <= endframe] +\
-                            [float(endframe)]
-        return sparse_bake_index
-
-    def set_namespace(self):
+        return lookat_plotter.PlotOptions(self.get_target_mode(),
+                                          ranges=self.timerange_widget.get_timeranges(),
+                                          user_defined_distance=self.ui.rb_user_defined_distance.isChecked(),
+                                          distance=self.ui.spin_box_user_defined_distance.value(),
+                                          distance_curve=self.ui.cb_distance_curve.isChecked(),
+                                          update_au_eyes=self.ui.cb_update_au_eyes.isChecked(),
+                                          # SmartBake doesn't sample, don't parse the sample times for it.
+                                          sampling=None if smart_bake else self.get_sampling_options(),
+                                          smart_bake=smart_bake)
+
+    def get_plotter(self):
+        """Returns a lookat_plotter.LookAtPlotter of the current namespace, set up from the ui"""
+        return lookat_plotter.LookAtPlotter(self.namespace, self.get_plot_options(), self.profile_history)
+
+    def get_target_mode(self):
+        """Returns the eye control mode the ui plots to"""
+        if self.ui.rb_world.isChecked():
+            return lookat_plan.LOOKAT_WORLD
+        if self.ui.rb_local.isChecked():
+            return lookat_plan.LOOKAT_LOCAL
+        if self.ui.rb_au_eyes.isChecked():
+            return lookat_plan.AU_EYES
+        return ''
+
+    def update_cost_estimate(self, *args):
+        """Shows the predicted cost of plotting with the current settings"""
+        text = ''
+        try:
+            estimate = self.get_plotter().estimate() if self.namespace else None
+            if estimate:
+                text = estimate.describe()
+        except (RuntimeError, ValueError) as error:
+            lookat_utilities.log.debug("No cost estimate: {0}".format(error))
+        self.ui.lbl_cost_estimate.setText(text)
+
+    def get_sampling_options(self):
+        """Builds the sampling options from the ui"""
+        mode = lookat_sampling.SAMPLING_MODES[self.ui.cb_sampling.currentIndex()]
+        times = []
+        if mode == lookat_sampling.SAMPLE_EXPLICIT:
+            times = lookat_sampling.parse_times(self.ui.le_sample_times.text())
+
+        step = self.ui.dsb_sampling_step.value()
+        if mode == lookat_sampling.SAMPLE_STEPPED:
+            step = max(1, int(round(step)))
+
+        return lookat_sampling.SamplingOptions(mode,
+                                               step=step,
+                                               times=times,
+                                               key_on_frames=self.ui.cb_key_on_frames.isChecked())
+
+    def update_sampling_widgets(self):
+        """Enables the sampling widgets that apply to the current sampling mode"""
+        mode = lookat_sampling.SAMPLING_MODES[self.ui.cb_sampling.currentIndex()]
+        self.ui.dsb_sampling_step.setEnabled(mode in (lookat_sampling.SAMPLE_STEPPED,
+                                                      lookat_sampling.SAMPLE_SUBFRAME))
+        self.ui.le_sample_times.setEnabled(mode == lookat_sampling.SAMPLE_EXPLICIT)
+        if mode == lookat_sampling.SAMPLE_SUBFRAME and self.ui.dsb_sampling_step.value() >= 1:
+            self.ui.dsb_sampling_step.setValue(0.25)
+        elif mode == lookat_sampling.SAMPLE_STEPPED and self.ui.dsb_sampling_step.value() < 1:
+            self.ui.dsb_sampling_step.setValue(2)
+
+    def set_namespace(self, *args):
         self.namespace = self.ui.cb_namespace.currentText()
 
+    def select_namespace(self, namespace):
+        """Makes namespace the current one, if it is listed"""
+        index = self.ui.cb_namespace.findText(namespace)
+        if index >= 0:
+            self.ui.cb_namespace.setCurrentIndex(index)
+        self.set_namespace()
+
     def refresh_namespaces(self):
         """queries scene for existing namespaces then updates the combo box. if the user has
         something selected, it will set the namespace in the ui to the namespace of selection"""
-        namespaces = lookat_utilities.get_namespaces()
-        self.ui.cb_namespace.clear()
-        self.ui.cb_namespace.addItems(namespaces)
+        self.namespace_model.rescan()
 
         selection = cmds.ls(sl=True) or list()
         if selection:
             namespace = OpenMaya.MNamespace.getNamespaceFromName(selection[0]) or ":"
-            index = self.ui.cb_namespace.findText(namespace)
-            if index >= 0:
-                self.ui.cb_namespace.setCurrentIndex(index)
+            self.select_namespace(namespace)
+        self.set_namespace()
 
     def select_node(self, node):
         """pulls the namespace from the ui, ensure the given node exists, and if so, select it"""
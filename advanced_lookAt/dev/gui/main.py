@@ -2,10 +2,17 @@
 # from facerig_anim.libs import telemetry
 #from facerig_anim.maya.look_at import gui
 import gui
+import qt_gui
+import lookat_telemetry
+
 
 def show():
-    print "WASSSUP!!!!"
-    # telemetry.tack_event({'tool': gui.tool_data.get('name')})
-    # qt_gui.delete_maya_tool(gui.tool_data.get('object_name'))
-    diag = gui.LookAtTool()
+    lookat_telemetry.record(lookat_telemetry.TOOL_OPEN, tool=gui.tool_data.get('name'))
+    # Reuse the open window, building the tool again is the slow part of showing it.
+    diag = qt_gui.find_pyside_tool(gui.tool_data.get('object_name'))
+    if diag is None:
+        diag = gui.LookAtTool()
     diag.show()
+    diag.raise_()
+    diag.activateWindow()
+    return diag
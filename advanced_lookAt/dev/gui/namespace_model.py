@@ -0,0 +1,177 @@
+"""
+A live list of the scene's namespaces for the namespace combo boxes.
+
+The list is scanned once with lookat_utilities.get_namespaces and then kept up to date from maya
+messages: node added/removed/renamed callbacks only record the namespaces they touch and one
+deferred update checks those namespaces once maya is idle. A rename records the namespace the node
+left and the one it moved to, which also covers namespaces being renamed. Scene and reference
+loads, which add or remove nodes by the thousand, suspend the node callbacks and rescan once when
+they are done, or once maya is idle again if they were cancelled.
+"""
+from PySide2 import QtCore
+
+from maya import OpenMaya
+from maya import utils
+
+import lookat_utilities
+
+IGNORED_NAMESPACES = ['UI', 'shared']
+
+# Messages after which the whole list is rescanned, and the ones that suspend the node callbacks
+# until then.
+RESCAN_MESSAGES = [OpenMaya.MSceneMessage.kAfterOpen,
+                   OpenMaya.MSceneMessage.kAfterNew,
+                   OpenMaya.MSceneMessage.kAfterImport,
+                   OpenMaya.MSceneMessage.kAfterCreateReference,
+                   OpenMaya.MSceneMessage.kAfterRemoveReference,
+                   OpenMaya.MSceneMessage.kAfterLoadReference,
+                   OpenMaya.MSceneMessage.kAfterUnloadReference]
+SUSPEND_MESSAGES = [OpenMaya.MSceneMessage.kBeforeOpen,
+                    OpenMaya.MSceneMessage.kBeforeNew,
+                    OpenMaya.MSceneMessage.kBeforeImport,
+                    OpenMaya.MSceneMessage.kBeforeCreateReference,
+                    OpenMaya.MSceneMessage.kBeforeRemoveReference,
+                    OpenMaya.MSceneMessage.kBeforeLoadReference,
+                    OpenMaya.MSceneMessage.kBeforeUnloadReference]
+
+
+def get_node_namespace(node_name):
+    """Returns the root namespace a node counts for in get_namespaces: ':' for nodes without a
+    namespace, None for nodes in nested namespaces"""
+    parts = node_name.lstrip(':').split(':')
+    if len(parts) == 1:
+        return ':'
+    if len(parts) == 2:
+        return parts[0]
+    return None
+
+
+class NamespaceModel(QtCore.QStringListModel):
+    """String list model of the namespaces get_namespaces returns, ':' first.
+
+    namespace_selected is emitted with the namespace of the first selected node when the selection
+    changes, if that namespace is in the list.
+    """
+
+    namespace_selected = QtCore.Signal(str)
+
+    def __init__(self, parent=None):
+        super(NamespaceModel, self).__init__(parent)
+        self.suspended = False
+        self._added_namespaces = set()
+        self._removed_namespaces = set()
+        self._update_scheduled = False
+
+    def start(self):
+        """Registers the maya callbacks that keep the list up to date"""
+        callbacks_pool = lookat_utilities.CallbacksPool.getInstance()
+        callbacks_pool.add_node_callback(self.node_added, owner=self)
+        callbacks_pool.add_node_callback(self.node_removed, removed=True, owner=self)
+        callbacks_pool.add_name_changed_callback(self.node_renamed, owner=self)
+        callbacks_pool.add(self.selection_changed, "SelectionChanged", owner=self, coalesce=True)
+        for message in SUSPEND_MESSAGES:
+            callbacks_pool.add_scene_callback(self.suspend, message, owner=self)
+        for message in RESCAN_MESSAGES:
+            callbacks_pool.add_scene_callback(self.resume, message, owner=self, coalesce=True)
+
+    def stop(self):
+        lookat_utilities.CallbacksPool.getInstance().remove_callbacks(owner=self)
+
+    def rescan(self):
+        """Replaces the list with a full scan of the scene"""
+        self.suspended = False
+        self._added_namespaces.clear()
+        self._removed_namespaces.clear()
+        self.setStringList(lookat_utilities.get_namespaces())
+
+    def suspend(self, *args):
+        self.suspended = True
+        # Only runs once the load is over. A cancelled load sends no kAfter message, this resumes.
+        utils.executeDeferred(self.end_suspension)
+
+    def end_suspension(self):
+        if self.suspended:
+            self.resume()
+
+    def resume(self, *args):
+        self.suspended = False
+        self.rescan()
+
+    def node_added(self, node, *args):
+        """Node added callback: only records the node's namespace"""
+        self.record_namespace(node, self._added_namespaces)
+
+    def node_removed(self, node, *args):
+        """Node removed callback: only records the node's namespace"""
+        self.record_namespace(node, self._removed_namespaces)
+
+    def node_renamed(self, node, previous_name, *args):
+        """Name changed callback: records the namespace the node left and the one it is in now"""
+        if self.suspended or not previous_name:
+            return
+        self.record_name(previous_name, self._removed_namespaces)
+        self.record_namespace(node, self._added_namespaces)
+
+    def record_namespace(self, node, namespaces):
+        if self.suspended:
+            return
+        self.record_name(OpenMaya.MFnDependencyNode(node).name(), namespaces)
+
+    def record_name(self, name, namespaces):
+        namespace = get_node_namespace(name)
+        if namespace is None or namespace in namespaces:
+            return
+        namespaces.add(namespace)
+        if not self._update_scheduled:
+            self._update_scheduled = True
+            utils.executeDeferred(self.update_namespaces)
+
+    def update_namespaces(self):
+        """Applies the recorded changes. Namespaces nodes were added to are listed right away, the
+        ones that lost nodes are only removed once they hold none."""
+        self._update_scheduled = False
+        added_namespaces, self._added_namespaces = self._added_namespaces, set()
+        removed_namespaces, self._removed_namespaces = self._removed_namespaces, set()
+
+        for namespace in sorted(added_namespaces | removed_namespaces):
+            if namespace == ':' or namespace in IGNORED_NAMESPACES:
+                continue
+            if namespace not in removed_namespaces or self.is_used_namespace(namespace):
+                self.add_namespace(namespace)
+            else:
+                self.remove_namespace(namespace)
+
+    @staticmethod
+    def is_used_namespace(namespace):
+        if not OpenMaya.MNamespace.namespaceExists(':{0}'.format(namespace)):
+            return False
+        nodes = OpenMaya.MNamespace.getNamespaceObjects(':{0}'.format(namespace), False)
+        return nodes.length() > 0
+
+    def add_namespace(self, namespace):
+        namespaces = self.stringList()
+        if namespace in namespaces:
+            return
+        # Keep ':' first and the others sorted.
+        row = 1
+        while row < len(namespaces) and namespaces[row].lower() < namespace.lower():
+            row += 1
+        self.insertRows(row, 1)
+        self.setData(self.index(row), namespace)
+
+    def remove_namespace(self, namespace):
+        namespaces = self.stringList()
+        if namespace in namespaces:
+            self.removeRows(namespaces.index(namespace), 1)
+
+    def selection_changed(self, *args):
+        """Emits namespace_selected for the namespace of the first selected node"""
+        selection = OpenMaya.MSelectionList()
+        OpenMaya.MGlobal.getActiveSelectionList(selection)
+        if selection.isEmpty():
+            return
+        node = OpenMaya.MObject()
+        selection.getDependNode(0, node)
+        namespace = OpenMaya.MNamespace.getNamespaceFromName(OpenMaya.MFnDependencyNode(node).name()) or ':'
+        if namespace in self.stringList():
+            self.namespace_selected.emit(namespace)
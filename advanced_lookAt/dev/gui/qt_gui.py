@@ -8,6 +8,9 @@ Library for various gui elements in mobu
 #     from PySide.QtGui import QApplication, QWidget
 
 # if current_dcc == 'maya':
+import hashlib
+import os
+
 from PySide2.QtWidgets import QApplication, QWidget, QMainWindow
 from maya import OpenMayaUI
 from shiboken2 import wrapInstance
@@ -36,14 +39,46 @@ def get_maya_window():
 
 
 def find_pyside_tool(object_name):
-    # get all top level windows:
-    top_level_windows = QApplication.topLevelWindows()
-    for w in top_level_windows:
-        if object_name in w.objectName():
+    """Returns the open tool window with the given object name, or None"""
+    # get all top level widgets, windows parented to maya included:
+    top_level_widgets = QApplication.topLevelWidgets()
+    for w in top_level_widgets:
+        if w.objectName() == object_name:
             return w
     return None
 
 
+def get_ui_checksum(ui_file):
+    """md5 of the ui file with LF line endings, so a checkout converting them to CRLF still matches"""
+    with open(ui_file, 'rb') as ui:
+        return hashlib.md5(ui.read().replace(b'\r\n', b'\n')).hexdigest()
+
+
+def is_compiled_ui_current(ui_file, compiled_module):
+    """True if the compiled module was built from the current ui file (or the ui file isn't shipped)"""
+    if not os.path.isfile(ui_file):
+        return True
+    return getattr(compiled_module, 'UI_CHECKSUM', None) == get_ui_checksum(ui_file)
+
+
+def load_ui(ui_file, compiled_module=None):
+    """
+    Builds a widget from a Qt Designer file. The module compiled from it with compile_ui.py is used
+    when it is up to date, as it is much faster than parsing the xml through QUiLoader. Either way the
+    child widgets are attributes of the returned widget.
+    """
+    if compiled_module is not None and is_compiled_ui_current(ui_file, compiled_module):
+        widget = QWidget()
+        form = compiled_module.Ui_Form()
+        form.setupUi(widget)
+        for name, child in vars(form).items():
+            setattr(widget, name, child)
+        return widget
+
+    from PySide2.QtUiTools import QUiLoader
+    return QUiLoader().load(ui_file)
+
+
 def delete_maya_tool(object_name):
     # get all top level windows:
     top_level_windows = QApplication.topLevelWindows()
@@ -1,14 +1,23 @@
 import os
 
 from PySide2 import QtWidgets
-from PySide2.QtUiTools import QUiLoader
 
 # from facerig_anim.maya.libs import maya_util
 # from facerig_anim.libs import environment as env
+import qt_gui
+import ui_timerange_bar
+import lookat_utilities
+
+lookat_sampling = lookat_utilities.LazyModule('lookat_sampling')
 
 
 class TimeRangeBar(QtWidgets.QWidget):
-    """ Reusable class with a label, line edit and browse button """
+    """ Reusable class with a label, line edit and browse button
+
+    The plot range is either the start and end frames, or several disjoint ranges typed in or added
+    from the time slider's highlight. The start and end frames then show the ranges' bounds and are
+    disabled until the ranges are cleared, so only one of them is ever the plot range.
+    """
 
     def __init__(self):
         super(TimeRangeBar, self).__init__()
@@ -16,7 +25,7 @@ class TimeRangeBar(QtWidgets.QWidget):
         # Get the UI file
         root_path = os.path.dirname(os.path.abspath(__file__))
         ui_file = os.path.abspath("{0}/timerange_bar.ui".format(root_path))
-        self.ui = QUiLoader().load(ui_file)
+        self.ui = qt_gui.load_ui(ui_file, ui_timerange_bar)
 
         layout = QtWidgets.QHBoxLayout()
         layout.addWidget(self.ui)
@@ -34,14 +43,57 @@ class TimeRangeBar(QtWidgets.QWidget):
 
     def __connections(self):
         self.ui.btn_from_timeline.clicked.connect(self.time_from_timeline)
+        self.ui.btn_add_highlighted.clicked.connect(self.add_highlighted_range)
+        self.ui.le_ranges.editingFinished.connect(self.update_ranges)
+        self.ui.le_ranges.textChanged.connect(self.update_frames_enabled)
 
     def time_from_timeline(self):
         """ gets the start and end frame from the timeline """
-        min_frame, max_frame = maya_util.get_timeline_range()
+        min_frame, max_frame = lookat_utilities.get_timeline_range()
 
+        self.ui.le_ranges.clear()
         self.ui.sb_startframe.setValue(min_frame)
         self.ui.sb_endframe.setValue(max_frame)
 
     def get_timerange(self):
         """returns the values stored in the UI spin boxes"""
         return int(self.ui.sb_startframe.value()), int(self.ui.sb_endframe.value())
+
+    def get_timeranges(self):
+        """Returns the disjoint (start, end) ranges to plot, in order: the ranges field when it is
+        filled in (the start and end frames are disabled then), the start and end frames otherwise"""
+        ranges = lookat_sampling.parse_ranges(self.ui.le_ranges.text())
+        return ranges or [self.get_timerange()]
+
+    def set_timeranges(self, ranges):
+        ranges = lookat_sampling.merge_ranges(ranges)
+        self.ui.le_ranges.setText(lookat_sampling.format_ranges(ranges))
+        if ranges:
+            self.ui.sb_startframe.setValue(ranges[0][0])
+            self.ui.sb_endframe.setValue(ranges[-1][1])
+
+    def add_timerange(self, start, end):
+        """Adds a range to the plot ranges, the start and end frames' range included when the ranges
+        field is still empty"""
+        self.set_timeranges(self.get_timeranges() + [(start, end)])
+
+    def add_highlighted_range(self):
+        """Adds the range highlighted on the time slider"""
+        highlighted_range = lookat_utilities.get_highlighted_range()
+        if highlighted_range is None:
+            lookat_utilities.log.warning("No range is highlighted on the time slider.")
+            return
+        self.add_timerange(*highlighted_range)
+
+    def update_frames_enabled(self):
+        """The start and end frames can only be edited while the ranges field is empty"""
+        enabled = not self.ui.le_ranges.text().strip()
+        self.ui.sb_startframe.setEnabled(enabled)
+        self.ui.sb_endframe.setEnabled(enabled)
+
+    def update_ranges(self):
+        """Tidies up the typed ranges and shows their bounds in the start and end frames"""
+        try:
+            self.set_timeranges(lookat_sampling.parse_ranges(self.ui.le_ranges.text()))
+        except ValueError as error:
+            lookat_utilities.log.warning(error)
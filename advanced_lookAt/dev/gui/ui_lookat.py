@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'lookat.ui',
+# licensing of 'lookat.ui' applies.
+#
+# Created: Mon Oct 19 15:41:05 2026
+#      by: pyside2-uic  running on PySide2 5.12.5
+#
+# WARNING! All changes made in this file will be lost!
+
+from PySide2 import QtCore, QtGui, QtWidgets
+
+class Ui_Form(object):
+    def setupUi(self, Form):
+        Form.setObjectName("Form")
+        Form.resize(1116, 642)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(Form.sizePolicy().hasHeightForWidth())
+        Form.setSizePolicy(sizePolicy)
+        self.verticalLayout = QtWidgets.QVBoxLayout(Form)
+        self.verticalLayout.setSpacing(5)
+        self.verticalLayout.setContentsMargins(0, 5, 0, 5)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.layout_namespace = QtWidgets.QHBoxLayout()
+        self.layout_namespace.setSpacing(6)
+        self.layout_namespace.setContentsMargins(0, -1, -1, 10)
+        self.layout_namespace.setObjectName("layout_namespace")
+        self.lbl_namespace = QtWidgets.QLabel(Form)
+        self.lbl_namespace.setMinimumSize(QtCore.QSize(150, 0))
+        self.lbl_namespace.setMaximumSize(QtCore.QSize(75, 16777215))
+        self.lbl_namespace.setObjectName("lbl_namespace")
+        self.layout_namespace.addWidget(self.lbl_namespace)
+        self.cb_namespace = QtWidgets.QComboBox(Form)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.cb_namespace.sizePolicy().hasHeightForWidth())
+        self.cb_namespace.setSizePolicy(sizePolicy)
+        self.cb_namespace.setObjectName("cb_namespace")
+        self.layout_namespace.addWidget(self.cb_namespace)
+        self.btn_refresh_namespace = QtWidgets.QPushButton(Form)
+        self.btn_refresh_namespace.setMinimumSize(QtCore.QSize(90, 31))
+        self.btn_refresh_namespace.setMaximumSize(QtCore.QSize(90, 23))
+        self.btn_refresh_namespace.setObjectName("btn_refresh_namespace")
+        self.layout_namespace.addWidget(self.btn_refresh_namespace)
+        self.verticalLayout.addLayout(self.layout_namespace)
+        self.layout_plot_label = QtWidgets.QHBoxLayout()
+        self.layout_plot_label.setSpacing(6)
+        self.layout_plot_label.setObjectName("layout_plot_label")
+        self.lbl_plot_animation = QtWidgets.QLabel(Form)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Maximum, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lbl_plot_animation.sizePolicy().hasHeightForWidth())
+        self.lbl_plot_animation.setSizePolicy(sizePolicy)
+        self.lbl_plot_animation.setMinimumSize(QtCore.QSize(150, 0))
+        self.lbl_plot_animation.setMaximumSize(QtCore.QSize(75, 16777215))
+        self.lbl_plot_animation.setObjectName("lbl_plot_animation")
+        self.layout_plot_label.addWidget(self.lbl_plot_animation)
+        self.line_plot_animation = QtWidgets.QFrame(Form)
+        self.line_plot_animation.setLineWidth(2)
+        self.line_plot_animation.setFrameShape(QtWidgets.QFrame.HLine)
+        self.line_plot_animation.setFrameShadow(QtWidgets.QFrame.Sunken)
+        self.line_plot_animation.setObjectName("line_plot_animation")
+        self.layout_plot_label.addWidget(self.line_plot_animation)
+        self.verticalLayout.addLayout(self.layout_plot_label)
+        self.timeline_layout = QtWidgets.QHBoxLayout()
+        self.timeline_layout.setObjectName("timeline_layout")
+        self.verticalLayout.addLayout(self.timeline_layout)
+        self.layout_plot_spacer = QtWidgets.QHBoxLayout()
+        self.layout_plot_spacer.setObjectName("layout_plot_spacer")
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.layout_plot_spacer.addItem(spacerItem)
+        self.verticalLayout.addLayout(self.layout_plot_spacer)
+        self.layout_align_set_lookat = QtWidgets.QVBoxLayout()
+        self.layout_align_set_lookat.setObjectName("layout_align_set_lookat")
+        self.layout_set_lookat_distsance = QtWidgets.QHBoxLayout()
+        self.layout_set_lookat_distsance.setObjectName("layout_set_lookat_distsance")
+        self.rb_maintain_distance = QtWidgets.QRadioButton(Form)
+        self.rb_maintain_distance.setObjectName("rb_maintain_distance")
+        self.lookat_distance_button_group = QtWidgets.QButtonGroup(Form)
+        self.lookat_distance_button_group.setObjectName("lookat_distance_button_group")
+        self.lookat_distance_button_group.addButton(self.rb_maintain_distance)
+        self.layout_set_lookat_distsance.addWidget(self.rb_maintain_distance)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.layout_set_lookat_distsance.addItem(spacerItem1)
+        self.rb_user_defined_distance = QtWidgets.QRadioButton(Form)
+        self.rb_user_defined_distance.setChecked(True)
+        self.rb_user_defined_distance.setObjectName("rb_user_defined_distance")
+        self.lookat_distance_button_group.addButton(self.rb_user_defined_distance)
+        self.layout_set_lookat_distsance.addWidget(self.rb_user_defined_distance)
+        self.spin_box_user_defined_distance = QtWidgets.QSpinBox(Form)
+        self.spin_box_user_defined_distance.setMinimum(5)
+        self.spin_box_user_defined_distance.setMaximum(9999)
+        self.spin_box_user_defined_distance.setProperty("value", 40)
+        self.spin_box_user_defined_distance.setObjectName("spin_box_user_defined_distance")
+        self.layout_set_lookat_distsance.addWidget(self.spin_box_user_defined_distance)
+        self.cb_distance_curve = QtWidgets.QCheckBox(Form)
+        self.cb_distance_curve.setObjectName("cb_distance_curve")
+        self.layout_set_lookat_distsance.addWidget(self.cb_distance_curve)
+        self.btn_align_lookat = QtWidgets.QPushButton(Form)
+        self.btn_align_lookat.setEnabled(True)
+        self.btn_align_lookat.setObjectName("btn_align_lookat")
+        self.layout_set_lookat_distsance.addWidget(self.btn_align_lookat)
+        self.layout_align_set_lookat.addLayout(self.layout_set_lookat_distsance)
+        self.verticalLayout.addLayout(self.layout_align_set_lookat)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.lbl_sampling = QtWidgets.QLabel(Form)
+        self.lbl_sampling.setObjectName("lbl_sampling")
+        self.horizontalLayout.addWidget(self.lbl_sampling)
+        self.cb_sampling = QtWidgets.QComboBox(Form)
+        self.cb_sampling.setObjectName("cb_sampling")
+        self.cb_sampling.addItem("")
+        self.cb_sampling.addItem("")
+        self.cb_sampling.addItem("")
+        self.cb_sampling.addItem("")
+        self.cb_sampling.addItem("")
+        self.horizontalLayout.addWidget(self.cb_sampling)
+        self.dsb_sampling_step = QtWidgets.QDoubleSpinBox(Form)
+        self.dsb_sampling_step.setEnabled(False)
+        self.dsb_sampling_step.setDecimals(3)
+        self.dsb_sampling_step.setMinimum(0.01)
+        self.dsb_sampling_step.setMaximum(1000.0)
+        self.dsb_sampling_step.setProperty("value", 1.0)
+        self.dsb_sampling_step.setObjectName("dsb_sampling_step")
+        self.horizontalLayout.addWidget(self.dsb_sampling_step)
+        self.le_sample_times = QtWidgets.QLineEdit(Form)
+        self.le_sample_times.setEnabled(False)
+        self.le_sample_times.setObjectName("le_sample_times")
+        self.horizontalLayout.addWidget(self.le_sample_times)
+        self.cb_key_on_frames = QtWidgets.QCheckBox(Form)
+        self.cb_key_on_frames.setObjectName("cb_key_on_frames")
+        self.horizontalLayout.addWidget(self.cb_key_on_frames)
+        spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem2)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+        self.layout_plot = QtWidgets.QHBoxLayout()
+        self.layout_plot.setContentsMargins(-1, 5, -1, -1)
+        self.layout_plot.setObjectName("layout_plot")
+        self.rb_world = QtWidgets.QRadioButton(Form)
+        self.rb_world.setChecked(True)
+        self.rb_world.setObjectName("rb_world")
+        self.space_button_group = QtWidgets.QButtonGroup(Form)
+        self.space_button_group.setObjectName("space_button_group")
+        self.space_button_group.addButton(self.rb_world)
+        self.layout_plot.addWidget(self.rb_world)
+        self.rb_local = QtWidgets.QRadioButton(Form)
+        self.rb_local.setObjectName("rb_local")
+        self.space_button_group.addButton(self.rb_local)
+        self.layout_plot.addWidget(self.rb_local)
+        self.rb_au_eyes = QtWidgets.QRadioButton(Form)
+        self.rb_au_eyes.setObjectName("rb_au_eyes")
+        self.space_button_group.addButton(self.rb_au_eyes)
+        self.layout_plot.addWidget(self.rb_au_eyes)
+        spacerItem3 = QtWidgets.QSpacerItem(150, 0, QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.Minimum)
+        self.layout_plot.addItem(spacerItem3)
+        self.lbl_cost_estimate = QtWidgets.QLabel(Form)
+        self.lbl_cost_estimate.setText("")
+        self.lbl_cost_estimate.setObjectName("lbl_cost_estimate")
+        self.layout_plot.addWidget(self.lbl_cost_estimate)
+        self.cb_update_au_eyes = QtWidgets.QCheckBox(Form)
+        self.cb_update_au_eyes.setChecked(False)
+        self.cb_update_au_eyes.setObjectName("cb_update_au_eyes")
+        self.layout_plot.addWidget(self.cb_update_au_eyes)
+        self.cb_smart_bake = QtWidgets.QCheckBox(Form)
+        self.cb_smart_bake.setChecked(False)
+        self.cb_smart_bake.setObjectName("cb_smart_bake")
+        self.layout_plot.addWidget(self.cb_smart_bake)
+        self.btn_plot_anim = QtWidgets.QPushButton(Form)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.btn_plot_anim.sizePolicy().hasHeightForWidth())
+        self.btn_plot_anim.setSizePolicy(sizePolicy)
+        self.btn_plot_anim.setMinimumSize(QtCore.QSize(90, 30))
+        self.btn_plot_anim.setMaximumSize(QtCore.QSize(90, 16777215))
+        self.btn_plot_anim.setObjectName("btn_plot_anim")
+        self.layout_plot.addWidget(self.btn_plot_anim)
+        self.verticalLayout.addLayout(self.layout_plot)
+
+        self.retranslateUi(Form)
+        QtCore.QMetaObject.connectSlotsByName(Form)
+
+    def retranslateUi(self, Form):
+        Form.setWindowTitle(QtWidgets.QApplication.translate("Form", "Form", None, -1))
+        self.lbl_namespace.setText(QtWidgets.QApplication.translate("Form", "Namespace:", None, -1))
+        self.btn_refresh_namespace.setText(QtWidgets.QApplication.translate("Form", "Refresh", None, -1))
+        self.lbl_plot_animation.setText(QtWidgets.QApplication.translate("Form", "Plot Animation", None, -1))
+        self.rb_maintain_distance.setText(QtWidgets.QApplication.translate("Form", "Maintain LookAt distance", None, -1))
+        self.rb_user_defined_distance.setText(QtWidgets.QApplication.translate("Form", "Use set LookAt distance", None, -1))
+        self.cb_distance_curve.setToolTip(QtWidgets.QApplication.translate("Form", "Use the animated tz of the user_defined_distance_loc as a per frame distance", None, -1))
+        self.cb_distance_curve.setText(QtWidgets.QApplication.translate("Form", "Distance Curve", None, -1))
+        self.btn_align_lookat.setText(QtWidgets.QApplication.translate("Form", "Align", None, -1))
+        self.lbl_sampling.setText(QtWidgets.QApplication.translate("Form", "Sampling:", None, -1))
+        self.cb_sampling.setItemText(0, QtWidgets.QApplication.translate("Form", "Every Frame", None, -1))
+        self.cb_sampling.setItemText(1, QtWidgets.QApplication.translate("Form", "Every Nth Frame", None, -1))
+        self.cb_sampling.setItemText(2, QtWidgets.QApplication.translate("Form", "Sub-frame", None, -1))
+        self.cb_sampling.setItemText(3, QtWidgets.QApplication.translate("Form", "Explicit Times", None, -1))
+        self.cb_sampling.setItemText(4, QtWidgets.QApplication.translate("Form", "Auto", None, -1))
+        self.le_sample_times.setPlaceholderText(QtWidgets.QApplication.translate("Form", "1001, 1004.5, 1010", None, -1))
+        self.cb_key_on_frames.setText(QtWidgets.QApplication.translate("Form", "Key On Frames", None, -1))
+        self.rb_world.setText(QtWidgets.QApplication.translate("Form", "World", None, -1))
+        self.rb_local.setText(QtWidgets.QApplication.translate("Form", "Local", None, -1))
+        self.rb_au_eyes.setText(QtWidgets.QApplication.translate("Form", "AUEyes   ", None, -1))
+        self.lbl_cost_estimate.setToolTip(QtWidgets.QApplication.translate("Form", "Predicted cost of the plot: sampled times x evaluated plugs, timed from previous plots", None, -1))
+        self.cb_update_au_eyes.setToolTip(QtWidgets.QApplication.translate("Form", "Also plot the AU eyes controls when plotting between lookAt spaces or distances", None, -1))
+        self.cb_update_au_eyes.setText(QtWidgets.QApplication.translate("Form", "Update AU Eyes  ", None, -1))
+        self.cb_smart_bake.setText(QtWidgets.QApplication.translate("Form", "SmartBake  ", None, -1))
+        self.btn_plot_anim.setText(QtWidgets.QApplication.translate("Form", "Plot", None, -1))
+
+
+UI_CHECKSUM = '48ad4bd7d65b686dff6c2f4cffa42b2d'
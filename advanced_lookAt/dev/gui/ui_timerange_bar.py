@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'timerange_bar.ui',
+# licensing of 'timerange_bar.ui' applies.
+#
+# Created: Mon Oct 19 16:38:34 2026
+#      by: pyside2-uic  running on PySide2 5.12.5
+#
+# WARNING! All changes made in this file will be lost!
+
+from PySide2 import QtCore, QtGui, QtWidgets
+
+class Ui_Form(object):
+    def setupUi(self, Form):
+        Form.setObjectName("Form")
+        Form.resize(595, 73)
+        self.main_layout = QtWidgets.QHBoxLayout(Form)
+        self.main_layout.setSpacing(5)
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+        self.main_layout.setObjectName("main_layout")
+        self.lbl_startframe = QtWidgets.QLabel(Form)
+        self.lbl_startframe.setMargin(5)
+        self.lbl_startframe.setObjectName("lbl_startframe")
+        self.main_layout.addWidget(self.lbl_startframe)
+        self.sb_startframe = QtWidgets.QSpinBox(Form)
+        self.sb_startframe.setMinimum(-999999)
+        self.sb_startframe.setMaximum(999999)
+        self.sb_startframe.setProperty("value", -1)
+        self.sb_startframe.setObjectName("sb_startframe")
+        self.main_layout.addWidget(self.sb_startframe)
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.Minimum)
+        self.main_layout.addItem(spacerItem)
+        self.lbl_endframe = QtWidgets.QLabel(Form)
+        self.lbl_endframe.setMargin(5)
+        self.lbl_endframe.setObjectName("lbl_endframe")
+        self.main_layout.addWidget(self.lbl_endframe)
+        self.sb_endframe = QtWidgets.QSpinBox(Form)
+        self.sb_endframe.setMinimum(-999999)
+        self.sb_endframe.setMaximum(999999)
+        self.sb_endframe.setProperty("value", -1)
+        self.sb_endframe.setObjectName("sb_endframe")
+        self.main_layout.addWidget(self.sb_endframe)
+        self.btn_from_timeline = QtWidgets.QPushButton(Form)
+        self.btn_from_timeline.setMaximumSize(QtCore.QSize(16777215, 24))
+        self.btn_from_timeline.setObjectName("btn_from_timeline")
+        self.main_layout.addWidget(self.btn_from_timeline)
+        self.lbl_ranges = QtWidgets.QLabel(Form)
+        self.lbl_ranges.setMargin(5)
+        self.lbl_ranges.setObjectName("lbl_ranges")
+        self.main_layout.addWidget(self.lbl_ranges)
+        self.le_ranges = QtWidgets.QLineEdit(Form)
+        self.le_ranges.setObjectName("le_ranges")
+        self.main_layout.addWidget(self.le_ranges)
+        self.btn_add_highlighted = QtWidgets.QPushButton(Form)
+        self.btn_add_highlighted.setMaximumSize(QtCore.QSize(16777215, 24))
+        self.btn_add_highlighted.setObjectName("btn_add_highlighted")
+        self.main_layout.addWidget(self.btn_add_highlighted)
+
+        self.retranslateUi(Form)
+        QtCore.QMetaObject.connectSlotsByName(Form)
+
+    def retranslateUi(self, Form):
+        Form.setWindowTitle(QtWidgets.QApplication.translate("Form", "Form", None, -1))
+        self.lbl_startframe.setText(QtWidgets.QApplication.translate("Form", "Start Frame", None, -1))
+        self.lbl_endframe.setText(QtWidgets.QApplication.translate("Form", "End Frame", None, -1))
+        self.btn_from_timeline.setToolTip(QtWidgets.QApplication.translate("Form", "<html><head/><body><p>Sets the <span style=\" font-weight:600;\">Start</span> and <span style=\" font-weight:600;\">End</span> Frames using maya\'s timeline playback range.</p></body></html>", None, -1))
+        self.btn_from_timeline.setText(QtWidgets.QApplication.translate("Form", "Update", None, -1))
+        self.lbl_ranges.setText(QtWidgets.QApplication.translate("Form", "Ranges", None, -1))
+        self.le_ranges.setToolTip(QtWidgets.QApplication.translate("Form", "<html><head/><body><p>Plots only these frame ranges, spliced into the existing curves. While it is filled in, the <span style=\" font-weight:600;\">Start</span> and <span style=\" font-weight:600;\">End</span> Frames show the ranges\' bounds and can\'t be edited. Leave it empty to plot from the <span style=\" font-weight:600;\">Start</span> to the <span style=\" font-weight:600;\">End</span> Frame.</p></body></html>", None, -1))
+        self.le_ranges.setPlaceholderText(QtWidgets.QApplication.translate("Form", "1001-1010, 1040-1052", None, -1))
+        self.btn_add_highlighted.setToolTip(QtWidgets.QApplication.translate("Form", "<html><head/><body><p>Adds the range highlighted on maya\'s time slider to the <span style=\" font-weight:600;\">Ranges</span>.</p></body></html>", None, -1))
+        self.btn_add_highlighted.setText(QtWidgets.QApplication.translate("Form", "Add Highlighted", None, -1))
+
+
+UI_CHECKSUM = 'be7752def51bd16bfa20517b7bdf0b7c'
@@ -1,21 +1,89 @@
 import os
+import tempfile
+import time
 from maya import cmds
+from maya import OpenMaya
 
-# TODO abstract hardcoded eye joints
+import lookat_utilities
+
+# Transforms of the character the lookAt rig is built on, the keys of a joint mapping.
+DEFAULT_JOINTS = {'controls_root': "zoma_base_motion",
+                  'head': "zoma_fk_cn_head",
+                  'left_eye': "zoma_ac_lf_eye_aim_att",
+                  'right_eye': "zoma_ac_rt_eye_aim_att"}
+
+# How the prefab is brought into the scene: imported (every node saved with the scene) or
+# referenced (the scene only stores the per-character edits of the reference).
+PREFAB_IMPORT = 'import'
+PREFAB_REFERENCE = 'reference'
+PREFAB_MODES = [PREFAB_IMPORT, PREFAB_REFERENCE]
+
+# The full prefab, and the copy prefab_pruner writes without the display hierarchies (sightlines,
+# space labels, settings), only used when asked for.
+PREFAB_FILE = "prefabs/lookat.ma"
+PREFAB_PRUNED_FILE = "prefabs/lookat_pruned.ma"
+
+# The lookatSolver node plugin (lookat_solver_node.py) and the prefab nodes it replaces: the sources
+# of these outputs, and whatever feeds only them, are deleted once the node drives them.
+SOLVER_PLUGIN = "lookat_solver_node.py"
+SOLVER_NODE_TYPE = "lookatSolver"
+SOLVER_NETWORK_TYPES = ['unitConversion', 'remapValue', 'clamp', 'plusMinusAverage', 'multiplyDivide',
+                        'blendColors', 'reverse']
+
+# The namespace a batch imports the prefab into once, to duplicate it for every character.
+PREFAB_SOURCE_NAMESPACE = 'lookat_prefab_source'
+# Attribute holding each rig node's name in the source, so its duplicates get that name back
+# (duplicate appends numbers). Nodes without it are scene bookkeeping pulled in by the duplicate.
+PREFAB_NAME_ATTRIBUTE = 'lookatPrefabName'
+# Scene and UI nodes of the prefab file that aren't part of the rig.
+PREFAB_SCENE_NODE_TYPES = ['renderLayerManager', 'renderLayer', 'displayLayerManager', 'displayLayer',
+                           'lightLinker', 'script', 'nodeGraphEditorInfo', 'hyperLayout', 'shapeEditorManager',
+                           'poseInterpolatorManager', 'aiOptions', 'aiAOVDriver', 'aiAOVFilter', 'camera']
 
 
 class AssembleLookAt(object):
-    def __init__(self):
+    """Builds the lookAt rig for one character.
+
+    With a namespace the prefab is imported into it and the default joints are looked up in it,
+    joints maps DEFAULT_JOINTS keys onto other transforms:
+
+    AssembleLookAt('charA', joints={'head': 'charA:head_jnt'})._run()
+
+    prefab_mode PREFAB_REFERENCE references the prefab instead of importing it, which needs a
+    namespace. solver_node builds a lookatSolver node in place of the lookat -> AU eyes network.
+    pruned_prefab uses PREFAB_PRUNED_FILE when no lookat_prefab is given.
+    """
+
+    def __init__(self, namespace=None, joints=None, lookat_prefab=None, prefab_mode=PREFAB_IMPORT,
+                 solver_node=False, pruned_prefab=False):
         self.source_root = os.path.dirname(os.path.abspath(__file__))
-        self.lookat_prefab = "{0}/{1}".format(self.source_root, "prefabs/lookat.ma")
+        self.lookat_prefab = lookat_prefab or self.get_default_prefab(pruned_prefab)
+        self.namespace = namespace.strip(':') if namespace else None
+
+        if prefab_mode not in PREFAB_MODES:
+            raise ValueError("Unknown prefab mode: {0}".format(prefab_mode))
+        if prefab_mode == PREFAB_REFERENCE and not self.namespace:
+            raise ValueError("A referenced lookAt prefab needs a namespace.")
+        self.prefab_mode = prefab_mode
+        self.reference_file = None
+        self.solver_node = solver_node
+        # The nodes of a prefab already in the scene, duplicated instead of importing the file again.
+        self.prefab_source = None
+        self.added_attributes = []
+
+        joints = joints or {}
+        for key in joints:
+            if key not in DEFAULT_JOINTS:
+                raise ValueError("Unknown joint mapping key: {0}".format(key))
+        self.joints = dict((key, joints.get(key) or self.node(name)) for key, name in DEFAULT_JOINTS.items())
 
-        self.fk_placement_root = 'au_eyes_ctl_parent_grp'
+        self.fk_placement_root = self.node('au_eyes_ctl_parent_grp')
 
-        self.controls_root = "zoma_base_motion"
+        self.controls_root = self.joints['controls_root']
 
-        self.head_transform = "zoma_fk_cn_head"
-        self.left_eye_transform = "zoma_ac_lf_eye_aim_att"
-        self.right_eye_transform = "zoma_ac_rt_eye_aim_att"
+        self.head_transform = self.joints['head']
+        self.left_eye_transform = self.joints['left_eye']
+        self.right_eye_transform = self.joints['right_eye']
 
         self.au_61_min = 0
         self.au_61_max = 40
@@ -33,12 +101,39 @@ class AssembleLookAt(object):
         self.create_eye_control_heirarchy()
         self.connect_sightlines()
         self.connect_lookat_rig()
+        if self.solver_node:
+            self.build_solver_node()
         self.delete_lookat_placement_guides()
         self.place_au_eyes_controls()
         # self.orient_au_eyes_controls()
         # self.constrain_au_eyes_controls()
         self.constrain_plot_to_lookat()
 
+    def get_default_prefab(self, pruned=False):
+        return "{0}/{1}".format(self.source_root, PREFAB_PRUNED_FILE if pruned else PREFAB_FILE)
+
+    def node(self, name):
+        """Returns the name of a prefab node in this assembly's namespace"""
+        if self.namespace:
+            return '{0}:{1}'.format(self.namespace, name)
+        return name
+
+    def remove_reference(self):
+        """Removes the prefab reference, file references can't be undone"""
+        if self.reference_file:
+            cmds.file(self.reference_file, removeReference=True)
+            self.reference_file = None
+
+    def remove_added_attributes(self):
+        """Deletes the attributes the assembly added to the character's nodes"""
+        for attribute in reversed(self.added_attributes):
+            if cmds.objExists(attribute):
+                cmds.deleteAttr(attribute)
+        self.added_attributes = []
+
+    def get_missing_joints(self):
+        return [joint for joint in sorted(self.joints.values()) if not cmds.objExists(joint)]
+
     @staticmethod
     def snap_objects(objects=None):
         # Snaps lists of objects via parent constraint.
@@ -47,38 +142,87 @@ class AssembleLookAt(object):
         snap_constraint = cmds.parentConstraint(objects)
         cmds.delete(snap_constraint)
 
+    def is_assembled(self):
+        return cmds.objExists(self.node("grp_control_eyes"))
+
     def import_lookat_prefab(self):
         # Import maya ASCII file that contains all working components for the eye aim rig.
-        if not cmds.objExists("grp_control_eyes"):
-            cmds.file(self.lookat_prefab, i=True, ignoreVersion=True)
+        if not self.is_assembled():
+            if self.prefab_mode == PREFAB_REFERENCE:
+                # The assembly steps below become reference edits, only they are saved with the scene.
+                self.reference_file = cmds.file(self.lookat_prefab, reference=True, ignoreVersion=True,
+                                                namespace=self.namespace, mergeNamespacesOnClash=True)
+            elif self.prefab_source:
+                self.duplicate_prefab(self.prefab_source)
+            elif self.namespace:
+                cmds.file(self.lookat_prefab, i=True, ignoreVersion=True, namespace=self.namespace,
+                          mergeNamespacesOnClash=True)
+            else:
+                cmds.file(self.lookat_prefab, i=True, ignoreVersion=True)
         else:
             print "lookat prefab found in scene."
 
+    def duplicate_prefab(self, prefab_roots):
+        """Duplicates the rig hierarchies of an imported prefab (see BatchAssembleLookAt.load_prefab_source)
+        and the network upstream of them into the assembly's namespace, under the prefab's names. The
+        scene nodes the duplicate pulls in are deleted."""
+        root_namespace = ':{0}'.format(self.namespace) if self.namespace else ':'
+        if not cmds.namespace(exists=root_namespace):
+            cmds.namespace(add=self.namespace, parent=':')
+        current_namespace = cmds.namespaceInfo(currentNamespace=True, absoluteName=True)
+        cmds.namespace(setNamespace=root_namespace)
+        try:
+            # UUIDs stay valid through the renames.
+            uuids = cmds.ls(cmds.duplicate(prefab_roots, upstreamNodes=True), uuid=True)
+            renames = []
+            scene_nodes = []
+            for uuid in uuids:
+                node = cmds.ls(uuid, long=True)[0]
+                if not cmds.attributeQuery(PREFAB_NAME_ATTRIBUTE, node=node, exists=True):
+                    scene_nodes.append(node)
+                    continue
+                name = cmds.getAttr('{0}.{1}'.format(node, PREFAB_NAME_ATTRIBUTE))
+                cmds.deleteAttr(node, attribute=PREFAB_NAME_ATTRIBUTE)
+                if node.rsplit('|', 1)[-1].rsplit(':', 1)[-1] != name:
+                    renames.append((uuid, name))
+            # Through temporary names, a duplicate may hold the name another one gets back.
+            for index, (uuid, _) in enumerate(renames):
+                cmds.rename(cmds.ls(uuid)[0], 'lookat_prefab_duplicate_{0}'.format(index))
+            for uuid, name in renames:
+                cmds.rename(cmds.ls(uuid)[0], name)
+            if scene_nodes:
+                cmds.delete(scene_nodes)
+        finally:
+            cmds.namespace(setNamespace=current_namespace)
+
     def create_lookat_placement_guides(self):
         # Create null guide objects, used to place and orient the eye aim system.
-        main_lookat_rig_orient_guide = cmds.group(name='main_lookat_orientGuide', empty=True)
-        left_lookat_rig_orient_guide = cmds.group(name='left_lookat_orientGuide', empty=True)
-        right_lookat_rig_orient_guide = cmds.group(name='right_lookat_orientGuide', empty=True)
+        main_lookat_rig_orient_guide = cmds.group(name=self.node('main_lookat_orientGuide'), empty=True)
+        left_lookat_rig_orient_guide = cmds.group(name=self.node('left_lookat_orientGuide'), empty=True)
+        right_lookat_rig_orient_guide = cmds.group(name=self.node('right_lookat_orientGuide'), empty=True)
         self.snap_objects([self.left_eye_transform, self.right_eye_transform, main_lookat_rig_orient_guide])
         self.snap_objects([self.left_eye_transform, left_lookat_rig_orient_guide])
         self.snap_objects([self.right_eye_transform, right_lookat_rig_orient_guide])
 
-    @staticmethod
-    def delete_lookat_placement_guides():
+    def delete_lookat_placement_guides(self):
         # Delete null guide objects, used to place and orient the eye aim system.
-        cmds.delete(['main_lookat_orientGuide', 'left_lookat_orientGuide', 'right_lookat_orientGuide'])
+        cmds.delete([self.node('main_lookat_orientGuide'),
+                     self.node('left_lookat_orientGuide'),
+                     self.node('right_lookat_orientGuide')])
 
     def place_lookat_rig(self):
         # Place the eye aim rig in 3D space according to null guide objects.
-        self.snap_objects(['main_lookat_orientGuide', 'lookat_system_orient'])
-        self.snap_objects(['main_lookat_orientGuide', 'lookat_system_orient'])
-        self.snap_objects(['left_lookat_orientGuide', 'L_lookat_system_orient'])
-        self.snap_objects(['left_lookat_orientGuide', 'L_lookat_system_orient'])
-        self.snap_objects(['right_lookat_orientGuide', 'R_lookat_system_orient'])
-        self.snap_objects(['right_lookat_orientGuide', 'R_lookat_system_orient'])
+        self.snap_objects([self.node('main_lookat_orientGuide'), self.node('lookat_system_orient')])
+        self.snap_objects([self.node('main_lookat_orientGuide'), self.node('lookat_system_orient')])
+        self.snap_objects([self.node('left_lookat_orientGuide'), self.node('L_lookat_system_orient')])
+        self.snap_objects([self.node('left_lookat_orientGuide'), self.node('L_lookat_system_orient')])
+        self.snap_objects([self.node('right_lookat_orientGuide'), self.node('R_lookat_system_orient')])
+        self.snap_objects([self.node('right_lookat_orientGuide'), self.node('R_lookat_system_orient')])
 
         # Re-orient "system_orient" groups, to work with control orientation.
-        groups_to_orient = ['lookat_system_orient', 'L_lookat_system_orient', 'R_lookat_system_orient']
+        groups_to_orient = [self.node('lookat_system_orient'),
+                            self.node('L_lookat_system_orient'),
+                            self.node('R_lookat_system_orient')]
         for group_ in groups_to_orient:
             axis_values = []
             rotates = ['rx', 'ry', 'rz']
@@ -91,80 +235,322 @@ class AssembleLookAt(object):
 
     def create_eye_control_heirarchy(self):
         # Place control and rig groups correctly in the scene hierarchy.
-        cmds.parent('L_lookat_system_orient', 'lookat_ctl')
-        cmds.parent('R_lookat_system_orient', 'lookat_ctl')
-        cmds.parent('L_lookat_loc_grp', 'lookat_rig_grp')
-        cmds.parent('R_lookat_loc_grp', 'lookat_rig_grp')
-        cmds.parent('L_Eye_upVec_grp', 'lookat_rig_grp')
-        cmds.parent('R_Eye_upVec_grp', 'lookat_rig_grp')
-        cmds.parent('EyeCenter_loc_grp', 'lookat_rig_grp')
-        cmds.parent('EyeCenter_upVec_grp', 'lookat_rig_grp')
-
-        cmds.parent('LocalSpace_parent_loc_placement', 'lookat_rig_grp')
-        cmds.parent('grp_control_eyes', self.controls_root)
+        cmds.parent(self.node('L_lookat_system_orient'), self.node('lookat_ctl'))
+        cmds.parent(self.node('R_lookat_system_orient'), self.node('lookat_ctl'))
+        cmds.parent(self.node('L_lookat_loc_grp'), self.node('lookat_rig_grp'))
+        cmds.parent(self.node('R_lookat_loc_grp'), self.node('lookat_rig_grp'))
+        cmds.parent(self.node('L_Eye_upVec_grp'), self.node('lookat_rig_grp'))
+        cmds.parent(self.node('R_Eye_upVec_grp'), self.node('lookat_rig_grp'))
+        cmds.parent(self.node('EyeCenter_loc_grp'), self.node('lookat_rig_grp'))
+        cmds.parent(self.node('EyeCenter_upVec_grp'), self.node('lookat_rig_grp'))
+
+        cmds.parent(self.node('LocalSpace_parent_loc_placement'), self.node('lookat_rig_grp'))
+        cmds.parent(self.node('grp_control_eyes'), self.controls_root)
 
     def connect_sightlines(self):
-        cmds.parentConstraint('EyeCenter_loc', 'eyes_distance_start')
-        cmds.parentConstraint(self.left_eye_transform, 'left_eye_distance_start')
-        cmds.parentConstraint(self.right_eye_transform, 'right_eye_distance_start')
+        cmds.parentConstraint(self.node('EyeCenter_loc'), self.node('eyes_distance_start'))
+        cmds.parentConstraint(self.left_eye_transform, self.node('left_eye_distance_start'))
+        cmds.parentConstraint(self.right_eye_transform, self.node('right_eye_distance_start'))
 
     def connect_lookat_rig(self):
         # Connects custom ranges
-        cmds.setAttr('lookat_custom_range_plug.NL_61_Min', self.au_61_min)
-        cmds.setAttr('lookat_custom_range_plug.NL_61_Max', self.au_61_max)
-        cmds.setAttr('lookat_custom_range_plug.NL_62_Min', self.au_62_min)
-        cmds.setAttr('lookat_custom_range_plug.NL_62_Max', self.au_62_max)
-        cmds.setAttr('lookat_custom_range_plug.NL_63_Min', self.au_63_min)
-        cmds.setAttr('lookat_custom_range_plug.NL_63_Max', self.au_63_max)
-        cmds.setAttr('lookat_custom_range_plug.NL_64_Min', self.au_64_min)
-        cmds.setAttr('lookat_custom_range_plug.NL_64_Max', self.au_64_max)
-
-        cmds.setAttr('lookat_custom_range_plug.NR_61_Min', self.au_61_min)
-        cmds.setAttr('lookat_custom_range_plug.NR_61_Max', self.au_61_max)
-        cmds.setAttr('lookat_custom_range_plug.NR_62_Min', self.au_62_min)
-        cmds.setAttr('lookat_custom_range_plug.NR_62_Max', self.au_62_max)
-        cmds.setAttr('lookat_custom_range_plug.NR_63_Min', self.au_63_min)
-        cmds.setAttr('lookat_custom_range_plug.NR_63_Max', self.au_63_max)
-        cmds.setAttr('lookat_custom_range_plug.NR_64_Min', self.au_64_min)
-        cmds.setAttr('lookat_custom_range_plug.NR_64_Max', self.au_64_max)
-
-        cmds.connectAttr('final_rotation_output.NL_61_62', "{0}.ry".format(self.left_eye_transform), force=True)
-        cmds.connectAttr('final_rotation_output.NL_63_64', "{0}.rx".format(self.left_eye_transform), force=True)
-        cmds.connectAttr('final_rotation_output.NR_61_62', "{0}.ry".format(self.right_eye_transform), force=True)
-        cmds.connectAttr('final_rotation_output.NR_63_64', "{0}.rx".format(self.right_eye_transform), force=True)
+        range_plug = self.node('lookat_custom_range_plug')
+        for side in ['NL', 'NR']:
+            cmds.setAttr('{0}.{1}_61_Min'.format(range_plug, side), self.au_61_min)
+            cmds.setAttr('{0}.{1}_61_Max'.format(range_plug, side), self.au_61_max)
+            cmds.setAttr('{0}.{1}_62_Min'.format(range_plug, side), self.au_62_min)
+            cmds.setAttr('{0}.{1}_62_Max'.format(range_plug, side), self.au_62_max)
+            cmds.setAttr('{0}.{1}_63_Min'.format(range_plug, side), self.au_63_min)
+            cmds.setAttr('{0}.{1}_63_Max'.format(range_plug, side), self.au_63_max)
+            cmds.setAttr('{0}.{1}_64_Min'.format(range_plug, side), self.au_64_min)
+            cmds.setAttr('{0}.{1}_64_Max'.format(range_plug, side), self.au_64_max)
+
+        final_rotation_output = self.node('final_rotation_output')
+        cmds.connectAttr(final_rotation_output + '.NL_61_62', "{0}.ry".format(self.left_eye_transform), force=True)
+        cmds.connectAttr(final_rotation_output + '.NL_63_64', "{0}.rx".format(self.left_eye_transform), force=True)
+        cmds.connectAttr(final_rotation_output + '.NR_61_62', "{0}.ry".format(self.right_eye_transform), force=True)
+        cmds.connectAttr(final_rotation_output + '.NR_63_64', "{0}.rx".format(self.right_eye_transform), force=True)
 
         # Connect enable lookAt to main visibility control
-        cmds.addAttr(self.head_transform, longName="enable_lookat", attributeType='double', min=0, max=1,
-                     defaultValue=0, keyable=True)
-        cmds.connectAttr('{0}.enable_lookat'.format(self.head_transform), 'au_eyes_ctl.look_at_enabled')
-        cmds.connectAttr('{0}.enable_lookat'.format(self.head_transform), 'lookat_enabled_reverse.inputX')
+        if not cmds.attributeQuery('enable_lookat', node=self.head_transform, exists=True):
+            cmds.addAttr(self.head_transform, longName="enable_lookat", attributeType='double', min=0, max=1,
+                         defaultValue=0, keyable=True)
+            self.added_attributes.append('{0}.enable_lookat'.format(self.head_transform))
+        cmds.connectAttr('{0}.enable_lookat'.format(self.head_transform), self.node('au_eyes_ctl.look_at_enabled'))
+        cmds.connectAttr('{0}.enable_lookat'.format(self.head_transform), self.node('lookat_enabled_reverse.inputX'))
 
         # Parent constrain the master eye aim group to the "Head" transform
-        cmds.parentConstraint(self.head_transform, 'lookat_rig_grp', maintainOffset=True)
+        cmds.parentConstraint(self.head_transform, self.node('lookat_rig_grp'), maintainOffset=True)
 
         # Aim constrain the local and world eye aim controls to always point toward the "EyeCenter_loc".
-        cmds.aimConstraint('EyeCenter_loc', 'lookat_ctl', maintainOffset=True, aimVector=[0, 0, -1],
-                           upVector=[0, 1, 0], worldUpType="objectrotation", worldUpVector=[1, 0, 0],
-                           worldUpObject='EyeCenter_loc')
+        cmds.aimConstraint(self.node('EyeCenter_loc'), self.node('lookat_ctl'), maintainOffset=True,
+                           aimVector=[0, 0, -1], upVector=[0, 1, 0], worldUpType="objectrotation",
+                           worldUpVector=[1, 0, 0], worldUpObject=self.node('EyeCenter_loc'))
 
         # Adds two aim constraints required for the sight line extension feature.
-        cmds.aimConstraint(self.left_eye_transform, 'L_sightline_extend_grp', aimVector=[0, 0, -1], upVector=[0, 1, 0],
-                           worldUpType="object", worldUpObject='L_sightline_extend_up_vector')
-        cmds.aimConstraint(self.right_eye_transform, 'R_sightline_extend_grp', aimVector=[0, 0, -1], upVector=[0, 1, 0],
-                           worldUpType="object", worldUpObject='R_sightline_extend_up_vector')
+        cmds.aimConstraint(self.left_eye_transform, self.node('L_sightline_extend_grp'), aimVector=[0, 0, -1],
+                           upVector=[0, 1, 0], worldUpType="object",
+                           worldUpObject=self.node('L_sightline_extend_up_vector'))
+        cmds.aimConstraint(self.right_eye_transform, self.node('R_sightline_extend_grp'), aimVector=[0, 0, -1],
+                           upVector=[0, 1, 0], worldUpType="object",
+                           worldUpObject=self.node('R_sightline_extend_up_vector'))
 
         # Locks rotation on eye aim control
-        cmds.setAttr("lookat_ctl.r", lock=True)
+        cmds.setAttr(self.node("lookat_ctl.r"), lock=True)
+
+    def load_solver_plugin(self):
+        plugin_name = os.path.splitext(SOLVER_PLUGIN)[0]
+        if not cmds.pluginInfo(plugin_name, query=True, loaded=True):
+            cmds.loadPlugin("{0}/{1}".format(self.source_root, SOLVER_PLUGIN), quiet=True)
+
+    def build_solver_node(self):
+        """Drives lookat_output's action units, plot_to_au_values, eyes_combined_values' action units,
+        hlp_control_lookat_output and final_rotation_output with one lookatSolver node and deletes the
+        network nodes that computed them"""
+        self.load_solver_plugin()
+        solver = cmds.createNode(SOLVER_NODE_TYPE, name=self.node('lookat_solver'))
+
+        for side, prefix in [('L', 'left'), ('R', 'right')]:
+            lookat_loc = self.node('{0}_lookat_loc'.format(side))
+            cmds.connectAttr(lookat_loc + '.translate', '{0}.{1}Translate'.format(solver, prefix))
+            cmds.connectAttr(lookat_loc + '.parentMatrix[0]', '{0}.{1}ParentMatrix'.format(solver, prefix))
+            cmds.connectAttr(self.node('{0}_lookat_ctl.worldMatrix[0]'.format(side)),
+                             '{0}.{1}TargetMatrix'.format(solver, prefix))
+            cmds.connectAttr(self.node('{0}_Eye_upVec.worldMatrix[0]'.format(side)),
+                             '{0}.{1}UpMatrix'.format(solver, prefix))
+            for axis in ['RX', 'RZ']:
+                cmds.connectAttr(self.node('lookat_output.{0}Eye_convergence_{1}'.format(prefix.capitalize(), axis)),
+                                 '{0}.{1}Convergence{2}'.format(solver, prefix, axis))
+        cmds.connectAttr(self.node('eye_contol_switch_remap_crv.output'), solver + '.lookatBlend')
+        cmds.connectAttr(self.node('convergence_enabled_remap_crv.output'), solver + '.convergenceBlend')
+
+        range_plug = self.node('lookat_custom_range_plug')
+        replaced = []
+        for side in ['NL', 'NR']:
+            for number in ['61', '62', '63', '64']:
+                action_unit = '{0}_{1}'.format(side, number)
+                for suffix in ['Min', 'Max']:
+                    cmds.connectAttr('{0}.{1}_{2}'.format(range_plug, action_unit, suffix),
+                                     '{0}.{1}_{2}'.format(solver, action_unit, suffix))
+                cmds.connectAttr(self.node('gaze_output.' + action_unit), '{0}.{1}_gaze'.format(solver, action_unit))
+                replaced.append((action_unit, self.node('lookat_output.' + action_unit)))
+                replaced.append((action_unit + '_combined', self.node('eyes_combined_values.' + action_unit)))
+                replaced.append((action_unit + '_control', self.node('hlp_control_lookat_output.' + action_unit)))
+        for attribute in ['C_TX', 'C_TY', 'L_TX', 'L_TY', 'R_TX', 'R_TY']:
+            replaced.append((attribute, self.node('plot_to_au_values.' + attribute)))
+        for attribute in ['NL_61_62', 'NL_63_64', 'NR_61_62', 'NR_63_64']:
+            replaced.append((attribute, self.node('final_rotation_output.' + attribute)))
+
+        old_sources = set()
+        for attribute, destination in replaced:
+            old_sources.update(cmds.listConnections(destination, source=True, destination=False) or [])
+            cmds.connectAttr('{0}.{1}'.format(solver, attribute), destination, force=True)
+        self.delete_unused_network(old_sources)
+        return solver
+
+    @staticmethod
+    def drives_anything(node):
+        """Whether node has outgoing connections other than its message (every utility node's message
+        is connected to defaultRenderUtilityList1, some to a hyperLayout)"""
+        pairs = cmds.listConnections(node, source=False, destination=True, connections=True, plugs=True) or []
+        return any(plug.split('.', 1)[1] not in ('message', 'msg') for plug in pairs[::2])
+
+    @classmethod
+    def delete_unused_network(cls, nodes):
+        """Deletes the network nodes that no longer drive anything, then their sources that became
+        unused the same way. Referenced nodes can't be deleted and stay."""
+        pending = list(nodes)
+        while pending:
+            node = pending.pop()
+            if not cmds.objExists(node) or cmds.nodeType(node) not in SOLVER_NETWORK_TYPES:
+                continue
+            if cmds.referenceQuery(node, isNodeReferenced=True):
+                continue
+            if cls.drives_anything(node):
+                continue
+            pending.extend(cmds.listConnections(node, source=True, destination=False) or [])
+            cmds.delete(node)
 
     def place_au_eyes_controls(self):
         control_placement_list = [self.left_eye_transform, self.right_eye_transform, self.fk_placement_root]
         self.snap_objects(control_placement_list)
-        cmds.setAttr('au_eyes_ctl_placement_offset.tz', 6)
-        cmds.parentConstraint(self.head_transform, 'au_eyes_ctl_placement_grp', maintainOffset=True)
+        cmds.setAttr(self.node('au_eyes_ctl_placement_offset.tz'), 6)
+        cmds.parentConstraint(self.head_transform, self.node('au_eyes_ctl_placement_grp'), maintainOffset=True)
 
     def constrain_plot_to_lookat(self):
-        cmds.parentConstraint(self.head_transform, 'C_absolute_direction_constrained_grp', maintainOffset=True)
-        cmds.parentConstraint(self.head_transform, 'L_absolute_direction_constrained_grp', maintainOffset=True)
-        cmds.parentConstraint(self.head_transform, 'R_absolute_direction_constrained_grp', maintainOffset=True)
+        cmds.parentConstraint(self.head_transform, self.node('C_absolute_direction_constrained_grp'),
+                              maintainOffset=True)
+        cmds.parentConstraint(self.head_transform, self.node('L_absolute_direction_constrained_grp'),
+                              maintainOffset=True)
+        cmds.parentConstraint(self.head_transform, self.node('R_absolute_direction_constrained_grp'),
+                              maintainOffset=True)
+
+        cmds.parentConstraint(self.head_transform, self.node('convergence_constrained_grp'), maintainOffset=True)
+
+
+class BatchAssembleLookAt(object):
+    """Builds the lookAt rigs of many characters in one pass, each into its own namespace.
+
+    characters is a list of (namespace, joint mapping or None) pairs:
+
+    BatchAssembleLookAt([('charA', None),
+                         ('charB', {'head': 'charB:head_jnt'})])._run()
+
+    Everything is checked before the scene is touched. Imported prefabs are loaded once, into
+    PREFAB_SOURCE_NAMESPACE, and their rig nodes duplicated into each character's namespace;
+    referenced prefabs are one reference per character. The batch is one undo chunk. If any
+    character fails, everything the batch created is deleted, the attributes it added are removed
+    and the references it made are removed again: file imports and references can't be undone
+    reliably, so the roll back doesn't rely on undo.
+    """
+
+    def __init__(self, characters, lookat_prefab=None, prefab_mode=PREFAB_IMPORT, solver_node=False,
+                 pruned_prefab=False):
+        self.assemblies = [AssembleLookAt(namespace, joints, lookat_prefab, prefab_mode, solver_node, pruned_prefab)
+                           for namespace, joints in characters]
+        self.prefab_mode = prefab_mode
+        self.created_nodes = []
+        self.created_namespaces = []
+
+    def validate(self):
+        namespaces = [assembly.namespace for assembly in self.assemblies]
+        if None in namespaces:
+            raise ValueError("Every character of a batch needs a namespace.")
+        duplicates = sorted(set(namespace for namespace in namespaces if namespaces.count(namespace) > 1))
+        if duplicates:
+            raise ValueError("Characters listed more than once: {0}".format(', '.join(duplicates)))
+
+        lookat_prefabs = set(assembly.lookat_prefab for assembly in self.assemblies)
+        for lookat_prefab in lookat_prefabs:
+            if not os.path.isfile(lookat_prefab):
+                raise IOError("LookAt prefab not found: {0}".format(lookat_prefab))
+
+        errors = []
+        for assembly in self.assemblies:
+            if assembly.is_assembled():
+                errors.append("{0}: already has a lookAt rig".format(assembly.namespace))
+            missing_joints = assembly.get_missing_joints()
+            if missing_joints:
+                errors.append("{0}: missing {1}".format(assembly.namespace, ', '.join(missing_joints)))
+        if errors:
+            raise RuntimeError("Can't assemble the lookAt rigs:\n{0}".format('\n'.join(errors)))
+
+    @lookat_utilities.undo_able
+    def _run(self):
+        self.validate()
+
+        self.created_nodes = []
+        self.created_namespaces = [assembly.namespace for assembly in self.assemblies
+                                   if not cmds.namespace(exists=':{0}'.format(assembly.namespace))]
+        callbacks_pool = lookat_utilities.CallbacksPool.getInstance()
+        callbacks_pool.add_node_callback(self.node_added, owner=self)
+        cmds.refresh(suspend=True)
+        prefab_source = None
+        try:
+            if self.prefab_mode == PREFAB_IMPORT:
+                prefab_source = self.load_prefab_source(self.assemblies[0].lookat_prefab)
+            for assembly in self.assemblies:
+                assembly.prefab_source = prefab_source
+                assembly._run()
+        except Exception:
+            self.roll_back()
+            raise
+        finally:
+            callbacks_pool.remove_callbacks(owner=self)
+            if cmds.namespace(exists=':' + PREFAB_SOURCE_NAMESPACE):
+                cmds.namespace(removeNamespace=':' + PREFAB_SOURCE_NAMESPACE, deleteNamespaceContent=True)
+            cmds.refresh(suspend=False)
+        return [assembly.namespace for assembly in self.assemblies]
+
+    def node_added(self, node, *args):
+        """Node added callback: keeps a handle on every node the batch creates, for roll_back"""
+        self.created_nodes.append(OpenMaya.MObjectHandle(node))
+
+    @staticmethod
+    def load_prefab_source(lookat_prefab):
+        """Imports the prefab once into PREFAB_SOURCE_NAMESPACE and tags its rig nodes with their
+        names (PREFAB_NAME_ATTRIBUTE). Returns the top level rig transforms: duplicating them with
+        their upstream nodes copies the rig."""
+        namespace = ':' + PREFAB_SOURCE_NAMESPACE
+        if cmds.namespace(exists=namespace):
+            cmds.namespace(removeNamespace=namespace, deleteNamespaceContent=True)
+        cmds.file(lookat_prefab, i=True, ignoreVersion=True, namespace=PREFAB_SOURCE_NAMESPACE)
+        # Full DAG paths, the prefab's shape names aren't all unique.
+        nodes = cmds.ls('{0}:*'.format(PREFAB_SOURCE_NAMESPACE), long=True) or []
+        rig_nodes = [node for node in nodes if cmds.nodeType(node) not in PREFAB_SCENE_NODE_TYPES]
+        for node in rig_nodes:
+            cmds.addAttr(node, longName=PREFAB_NAME_ATTRIBUTE, dataType='string')
+            cmds.setAttr('{0}.{1}'.format(node, PREFAB_NAME_ATTRIBUTE), node.rsplit('|', 1)[-1].rsplit(':', 1)[-1],
+                         type='string')
+
+        roots = []
+        for node in cmds.ls(rig_nodes, type='transform', long=True) or []:
+            shapes = cmds.listRelatives(node, shapes=True, fullPath=True) or []
+            if node.count('|') == 1 and not cmds.ls(shapes, type='camera'):
+                roots.append(node)
+        return sorted(roots)
+
+    def roll_back(self):
+        """Deletes what the batch created and removes the references and attributes it added"""
+        for assembly in reversed(self.assemblies):
+            assembly.remove_reference()
+            assembly.remove_added_attributes()
+
+        paths = []
+        for handle in self.created_nodes:
+            if not handle.isValid():
+                continue
+            node = handle.object()
+            if node.hasFn(OpenMaya.MFn.kDagNode):
+                paths.append(OpenMaya.MDagPath.getAPathTo(node).fullPathName())
+            else:
+                paths.append(OpenMaya.MFnDependencyNode(node).name())
+        # Deleting a DAG node deletes its children, don't list them again.
+        created = set(paths)
+        paths = [path for path in paths
+                 if not any('|'.join(path.split('|')[:index]) in created for index in range(2, path.count('|') + 1))]
+        existing = [path for path in paths if cmds.objExists(path)]
+        if existing:
+            cmds.delete(existing)
+        self.created_nodes = []
+
+        for namespace in self.created_namespaces:
+            if cmds.namespace(exists=':' + namespace):
+                cmds.namespace(removeNamespace=':' + namespace, deleteNamespaceContent=True)
+        self.created_namespaces = []
+
+
+def measure_prefab_modes(scene_file, characters, lookat_prefab=None, output_dir=None, file_type='mayaBinary'):
+    """
+    Assembles the characters of a scene once per prefab mode, saves the result and times opening it.
+    Returns {prefab mode: {'file': path, 'file_size': bytes, 'assemble_seconds': s, 'open_seconds': s}}.
+    Run it in mayapy or a throwaway session, it opens scenes.
+    """
+    output_dir = output_dir or tempfile.mkdtemp(prefix='lookat_prefab_modes_')
+    extension = '.mb' if file_type == 'mayaBinary' else '.ma'
+    scene_name = os.path.splitext(os.path.basename(scene_file))[0]
+
+    results = {}
+    for prefab_mode in PREFAB_MODES:
+        cmds.file(scene_file, open=True, force=True)
+        start = time.time()
+        BatchAssembleLookAt(characters, lookat_prefab, prefab_mode)._run()
+        assemble_seconds = time.time() - start
+
+        output_file = os.path.join(output_dir, '{0}_{1}{2}'.format(scene_name, prefab_mode, extension))
+        cmds.file(rename=output_file)
+        cmds.file(save=True, force=True, type=file_type)
+
+        cmds.file(new=True, force=True)
+        start = time.time()
+        cmds.file(output_file, open=True, force=True)
+        results[prefab_mode] = {'file': output_file,
+                                'file_size': os.path.getsize(output_file),
+                                'assemble_seconds': assemble_seconds,
+                                'open_seconds': time.time() - start}
 
-        cmds.parentConstraint(self.head_transform, 'convergence_constrained_grp', maintainOffset=True)
+    for prefab_mode in PREFAB_MODES:
+        lookat_utilities.log.info("{0:>10}: {1:>10} bytes, assembled in {2:.2f}s, opens in {3:.2f}s".format(
+            prefab_mode, results[prefab_mode]['file_size'], results[prefab_mode]['assemble_seconds'],
+            results[prefab_mode]['open_seconds']))
+    return results
@@ -0,0 +1,213 @@
+"""
+Audits the eye animation of every facerig character in the scene, for delivery checks:
+
+    lookat_audit.audit_scene('/tmp/shot010_eye_audit.json')
+
+For each character the report holds the active eye mode (as the lookAt tool reads it), the key
+count of every lookat / AU eyes / switch channel, the constant curves, the redundant keys, and the
+enable_lookat / SpaceWorldHead switches with the eye mode segments they cut the playback range into.
+
+Nothing is evaluated per frame: each curve is read with one bulk keyframe / keyTangent query per
+column and analyzed with numpy. The switch attributes are boolean / enum attributes, keyed with
+stepped curves, so the mode segments are read from the held key values.
+"""
+import json
+import time
+
+from maya import cmds
+
+import numpy
+
+import lookat_curve_exchange
+import lookat_plan
+import lookat_utilities
+
+SWITCH_ATTRIBUTES = [lookat_plan.ENABLE_LOOKAT_ATTRIBUTE, lookat_plan.SPACE_WORLD_HEAD_ATTRIBUTE]
+
+# Keys holding the value of both neighbours only change the curve through these tangents.
+SHAPING_TANGENTS = ['spline', 'fixed', 'plateau']
+
+REPORT_VERSION = 1
+
+
+def query_keys(curve):
+    """Returns {'times', 'values', 'in_tangent_types', 'out_tangent_types'} of an anim curve, one
+    query per column"""
+    times = cmds.keyframe(curve, query=True, timeChange=True) if curve else None
+    if not times:
+        return {'times': numpy.zeros(0), 'values': numpy.zeros(0), 'in_tangent_types': [],
+                'out_tangent_types': []}
+    return {'times': numpy.asarray(times, dtype=numpy.float64),
+            'values': numpy.asarray(cmds.keyframe(curve, query=True, valueChange=True), dtype=numpy.float64),
+            'in_tangent_types': cmds.keyTangent(curve, query=True, inTangentType=True),
+            'out_tangent_types': cmds.keyTangent(curve, query=True, outTangentType=True)}
+
+
+def is_constant(values, tolerance=1e-5):
+    return not len(values) or numpy.ptp(values) <= tolerance
+
+
+def find_redundant_keys(keys, tolerance=1e-5):
+    """Returns the indices of the inner keys that can be deleted without changing the curve: keys
+    repeating the value of both neighbours (unless spline, fixed or plateau tangents shape the
+    segments) and linear keys on the line between their neighbours."""
+    values = keys['values']
+    if len(values) < 3:
+        return numpy.zeros(0, dtype=int)
+    times = keys['times']
+    in_types = numpy.asarray(keys['in_tangent_types'])
+    out_types = numpy.asarray(keys['out_tangent_types'])
+
+    previous, current, following = values[:-2], values[1:-1], values[2:]
+    shaping = numpy.zeros(len(values), dtype=bool)
+    for tangent in SHAPING_TANGENTS:
+        shaping |= (in_types == tangent) | (out_types == tangent)
+    holds = ((numpy.abs(current - previous) <= tolerance) & (numpy.abs(following - current) <= tolerance) &
+             ~(shaping[:-2] | shaping[1:-1] | shaping[2:]))
+
+    linear_segments = (out_types[:-2] == 'linear') & (in_types[1:-1] == 'linear') & \
+                      (out_types[1:-1] == 'linear') & (in_types[2:] == 'linear')
+    weights = (times[1:-1] - times[:-2]) / (times[2:] - times[:-2])
+    on_line = numpy.abs(previous + (following - previous) * weights - current) <= tolerance
+
+    return numpy.flatnonzero(holds | (linear_segments & on_line)) + 1
+
+
+def find_switches(keys, tolerance=1e-5):
+    """Returns [(time, from value, to value)] of the keys that change a switch attribute's value"""
+    values = keys['values']
+    changes = numpy.flatnonzero(numpy.abs(numpy.diff(values)) > tolerance) + 1
+    return [(float(keys['times'][index]), float(values[index - 1]), float(values[index])) for index in changes]
+
+
+def get_held_values(keys, times, default):
+    """Returns the value a stepped curve holds at each time, default when the curve has no keys"""
+    if not len(keys['times']):
+        return numpy.full(len(times), float(default))
+    indices = numpy.searchsorted(keys['times'], times, side='right') - 1
+    return keys['values'][numpy.clip(indices, 0, None)]
+
+
+def get_mode_segments(switch_keys, static_values, startframe, endframe):
+    """Returns [{'start', 'end', 'mode'}] of the eye mode over the range, cut at the switch keys"""
+    cuts = [startframe]
+    for keys in switch_keys.values():
+        times = keys['times']
+        cuts.extend(float(key_time) for key_time in times[(times > startframe) & (times <= endframe)])
+    cuts = numpy.unique(cuts)
+
+    held = dict((attribute, get_held_values(switch_keys[attribute], cuts, static_values[attribute]))
+                for attribute in SWITCH_ATTRIBUTES)
+    modes = [lookat_plan.get_eye_control_mode(enable_lookat, space_world_head)
+             for enable_lookat, space_world_head in zip(held[lookat_plan.ENABLE_LOOKAT_ATTRIBUTE],
+                                                         held[lookat_plan.SPACE_WORLD_HEAD_ATTRIBUTE])]
+
+    segments = []
+    for start, mode in zip(cuts, modes):
+        if segments and segments[-1]['mode'] == mode:
+            continue
+        if segments:
+            segments[-1]['end'] = float(start)
+        segments.append({'start': float(start), 'end': float(endframe), 'mode': mode})
+    return segments
+
+
+def get_switch_keys(namespace):
+    """Returns ({attribute: (anim curve or None, keys)}, {attribute: current value}) of the switch
+    attributes, None values for attributes the namespace doesn't have"""
+    switch_keys = {}
+    static_values = {}
+    for attribute in SWITCH_ATTRIBUTES:
+        plug = lookat_curve_exchange.get_node_name(namespace, attribute)
+        static_values[attribute] = cmds.getAttr(plug) if cmds.objExists(plug) else None
+        curves = cmds.listConnections(plug, type='animCurve', source=True, destination=False) \
+            if static_values[attribute] is not None else None
+        curve = curves[0] if curves else None
+        switch_keys[attribute] = (curve, query_keys(curve))
+    return switch_keys, static_values
+
+
+def audit_channel(attribute, curve, keys, tolerance=1e-5):
+    channel = {'attribute': attribute, 'curve': curve, 'keys': len(keys['times'])}
+    if len(keys['times']):
+        redundant = find_redundant_keys(keys, tolerance)
+        channel.update(start=float(keys['times'][0]), end=float(keys['times'][-1]),
+                       min=float(keys['values'].min()), max=float(keys['values'].max()),
+                       constant=bool(is_constant(keys['values'], tolerance)),
+                       redundant_keys=[float(key_time) for key_time in keys['times'][redundant]])
+    else:
+        channel.update(constant=True, redundant_keys=[])
+    return channel
+
+
+def audit_character(namespace, startframe, endframe, tolerance=1e-5):
+    """Returns the report of one character, see audit_scene"""
+    channels = [audit_channel(attribute, curve, query_keys(curve), tolerance)
+                for attribute, curve in lookat_curve_exchange.get_control_curves(namespace)]
+
+    switch_curves, static_values = get_switch_keys(namespace)
+    switches = []
+    for attribute in SWITCH_ATTRIBUTES:
+        curve, keys = switch_curves[attribute]
+        if curve:
+            channels.append(audit_channel(attribute, curve, keys, tolerance))
+        switches.extend({'attribute': attribute, 'time': key_time, 'from': before, 'to': after,
+                         'mid_shot': startframe < key_time <= endframe}
+                        for key_time, before, after in find_switches(keys, tolerance))
+    switches.sort(key=lambda switch: (switch['time'], switch['attribute']))
+
+    character = {'namespace': namespace,
+                 'channels': channels,
+                 'keys': sum(channel['keys'] for channel in channels),
+                 'constant_curves': [channel['attribute'] for channel in channels
+                                     if channel['constant']],
+                 'redundant_keys': sum(len(channel['redundant_keys']) for channel in channels),
+                 'switches': switches,
+                 'mid_shot_switches': len([switch for switch in switches if switch['mid_shot']])}
+
+    if None in static_values.values():
+        # Not a lookat rig: no mode to report.
+        character.update(mode='', segments=[])
+        return character
+    character['mode'] = lookat_plan.get_eye_control_mode(static_values[lookat_plan.ENABLE_LOOKAT_ATTRIBUTE],
+                                                         static_values[lookat_plan.SPACE_WORLD_HEAD_ATTRIBUTE])
+    character['segments'] = get_mode_segments(dict((attribute, keys) for attribute, (_, keys)
+                                                   in switch_curves.items()),
+                                              static_values, startframe, endframe)
+    return character
+
+
+def audit_scene(filepath=None, namespaces=None, tolerance=1e-5):
+    """
+    Audits the given namespaces (all facerig characters by default) over the playback range and
+    writes the report as json when a filepath is given. Returns the report:
+    {'scene', 'time_unit', 'range', 'frame', 'characters', 'totals', 'seconds'}, each character
+    {'namespace', 'mode', 'segments', 'switches', 'mid_shot_switches', 'channels', 'keys',
+    'constant_curves', 'redundant_keys'}.
+    """
+    start = time.time()
+    namespaces = lookat_utilities.get_facerig_characters() if namespaces is None else namespaces
+    startframe, endframe = lookat_utilities.get_timeline_range()
+
+    characters = [audit_character(namespace, startframe, endframe, tolerance) for namespace in namespaces]
+    report = {'version': REPORT_VERSION,
+              'scene': cmds.file(query=True, sceneName=True),
+              'time_unit': cmds.currentUnit(query=True, time=True),
+              'range': [startframe, endframe],
+              'frame': lookat_utilities.get_current_frame(),
+              'characters': characters,
+              'totals': {'characters': len(characters),
+                         'keys': sum(character['keys'] for character in characters),
+                         'constant_curves': sum(len(character['constant_curves']) for character in characters),
+                         'redundant_keys': sum(character['redundant_keys'] for character in characters),
+                         'mixed_mode_characters': len([character for character in characters
+                                                       if len(character['segments']) > 1])}}
+    report['seconds'] = time.time() - start
+
+    if filepath:
+        with open(filepath, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+    lookat_utilities.log.info("Audited {characters} characters, {keys} keys: {constant_curves} constant curves, "
+                              "{redundant_keys} redundant keys, {mixed_mode_characters} characters switching "
+                              "eye mode mid-shot ({0:.2f}s)".format(report['seconds'], **report['totals']))
+    return report
@@ -0,0 +1,128 @@
+"""
+Pre-flight cost estimates for the lookat plots.
+
+A plot's cost is dominated by graph evaluations: every sampled time evaluates a number of plugs
+(matrices and attributes) that depends on the conversion. The estimate is
+
+    sample times x evaluated plugs x seconds per evaluation
+
+where the seconds per evaluation are learned from the previous plots of the same conversion and
+kept in a small json history file.
+"""
+import json
+import os
+
+import lookat_plan
+
+# Plugs evaluated per sample time by each conversion, counted from the LookAtPlotter methods that
+# sample them: one per world matrix, parent matrix (world_positions_to_local) and attribute.
+PLUGS_PER_SAMPLE = {
+    # capture_plot_frames_for_lookat: 3 final translation world matrices, 3 control parent matrices
+    lookat_plan.FROM_AU_EYES: 3 + 3,
+    # solve_au_values: L/R lookat loc, lookat control and up vector world matrices, 2 loc parent matrices
+    lookat_plan.TO_AU_EYES: 6 + 2,
+    # capture_plot_frames_for_space_swap: 3 control world matrices, write: 3 control parent matrices
+    lookat_plan.SPACE_SWAP: 3 + 3,
+    # capture_plot_frames_for_reaim: 3 direction locator and 3 control world matrices, 3 gaze distances,
+    # 6 child translations; write_plot_frames_for_reaim: main control parent, 2 child control parents,
+    # 3 control parents
+    lookat_plan.REAIM: 6 + 3 + 6 + 1 + 2 + 3}
+# get_aligned_lookat_world_positions: the user defined distance locator's parent matrix and tz.
+USER_DEFINED_DISTANCE_PLUGS = 2
+# The AU eyes written after a re-aim are solved like a lookAt to AU eyes plot.
+UPDATE_AU_EYES_PLUGS = PLUGS_PER_SAMPLE[lookat_plan.TO_AU_EYES]
+
+# Keyed anim curves per conversion, written once per key time.
+CURVES_WRITTEN = {lookat_plan.FROM_AU_EYES: 9,
+                  lookat_plan.TO_AU_EYES: 6,
+                  lookat_plan.SPACE_SWAP: 9,
+                  lookat_plan.REAIM: 9}
+
+# Used until a conversion has been profiled.
+DEFAULT_SECONDS_PER_EVALUATION = 0.0002
+DEFAULT_SECONDS_PER_KEY = 0.00001
+
+# Weight of a new measurement in the running average.
+HISTORY_WEIGHT = 0.3
+
+
+class CostEstimate(object):
+    """The predicted cost of one plot"""
+
+    def __init__(self, conversion, samples, keys, controls, plugs, seconds_per_evaluation, seconds_per_key):
+        self.conversion = conversion
+        self.samples = samples
+        self.keys = keys
+        self.controls = controls
+        self.plugs = plugs
+        self.evaluations = samples * plugs
+        self.seconds_per_evaluation = seconds_per_evaluation
+        self.seconds_per_key = seconds_per_key
+        self.predicted_seconds = (self.evaluations * seconds_per_evaluation +
+                                  keys * CURVES_WRITTEN.get(conversion, 0) * seconds_per_key)
+
+    def describe(self):
+        return '{0} samples x {1} plugs ({2} controls), ~{3:.2f}s'.format(self.samples, self.plugs,
+                                                                          self.controls, self.predicted_seconds)
+
+
+class ProfileHistory(object):
+    """Seconds per graph evaluation of each conversion, averaged over the profiled plots"""
+
+    def __init__(self, filepath=None):
+        self.filepath = filepath
+        self.profiles = {}
+        if filepath and os.path.isfile(filepath):
+            try:
+                with open(filepath) as history_file:
+                    self.profiles = json.load(history_file)
+            except (IOError, ValueError):
+                self.profiles = {}
+
+    def get_seconds_per_evaluation(self, conversion):
+        profile = self.profiles.get(conversion)
+        if not profile:
+            return DEFAULT_SECONDS_PER_EVALUATION
+        return profile['seconds_per_evaluation']
+
+    def record(self, estimate, actual_seconds):
+        """Folds a measured plot into the history and saves it"""
+        key_seconds = estimate.keys * CURVES_WRITTEN.get(estimate.conversion, 0) * estimate.seconds_per_key
+        if not estimate.evaluations:
+            return
+        measured = max(0.0, actual_seconds - key_seconds) / estimate.evaluations
+
+        profile = self.profiles.get(estimate.conversion)
+        if profile:
+            profile['seconds_per_evaluation'] += HISTORY_WEIGHT * (measured - profile['seconds_per_evaluation'])
+            profile['plots'] += 1
+        else:
+            self.profiles[estimate.conversion] = {'seconds_per_evaluation': measured, 'plots': 1}
+        self.save()
+
+    def save(self):
+        if not self.filepath:
+            return
+        try:
+            with open(self.filepath, 'w') as history_file:
+                json.dump(self.profiles, history_file, indent=4, sort_keys=True)
+        except IOError:
+            pass
+
+
+def get_plug_count(plan):
+    plugs = PLUGS_PER_SAMPLE[plan.conversion]
+    if plan.user_defined_distance and plan.conversion in (lookat_plan.FROM_AU_EYES, lookat_plan.REAIM):
+        plugs += USER_DEFINED_DISTANCE_PLUGS
+    if plan.update_au_eyes:
+        plugs += UPDATE_AU_EYES_PLUGS
+    return plugs
+
+
+def estimate_plot(plan, sample_times, key_times, controls=3, history=None):
+    """Returns the CostEstimate of running a ConversionPlan on the given times"""
+    seconds_per_evaluation = DEFAULT_SECONDS_PER_EVALUATION
+    if history:
+        seconds_per_evaluation = history.get_seconds_per_evaluation(plan.conversion)
+    return CostEstimate(plan.conversion, len(sample_times), len(key_times), controls, get_plug_count(plan),
+                        seconds_per_evaluation, DEFAULT_SECONDS_PER_KEY)
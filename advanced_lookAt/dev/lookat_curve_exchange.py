@@ -0,0 +1,226 @@
+"""
+Exports the lookat and AU eyes control curves of every character to a lookat_curve_file and imports
+them back, so eye animation can move between departments without the scenes.
+
+Characters are exported and imported one at a time. Each curve is read with one bulk keyframe /
+keyTangent query per column and written back with one addKeys call and one setTangentTypes call;
+only fixed tangents and weighted curves need per key edits. All the curves of a character are
+written in one lookat_utilities.AnimCurveEdit, and an import is one undo step.
+
+    lookat_curve_exchange.export_curves('/tmp/shot010_eyes.lkc')
+    lookat_curve_exchange.import_curves('/tmp/shot010_eyes.lkc', namespace_map={'charA': 'charB'})
+"""
+import time
+
+from maya import cmds
+from maya import OpenMaya
+from maya import OpenMayaAnim
+
+import numpy
+
+import lookat_curve_file
+import lookat_utilities
+
+# Controls whose curves are exchanged, without namespace.
+EXCHANGE_CONTROLS = ['lookat_ctl', 'L_lookat_ctl', 'R_lookat_ctl',
+                     'au_eyes_ctl', 'L_au_eyes_ctl', 'R_au_eyes_ctl']
+
+TANGENT_TYPES = {'auto': OpenMayaAnim.MFnAnimCurve.kTangentAuto,
+                 'spline': OpenMayaAnim.MFnAnimCurve.kTangentSmooth,
+                 'linear': OpenMayaAnim.MFnAnimCurve.kTangentLinear,
+                 'flat': OpenMayaAnim.MFnAnimCurve.kTangentFlat,
+                 'step': OpenMayaAnim.MFnAnimCurve.kTangentStep,
+                 'stepnext': OpenMayaAnim.MFnAnimCurve.kTangentStepNext,
+                 'clamped': OpenMayaAnim.MFnAnimCurve.kTangentClamped,
+                 'plateau': OpenMayaAnim.MFnAnimCurve.kTangentPlateau,
+                 'fixed': OpenMayaAnim.MFnAnimCurve.kTangentFixed,
+                 'slow': OpenMayaAnim.MFnAnimCurve.kTangentSlow,
+                 'fast': OpenMayaAnim.MFnAnimCurve.kTangentFast}
+
+INFINITY_TYPES = {'constant': OpenMayaAnim.MFnAnimCurve.kConstant,
+                  'linear': OpenMayaAnim.MFnAnimCurve.kLinear,
+                  'cycle': OpenMayaAnim.MFnAnimCurve.kCycle,
+                  'cycleRelative': OpenMayaAnim.MFnAnimCurve.kCycleRelative,
+                  'oscillate': OpenMayaAnim.MFnAnimCurve.kOscillate}
+
+CURVE_TYPES = {'animCurveTL': OpenMayaAnim.MFnAnimCurve.kAnimCurveTL,
+               'animCurveTA': OpenMayaAnim.MFnAnimCurve.kAnimCurveTA,
+               'animCurveTT': OpenMayaAnim.MFnAnimCurve.kAnimCurveTT,
+               'animCurveTU': OpenMayaAnim.MFnAnimCurve.kAnimCurveTU}
+
+AUTO_CODE = lookat_curve_file.TANGENT_TYPES.index('auto')
+FIXED_CODE = lookat_curve_file.TANGENT_TYPES.index('fixed')
+
+
+def to_int_array(values):
+    int_array = OpenMaya.MIntArray()
+    OpenMaya.MScriptUtil.createIntArrayFromList([int(value) for value in values], int_array)
+    return int_array
+
+
+def get_current_fps():
+    return OpenMaya.MTime(1.0, OpenMaya.MTime.kSeconds).asUnits(OpenMaya.MTime.uiUnit())
+
+
+def get_lookat_namespaces():
+    """Returns the namespaces holding a lookat rig"""
+    return [namespace for namespace in lookat_utilities.get_namespaces()
+            if cmds.objExists(get_node_name(namespace, EXCHANGE_CONTROLS[0]))]
+
+
+def get_node_name(namespace, name):
+    if not namespace or namespace == ':':
+        return name
+    return '{0}:{1}'.format(namespace, name)
+
+
+def get_control_curves(namespace):
+    """Returns [(attribute without namespace, anim curve)] of the namespace's exchanged controls"""
+    curves = []
+    for control in EXCHANGE_CONTROLS:
+        node = get_node_name(namespace, control)
+        if not cmds.objExists(node):
+            continue
+        connections = cmds.listConnections(node, type='animCurve', source=True, destination=False,
+                                           connections=True, plugs=False) or []
+        for plug, curve in zip(connections[::2], connections[1::2]):
+            attribute = '{0}.{1}'.format(control, plug.split('.', 1)[1])
+            curves.append((attribute, curve))
+    return curves
+
+
+def query_curve(curve):
+    """Returns the (curve dict, {column name: keys}) of an anim curve, one query per column"""
+    keys = {'times': cmds.keyframe(curve, query=True, timeChange=True) or [],
+            'values': cmds.keyframe(curve, query=True, valueChange=True) or []}
+    if keys['times']:
+        keys['in_tangent_types'] = lookat_curve_file.encode_tangent_types(
+            cmds.keyTangent(curve, query=True, inTangentType=True))
+        keys['out_tangent_types'] = lookat_curve_file.encode_tangent_types(
+            cmds.keyTangent(curve, query=True, outTangentType=True))
+        keys['in_angles'] = cmds.keyTangent(curve, query=True, inAngle=True)
+        keys['out_angles'] = cmds.keyTangent(curve, query=True, outAngle=True)
+        keys['in_weights'] = cmds.keyTangent(curve, query=True, inWeight=True)
+        keys['out_weights'] = cmds.keyTangent(curve, query=True, outWeight=True)
+    else:
+        for name, _ in lookat_curve_file.COLUMNS[2:]:
+            keys[name] = []
+
+    curve_data = {'curve_type': cmds.nodeType(curve),
+                  'weighted': bool(cmds.keyTangent(curve, query=True, weightedTangents=True)[0]),
+                  'pre_infinity': cmds.setInfinity(curve, query=True, preInfinite=True)[0],
+                  'post_infinity': cmds.setInfinity(curve, query=True, postInfinite=True)[0]}
+    return curve_data, keys
+
+
+def export_curves(filepath, namespaces=None):
+    """Writes the exchanged curves of the given namespaces (all lookat rigs by default).
+    Returns {'characters', 'curves', 'keys', 'seconds'}."""
+    start = time.time()
+    namespaces = get_lookat_namespaces() if namespaces is None else namespaces
+    stats = {'characters': 0, 'curves': 0, 'keys': 0}
+    writer = lookat_curve_file.CurveFileWriter(filepath, get_current_fps(),
+                                               scene=cmds.file(query=True, sceneName=True),
+                                               time_unit=cmds.currentUnit(query=True, time=True))
+    with writer:
+        for namespace in namespaces:
+            curves = []
+            for attribute, curve in get_control_curves(namespace):
+                curve_data, keys = query_curve(curve)
+                curve_data['attribute'] = attribute
+                curves.append((curve_data, keys))
+            stats['keys'] += writer.write_block(namespace, curves)
+            stats['characters'] += 1
+            stats['curves'] += len(curves)
+    stats['seconds'] = time.time() - start
+    lookat_utilities.log.info("Exported {characters} characters, {curves} curves, {keys} keys in "
+                              "{seconds:.2f}s to {0}".format(filepath, **stats))
+    return stats
+
+
+def set_curve_keys(attribute, curve_data, keys, time_scale, edit):
+    """Replaces the keys of the attribute's curve, recorded in the AnimCurveEdit: one addKeys call for
+    the keys, one setTangentTypes call for their tangent types, per key edits only for fixed tangents
+    and weighted curves. A missing curve is created with the file's curve type."""
+    if not len(keys['times']):
+        if cmds.keyframe(attribute, query=True, keyframeCount=True):
+            curve_fn = lookat_utilities.get_anim_curve_fn(attribute, edit)
+            lookat_utilities.remove_keys(attribute, curve_fn, None, None, edit)
+        return
+
+    curve_fn = lookat_utilities.get_anim_curve_fn(attribute, edit, CURVE_TYPES.get(curve_data['curve_type']))
+    curve_fn.setIsWeighted(curve_data['weighted'], edit.change)
+    time_array, value_array = lookat_utilities.get_key_arrays(keys['times'], keys['values'],
+                                                              lookat_utilities.get_ui_to_internal(curve_fn),
+                                                              time_scale)
+    # Not keeping the existing keys replaces the whole curve.
+    curve_fn.addKeys(time_array, value_array, OpenMayaAnim.MFnAnimCurve.kTangentAuto,
+                     OpenMayaAnim.MFnAnimCurve.kTangentAuto, False, edit.change)
+
+    # Keys were added with auto tangents, only the others need their type set.
+    in_codes = numpy.asarray(keys['in_tangent_types'])
+    out_codes = numpy.asarray(keys['out_tangent_types'])
+    indices = numpy.flatnonzero((in_codes != AUTO_CODE) | (out_codes != AUTO_CODE))
+    if len(indices):
+        in_types = [TANGENT_TYPES[name] for name in lookat_curve_file.decode_tangent_types(in_codes[indices])]
+        out_types = [TANGENT_TYPES[name] for name in lookat_curve_file.decode_tangent_types(out_codes[indices])]
+        curve_fn.setTangentTypes(to_int_array(indices), to_int_array(in_types), to_int_array(out_types),
+                                 edit.change)
+
+    # Angles only stick on fixed tangents, weights on weighted curves.
+    for is_in, codes, angles, weights in ((True, in_codes, keys['in_angles'], keys['in_weights']),
+                                          (False, out_codes, keys['out_angles'], keys['out_weights'])):
+        for index in numpy.flatnonzero(codes == FIXED_CODE):
+            curve_fn.setAngle(int(index), OpenMaya.MAngle(float(angles[index]), OpenMaya.MAngle.kDegrees), is_in,
+                              edit.change)
+        if curve_data['weighted']:
+            for index, weight in enumerate(weights):
+                curve_fn.setWeight(index, float(weight), is_in, edit.change)
+
+    curve_fn.setPreInfinityType(INFINITY_TYPES.get(curve_data['pre_infinity'], OpenMayaAnim.MFnAnimCurve.kConstant),
+                                edit.change)
+    curve_fn.setPostInfinityType(INFINITY_TYPES.get(curve_data['post_infinity'], OpenMayaAnim.MFnAnimCurve.kConstant),
+                                 edit.change)
+
+
+@lookat_utilities.undo_able
+def import_curves(filepath, namespaces=None, namespace_map=None):
+    """
+    Writes the curves of a file back, character by character, in one AnimCurveEdit per character;
+    the whole import is one undo step. namespaces limits the import to some of the file's
+    characters, namespace_map imports a character into another namespace. Keys are rescaled when the
+    file was written at another frame rate.
+    Returns {'characters', 'curves', 'keys', 'skipped', 'seconds'}, skipped lists the attributes
+    that don't exist in the scene.
+    """
+    start = time.time()
+    namespace_map = namespace_map or {}
+    stats = {'characters': 0, 'curves': 0, 'keys': 0, 'skipped': []}
+
+    cmds.refresh(suspend=True)
+    try:
+        with lookat_curve_file.CurveFileReader(filepath) as reader:
+            time_scale = get_current_fps() / float(reader.fps)
+            for block in reader:
+                if namespaces is not None and block.namespace not in namespaces:
+                    continue
+                namespace = namespace_map.get(block.namespace, block.namespace)
+                with lookat_utilities.AnimCurveEdit() as edit:
+                    for curve_data, keys in block.iter_curves():
+                        attribute = get_node_name(namespace, curve_data['attribute'])
+                        if not cmds.objExists(attribute):
+                            stats['skipped'].append(attribute)
+                            continue
+                        set_curve_keys(attribute, curve_data, keys, time_scale, edit)
+                        stats['curves'] += 1
+                        stats['keys'] += len(keys['times'])
+                stats['characters'] += 1
+    finally:
+        cmds.refresh(suspend=False)
+
+    stats['seconds'] = time.time() - start
+    lookat_utilities.log.info("Imported {characters} characters, {curves} curves, {keys} keys in "
+                              "{seconds:.2f}s from {0}".format(filepath, **stats))
+    if stats['skipped']:
+        lookat_utilities.log.warning("Not in the scene, skipped: {0}".format(', '.join(stats['skipped'])))
+    return stats
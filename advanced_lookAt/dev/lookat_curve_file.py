@@ -0,0 +1,167 @@
+"""
+Columnar anim curve file, for handing eye animation over without the maya scenes.
+
+The file holds one block per character, written and read one at a time so memory only ever holds
+one character's curves. A block is a small json header (namespace, curve attributes, key counts,
+curve settings) followed by the keys of all its curves as typed column arrays:
+
+    times (float64, frames), values (float64, ui units), in / out tangent types (uint8),
+    in / out tangent angles (float32, degrees), in / out tangent weights (float32)
+
+Layout: MAGIC, uint32 header length, json file header, then per block a uint32 header length, the
+json block header and the columns in COLUMNS order. A zero header length ends the file.
+
+Doesn't need maya.
+"""
+import json
+import struct
+
+import numpy
+
+MAGIC = b'LKCURVES'
+FORMAT_VERSION = 1
+
+# (name, dtype) of the key columns, in file order.
+COLUMNS = [('times', '<f8'),
+           ('values', '<f8'),
+           ('in_tangent_types', 'u1'),
+           ('out_tangent_types', 'u1'),
+           ('in_angles', '<f4'),
+           ('out_angles', '<f4'),
+           ('in_weights', '<f4'),
+           ('out_weights', '<f4')]
+
+# Tangent types as maya's keyTangent command names them, stored as their index.
+TANGENT_TYPES = ['auto', 'spline', 'linear', 'flat', 'step', 'stepnext', 'clamped', 'plateau', 'fixed',
+                 'slow', 'fast']
+
+LENGTH = struct.Struct('<I')
+
+
+def encode_tangent_types(names):
+    return numpy.array([TANGENT_TYPES.index(name) if name in TANGENT_TYPES else 0 for name in names],
+                       dtype='u1')
+
+
+def decode_tangent_types(codes):
+    return [TANGENT_TYPES[code] for code in codes]
+
+
+class CurveBlock(object):
+    """The curves of one character: curves is a list of dicts (attribute, keys, weighted,
+    pre_infinity, post_infinity, curve_type), columns holds the keys of all curves, in curve order"""
+
+    def __init__(self, namespace, curves, columns):
+        self.namespace = namespace
+        self.curves = curves
+        self.columns = columns
+
+    @property
+    def key_count(self):
+        return sum(curve['keys'] for curve in self.curves)
+
+    def iter_curves(self):
+        """Yields (curve dict, {column name: array}) with the keys of each curve"""
+        start = 0
+        for curve in self.curves:
+            end = start + curve['keys']
+            yield curve, dict((name, column[start:end]) for name, column in self.columns.items())
+            start = end
+
+
+class CurveFileWriter(object):
+
+    def __init__(self, filepath, fps, **header):
+        self.filepath = filepath
+        self.header = dict(header, version=FORMAT_VERSION, fps=fps)
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.filepath, 'wb')
+        self.file.write(MAGIC)
+        self._write_json(self.header)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.file.write(LENGTH.pack(0))
+        self.file.close()
+        self.file = None
+
+    def _write_json(self, data):
+        encoded = json.dumps(data, sort_keys=True).encode('utf-8')
+        self.file.write(LENGTH.pack(len(encoded)))
+        self.file.write(encoded)
+
+    def write_block(self, namespace, curves):
+        """Writes one character. curves is a list of (curve dict, {column name: keys}), see CurveBlock.
+        Returns the number of keys written."""
+        headers = []
+        columns = dict((name, []) for name, _ in COLUMNS)
+        for curve, keys in curves:
+            count = len(keys['times'])
+            for name, _ in COLUMNS:
+                if len(keys[name]) != count:
+                    raise ValueError("{0}: {1} {2} for {3} times".format(curve['attribute'], len(keys[name]),
+                                                                        name, count))
+                columns[name].append(keys[name])
+            headers.append(dict(curve, keys=count))
+
+        self._write_json({'namespace': namespace, 'curves': headers})
+        for name, dtype in COLUMNS:
+            arrays = columns[name]
+            column = numpy.concatenate(arrays).astype(dtype) if arrays else numpy.zeros(0, dtype)
+            self.file.write(column.tobytes())
+        return sum(header['keys'] for header in headers)
+
+
+class CurveFileReader(object):
+    """Iterates over the CurveBlocks of a file, reading one block at a time"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.file = open(filepath, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise IOError("Not a lookat curve file: {0}".format(filepath))
+        self.header = self._read_json()
+        if self.header.get('version', 0) > FORMAT_VERSION:
+            self.file.close()
+            raise IOError("{0} was written by a newer version (format {1})".format(filepath,
+                                                                                  self.header['version']))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def fps(self):
+        return self.header['fps']
+
+    def _read_json(self):
+        length_data = self.file.read(LENGTH.size)
+        if len(length_data) < LENGTH.size:
+            return None
+        length = LENGTH.unpack(length_data)[0]
+        if not length:
+            return None
+        return json.loads(self.file.read(length).decode('utf-8'))
+
+    def __iter__(self):
+        while True:
+            header = self._read_json()
+            if header is None:
+                return
+            count = sum(curve['keys'] for curve in header['curves'])
+            columns = {}
+            for name, dtype in COLUMNS:
+                dtype = numpy.dtype(dtype)
+                data = self.file.read(count * dtype.itemsize)
+                if len(data) != count * dtype.itemsize:
+                    raise IOError("{0} is truncated in {1}".format(self.filepath, header['namespace']))
+                columns[name] = numpy.frombuffer(data, dtype=dtype)
+            yield CurveBlock(header['namespace'], header['curves'], columns)
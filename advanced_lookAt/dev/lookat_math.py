@@ -0,0 +1,62 @@
+"""
+Vectorized transform math for the lookat tools.
+
+Everything here works on numpy arrays of maya matrices, so it can be imported and used outside of
+maya. Matrices follow maya's row-vector convention: a point p is transformed as p * M and the
+translation lives in the last row.
+"""
+import numpy
+
+
+def as_matrices(matrices):
+    """Returns the given matrices as a float array with shape (..., 4, 4)"""
+    matrices = numpy.asarray(matrices, dtype=numpy.float64)
+    if matrices.shape[-2:] != (4, 4):
+        raise ValueError("Expected (..., 4, 4) matrices, got {0}".format(matrices.shape))
+    return matrices
+
+
+def matrix_translations(matrices):
+    """Returns the (..., 3) translations of (..., 4, 4) matrices"""
+    return as_matrices(matrices)[..., 3, :3]
+
+
+def transform_vectors(vectors, matrices):
+    """Transforms (..., 3) direction vectors by (..., 4, 4) matrices, ignoring translation"""
+    vectors = numpy.asarray(vectors, dtype=numpy.float64)
+    return numpy.einsum('...i,...ij->...j', vectors, as_matrices(matrices)[..., :3, :3])
+
+
+def transform_points(points, matrices):
+    """Transforms (..., 3) points by (..., 4, 4) matrices"""
+    matrices = as_matrices(matrices)
+    return transform_vectors(points, matrices) + matrices[..., 3, :3]
+
+
+def inverse_transform_points(points, matrices):
+    """Transforms (..., 3) world points into the space of (..., 4, 4) matrices"""
+    return transform_points(points, numpy.linalg.inv(as_matrices(matrices)))
+
+
+def normalize(vectors):
+    """Returns unit length copies of (..., 3) vectors, zero vectors stay zero"""
+    vectors = numpy.asarray(vectors, dtype=numpy.float64)
+    lengths = numpy.linalg.norm(vectors, axis=-1)[..., numpy.newaxis]
+    return numpy.divide(vectors, lengths, out=numpy.zeros_like(vectors), where=lengths > 0)
+
+
+def world_axes(matrices, vec=(0, 1, 0)):
+    """Returns the normalized world space direction of a local vector for every matrix"""
+    return normalize(transform_vectors(vec, matrices))
+
+
+def aim_positions(matrices, vec=(0, 1, 0), distance=40):
+    """Returns the world space points at a given distance along a local axis of every matrix.
+    distance is a scalar or an array that broadcasts against the matrices' leading dimensions."""
+    distance = numpy.asarray(distance, dtype=numpy.float64)[..., numpy.newaxis]
+    return matrix_translations(matrices) + world_axes(matrices, vec) * distance
+
+
+def distances_between(matrices_a, matrices_b):
+    """Returns the distances between the translations of two broadcastable matrix arrays"""
+    return numpy.linalg.norm(matrix_translations(matrices_a) - matrix_translations(matrices_b), axis=-1)
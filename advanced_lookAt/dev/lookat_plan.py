@@ -0,0 +1,98 @@
+"""
+Conversion plans between the eye control modes of the lookat rig.
+
+The plot used to chain conversions through the AU eyes controls, e.g. lookat local -> lookat local at
+a user defined distance was lookat -> AU eyes -> lookat, baking and re-reading every intermediate
+curve. A plan instead picks one composed conversion for a (source, target) pair, so the gui captures
+the source once and writes the target once.
+"""
+LOOKAT_WORLD = 'lookat_world'
+LOOKAT_LOCAL = 'lookat_local'
+AU_EYES = 'au_eyes'
+
+EYE_CONTROL_MODES = [LOOKAT_WORLD, LOOKAT_LOCAL, AU_EYES]
+
+# lookat_ctl.SpaceWorldHead value of each lookat mode.
+SPACE_WORLD_HEAD = {LOOKAT_WORLD: 0, LOOKAT_LOCAL: 1}
+
+# Attributes, without namespace, that decide which eye controls drive the eyes.
+ENABLE_LOOKAT_ATTRIBUTE = 'control_vis.enable_lookat'
+SPACE_WORLD_HEAD_ATTRIBUTE = 'lookat_ctl.SpaceWorldHead'
+
+# Conversions
+FROM_AU_EYES = 'from_au_eyes'  # bake the lookat controls from the AU eyes driven rig
+TO_AU_EYES = 'to_au_eyes'  # solve the AU eyes controls from the lookat controls
+SPACE_SWAP = 'space_swap'  # keep the world positions of the lookat controls in another space
+REAIM = 'reaim'  # re-place the lookat controls along the sampled eye gaze, in memory
+
+
+class ConversionPlan(object):
+    """What plot_animation_switch does for one source and target mode.
+
+    update_au_eyes asks for the AU eyes controls to be rewritten too when they are not the target,
+    they are left untouched otherwise.
+    """
+
+    def __init__(self, source, target, conversion, user_defined_distance=False, update_au_eyes=False):
+        self.source = source
+        self.target = target
+        self.conversion = conversion
+        self.user_defined_distance = user_defined_distance
+        self.update_au_eyes = update_au_eyes and AU_EYES not in (source, target)
+
+    @property
+    def space_world_head(self):
+        return SPACE_WORLD_HEAD.get(self.target)
+
+    def describe(self):
+        distance = 'user defined distance' if self.user_defined_distance else 'maintained distance'
+        description = '{0} -> {1}: {2}, {3}'.format(self.source, self.target, self.conversion, distance)
+        if self.update_au_eyes:
+            description += ', updating AU eyes'
+        return description
+
+    def __repr__(self):
+        return '<ConversionPlan {0}>'.format(self.describe())
+
+
+def get_eye_control_mode(enable_lookat, space_world_head):
+    """Returns the mode driving the eyes for the given enable_lookat and SpaceWorldHead values, or ''
+    for values that select none"""
+    if enable_lookat == 0:
+        return AU_EYES
+    if enable_lookat == 1:
+        for mode, value in SPACE_WORLD_HEAD.items():
+            if space_world_head == value:
+                return mode
+    return ''
+
+
+def build_conversion_plan(source, target, user_defined_distance=False, update_au_eyes=False):
+    """Returns the ConversionPlan for plotting from the source to the target mode, or None when
+    there is nothing to plot (AU eyes to AU eyes)."""
+    for mode in (source, target):
+        if mode not in EYE_CONTROL_MODES:
+            raise ValueError("Unknown eye control mode: {0}".format(mode))
+
+    if source == AU_EYES and target == AU_EYES:
+        return None
+    if source == AU_EYES:
+        conversion = FROM_AU_EYES
+    elif target == AU_EYES:
+        conversion = TO_AU_EYES
+    elif source != target and not user_defined_distance:
+        conversion = SPACE_SWAP
+    else:
+        conversion = REAIM
+    return ConversionPlan(source, target, conversion, user_defined_distance, update_au_eyes)
+
+
+def build_segment_plans(segments, target):
+    """
+    Returns [(segment, plan)] for the eye mode segments of a plot range, dicts with 'start', 'end'
+    and 'mode' as lookat_audit.get_mode_segments finds them. Each segment is converted from its own
+    mode at the maintained distance; plan is None for the segments already in the target mode or in
+    no mode, which are kept as they are.
+    """
+    return [(segment, None if segment['mode'] in ('', target) else build_conversion_plan(segment['mode'], target))
+            for segment in segments]
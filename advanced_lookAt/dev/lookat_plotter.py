@@ -0,0 +1,903 @@
+"""
+Plots eye animation between lookat world space, lookat local space and AU eyes without the lookAt
+tool's window, for batch scripts and farm jobs:
+
+    options = lookat_plotter.PlotOptions(lookat_plan.LOOKAT_LOCAL, ranges=[(1001, 1120)])
+    result = lookat_plotter.LookAtPlotter('charA', options).plot()
+
+The tool builds its PlotOptions from its widgets and plots through the same LookAtPlotter.
+Nothing here disables the viewport or wraps the plot in an undo chunk, callers decide; plot
+returns the plot's statistics instead of logging them only.
+"""
+import collections
+import time
+
+from maya import cmds
+
+import numpy
+
+import lookat_audit
+import lookat_cost
+import lookat_math
+import lookat_plan
+import lookat_sampling
+import lookat_solver
+import lookat_telemetry
+import lookat_utilities
+
+# The maintained distance of the user defined distance locator, the tool's default.
+DEFAULT_DISTANCE = 40
+
+
+class PlotOptions(object):
+    """
+    What to plot and how:
+    target: the eye control mode to plot to, lookat_plan.LOOKAT_WORLD, LOOKAT_LOCAL or AU_EYES
+    source: the mode to plot from, read from the switch attributes (per segment) when None
+    ranges: [(start, end)] frame ranges, the timeline range when None
+    user_defined_distance: plot to lookat at the user defined distance locator, at distance, or
+    at its animated tz with distance_curve
+    update_au_eyes: keep the AU eyes in sync when re-aiming
+    sampling: lookat_sampling.SamplingOptions, every frame by default
+    smart_bake: sample and key the existing keys of the source controls instead
+    """
+
+    def __init__(self, target, source=None, ranges=None, user_defined_distance=False, distance=DEFAULT_DISTANCE,
+                 distance_curve=False, update_au_eyes=False, sampling=None, smart_bake=False):
+        for mode in [target, source]:
+            if mode is not None and mode not in lookat_plan.EYE_CONTROL_MODES:
+                raise ValueError("Unknown eye control mode: {0}".format(mode))
+        self.target = target
+        self.source = source
+        self.ranges = lookat_sampling.merge_ranges(ranges) if ranges else None
+        self.user_defined_distance = user_defined_distance
+        self.distance = distance
+        self.distance_curve = distance_curve
+        self.update_au_eyes = update_au_eyes
+        self.sampling = sampling or lookat_sampling.SamplingOptions()
+        self.smart_bake = smart_bake
+
+    @property
+    def sampling_name(self):
+        return 'smart_bake' if self.smart_bake else self.sampling.mode
+
+
+class LookAtPlotter(object):
+    """Plots the eye animation of one character, see PlotOptions"""
+
+    def __init__(self, namespace, options, profile_history=None):
+        self.namespace = namespace
+        self.options = options
+        # Predicts the plot's cost and learns from it when given, see lookat_cost.
+        self.profile_history = profile_history
+
+        self.look_at_main_control_curve = 'lookat_ctl'
+        self.look_at_left_control_curve = 'L_lookat_ctl'
+        self.look_at_right_control_curve = 'R_lookat_ctl'
+
+        self.au_eyes_main_control_curve = 'au_eyes_ctl'
+        self.au_eyes_left_control_curve = 'L_au_eyes_ctl'
+        self.au_eyes_right_control_curve = 'R_au_eyes_ctl'
+
+        self.main_lookat_final_translation = 'C_absolute_position_loc'
+        self.left_lookat_final_translation = 'L_absolute_position_loc'
+        self.right_lookat_final_translation = 'R_absolute_position_loc'
+
+        self.eyes_combined_values = 'eyes_combined_values'
+        self.plot_to_au_values = 'plot_to_au_values'
+        self.user_defined_distance_loc = 'user_defined_distance_loc'
+
+        self.control_vis = 'control_vis'
+
+        self.controls = {"LookAt": "lookat_ctl",
+                         "AUEyes": "au_eyes_ctl"
+                         }
+
+        self.control_transform_dict = {}
+        self.control_curve_tuple_list = []
+        self.combined_keys_to_plot = []
+        self.plot_key_times = []
+        self.reaim_frames = {}
+        self.sampling_choice = None
+        self.phase_timer = lookat_telemetry.PhaseTimer()
+        self.result = {}
+
+    def get_timeranges(self):
+        """Returns the options' ranges, [timeline range] when they have none"""
+        return self.options.ranges or [lookat_utilities.get_timeline_range()]
+
+    def get_timerange(self):
+        """Returns (start, end) spanning all the plot ranges"""
+        ranges = self.get_timeranges()
+        return ranges[0][0], ranges[-1][1]
+
+    def get_source_mode(self):
+        return self.options.source or self.get_active_eye_controls()
+
+    def plot(self):
+        """
+        Plots the ranges to the target mode and puts the current frame back. Returns the plot's
+        statistics: {'namespace', 'target', 'sampling', 'conversion', 'source', 'frames', 'keys',
+        'ranges', 'segments', 'predicted_seconds', 'seconds', 'phases', 'sampling_choice'}, conversion
+        None when there was nothing to plot (already in the target mode). They stay in self.result when
+        the plot fails.
+        """
+        aim_ctl = "{0}:{1}".format(self.namespace, self.controls.get("LookAt"))
+
+        # Check if the animation can be plotted
+        if not cmds.objExists(aim_ctl):
+            raise RuntimeError("{0} doesn't appear to have a LookAt Control".format(self.namespace))
+
+        current_frame = lookat_utilities.get_current_frame()
+        self.phase_timer = lookat_telemetry.PhaseTimer()
+        self.result = {'namespace': self.namespace, 'target': self.options.target,
+                       'sampling': self.options.sampling_name, 'conversion': None,
+                       'ranges': len(self.get_timeranges()), 'segments': 1}
+        try:
+            self.plot_to_target()
+        finally:
+            self.result.update(seconds=self.phase_timer.seconds, phases=dict(self.phase_timer.phases),
+                               sampling_choice=self.sampling_choice)
+            cmds.currentTime(current_frame)
+        return self.result
+
+    def plot_to_target(self):
+        """Plots the options' ranges to the options' target mode"""
+        with self.phase_timer.phase('prepare'):
+            ranges = self.get_timeranges()
+            segments = self.get_mode_segments(ranges)
+        if len(ranges) > 1 and not segments:
+            raise RuntimeError("{0} doesn't have the eye mode switch attributes ({1}), plot each range on its "
+                               "own.".format(self.namespace, ', '.join(lookat_audit.SWITCH_ATTRIBUTES)))
+        if len(ranges) > 1 or len(segments) > 1:
+            # Several ranges, or enable_lookat or SpaceWorldHead switch in the range: the current
+            # frame's mode isn't the source of the whole plot.
+            self.result.update(segments=len(segments))
+            self.plot_segments(segments)
+            return
+
+        with self.phase_timer.phase('prepare'):
+            plan = self.get_conversion_plan()
+        if plan:
+            lookat_utilities.log.info("Plotting {0}".format(plan.describe()))
+            with self.phase_timer.phase('prepare'):
+                estimate = self.get_cost_estimate(plan)
+            self.result.update(conversion=plan.conversion, source=plan.source, frames=estimate.samples,
+                               keys=estimate.keys, user_defined_distance=plan.user_defined_distance,
+                               predicted_seconds=estimate.predicted_seconds)
+            start_time = time.time()
+            self.run_conversion_plan(plan)
+            actual_seconds = time.time() - start_time
+
+            if self.sampling_choice:
+                lookat_utilities.log.info("Auto sampling: {0}".format(self.sampling_choice))
+            lookat_utilities.log.info("Plot cost: predicted {0:.2f}s, actual {1:.2f}s ({2})".format(
+                estimate.predicted_seconds, actual_seconds, estimate.describe()))
+            if self.profile_history is not None:
+                self.profile_history.record(estimate, actual_seconds)
+
+    def estimate(self):
+        """Returns the lookat_cost.CostEstimate of plotting with the options, None when there is
+        nothing to plot"""
+        plan = self.get_conversion_plan()
+        return self.get_cost_estimate(plan) if plan else None
+
+    def align_lookat_position(self):
+        """Initializes Position of the LookAt control"""
+        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.user_defined_distance_loc), self.options.distance)
+        cmds.matchTransform('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
+                            '{0}:{1}'.format(self.namespace, self.user_defined_distance_loc))
+
+    def get_aligned_lookat_world_positions(self, times):
+        """
+        Returns the world positions of the user defined distance locator on every time, as a
+        (len(times), 3) array. The locator is placed from its sampled parent matrix, at the options'
+        distance or at its animated tz with distance_curve.
+        """
+        distance_loc = '{0}:{1}'.format(self.namespace, self.user_defined_distance_loc)
+
+        offsets = numpy.empty((len(times), 3))
+        offsets[:, 0] = cmds.getAttr('{0}.tx'.format(distance_loc))
+        offsets[:, 1] = cmds.getAttr('{0}.ty'.format(distance_loc))
+        if self.options.distance_curve:
+            offsets[:, 2] = lookat_utilities.sample_attributes(['{0}.tz'.format(distance_loc)], times)[0]
+        else:
+            offsets[:, 2] = self.options.distance
+
+        parent_matrices = lookat_utilities.sample_matrices([distance_loc], times, 'parentMatrix')[0]
+        return lookat_math.transform_points(offsets, parent_matrices)
+
+    def get_aligned_lookat_positions(self, times):
+        """Returns the lookAt control translations that align it with the user defined distance locator
+        on every time, as a (len(times), 3) array."""
+        main_control = '{0}:{1}'.format(self.namespace, self.look_at_main_control_curve)
+        world_positions = self.get_aligned_lookat_world_positions(times)
+        return lookat_utilities.world_positions_to_local([main_control], world_positions[numpy.newaxis], times)[0]
+
+    def get_active_eye_controls(self):
+        """Returns the eye control mode the switch attributes are set to"""
+        enable_lookat = cmds.getAttr('{0}:{1}'.format(self.namespace, lookat_plan.ENABLE_LOOKAT_ATTRIBUTE))
+        space_world_head = cmds.getAttr('{0}:{1}'.format(self.namespace, lookat_plan.SPACE_WORLD_HEAD_ATTRIBUTE))
+        return lookat_plan.get_eye_control_mode(enable_lookat, space_world_head)
+
+    def get_conversion_plan(self):
+        """Builds the lookat_plan.ConversionPlan from the source mode to the options' target"""
+        source_ctl = self.get_source_mode()
+        target_ctl = self.options.target
+
+        if not source_ctl or not target_ctl:
+            return None
+        return lookat_plan.build_conversion_plan(source_ctl, target_ctl,
+                                                 user_defined_distance=self.options.user_defined_distance,
+                                                 update_au_eyes=self.options.update_au_eyes)
+
+    def get_mode_segments(self, ranges=None):
+        """Returns the eye mode segments of the plot ranges, [{'start', 'end', 'mode'}]. A range holds
+        more than one when enable_lookat or SpaceWorldHead switch in it. The last segment of each
+        range is marked 'include_end', the others end where the next one starts. A source given in the
+        options stands for the whole of every range. Empty when the switch attributes are missing."""
+        ranges = ranges or self.get_timeranges()
+        if self.options.source:
+            return [{'start': startframe, 'end': endframe, 'mode': self.options.source, 'include_end': True}
+                    for startframe, endframe in ranges]
+
+        switch_curves, static_values = lookat_audit.get_switch_keys(self.namespace)
+        if None in static_values.values():
+            return []
+        switch_keys = dict((attribute, keys) for attribute, (_, keys) in switch_curves.items())
+
+        segments = []
+        for startframe, endframe in ranges:
+            range_segments = lookat_audit.get_mode_segments(switch_keys, static_values, startframe, endframe)
+            range_segments[-1]['include_end'] = True
+            segments.extend(range_segments)
+        return segments
+
+    def get_plan_source_controls(self, plan):
+        """Returns the controls whose keys the plan's plot times are taken from"""
+        if plan.conversion == lookat_plan.FROM_AU_EYES:
+            controls = [self.au_eyes_main_control_curve, self.au_eyes_left_control_curve,
+                        self.au_eyes_right_control_curve]
+        else:
+            controls = [self.look_at_main_control_curve, self.look_at_left_control_curve,
+                        self.look_at_right_control_curve]
+        return ['{0}:{1}'.format(self.namespace, control) for control in controls]
+
+    def get_cost_estimate(self, plan):
+        source_controls = self.get_plan_source_controls(plan)
+        sample_times, key_times = self.get_plot_times(source_controls)
+        ranges = self.get_timeranges()
+        if len(ranges) > 1:
+            sample_times = lookat_sampling.clip_to_ranges(sample_times, ranges)
+            key_times = lookat_sampling.clip_to_ranges(key_times, ranges)
+        return lookat_cost.estimate_plot(plan, sample_times, key_times, len(source_controls), self.profile_history)
+
+    def run_conversion_plan(self, plan):
+        """Captures the source and writes the target of a lookat_plan.ConversionPlan"""
+        if plan.conversion == lookat_plan.FROM_AU_EYES:
+            self.plot_au_to_lookat(plan)
+        elif plan.conversion == lookat_plan.TO_AU_EYES:
+            self.plot_lookat_to_au()
+        elif plan.conversion == lookat_plan.SPACE_SWAP:
+            self.plot_space_swap(plan)
+        elif plan.conversion == lookat_plan.REAIM:
+            self.plot_reaim(plan)
+
+    def set_lookat_enabled(self, enable_lookat):
+        cmds.cutKey('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis))
+        cmds.setAttr('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis), enable_lookat)
+
+    def set_lookat_space(self, space_world_head):
+        cmds.cutKey('{0}:lookat_ctl.SpaceWorldHead'.format(self.namespace))
+        cmds.setAttr("{0}:lookat_ctl.SpaceWorldHead".format(self.namespace), space_world_head)
+
+    def set_eye_mode(self, mode, converted):
+        """
+        Switches the eyes to the mode over the converted segments only: the switch attributes are keyed
+        to the mode where a segment starts and back to the value they held where it ends, stepped, the
+        rest of their curves (keys outside the plot range included) is left as it is.
+        """
+        values = collections.OrderedDict([(lookat_plan.ENABLE_LOOKAT_ATTRIBUTE, int(mode != lookat_plan.AU_EYES))])
+        if mode in lookat_plan.SPACE_WORLD_HEAD:
+            values[lookat_plan.SPACE_WORLD_HEAD_ATTRIBUTE] = lookat_plan.SPACE_WORLD_HEAD[mode]
+
+        spans = [(segment['start'], segment['end'] + 1 if segment.get('include_end') else segment['end'])
+                 for segment, _ in converted]
+        for attribute, value in values.items():
+            plug = '{0}:{1}'.format(self.namespace, attribute)
+            # What the switch holds after each span, read before any of its keys change.
+            after_values = [cmds.getAttr(plug, time=end) for _, end in spans]
+            if not cmds.keyframe(plug, query=True, keyframeCount=True):
+                cmds.setKeyframe(plug, time=spans[0][0] - 1, value=cmds.getAttr(plug), outTangentType='step')
+            for (start, end), after_value in zip(spans, after_values):
+                cmds.cutKey(plug, time=(start, end), clear=True)
+                cmds.setKeyframe(plug, time=start, value=value, outTangentType='step')
+                cmds.setKeyframe(plug, time=end, value=after_value, outTangentType='step')
+
+    def plot_au_to_lookat(self, plan):
+        if plan.user_defined_distance:
+            self.reset_lookat()
+            self.set_lookat_space(plan.space_world_head)
+            self.align_lookat_position()
+        else:
+            self.set_lookat_space(plan.space_world_head)
+        with self.phase_timer.phase('capture'):
+            self.capture_plot_frames_for_lookat()
+        with self.phase_timer.phase('write'):
+            self.write_plot_frames_to_lookat()
+
+        cmds.setAttr('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis), 1)
+        cmds.select('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve))
+
+    def plot_lookat_to_au(self):
+        with self.phase_timer.phase('capture'):
+            self.capture_plot_frames_for_au_eyes()
+        with self.phase_timer.phase('write'):
+            self.write_plot_frames_to_au_eyes()
+        cmds.setAttr('{0}:{1}.enable_lookat'.format(self.namespace, self.control_vis), 0)
+        cmds.select('{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve))
+
+    def plot_space_swap(self, plan):
+        with self.phase_timer.phase('capture'):
+            self.capture_plot_frames_for_space_swap()
+        self.reset_lookat()
+        self.set_lookat_space(plan.space_world_head)
+        with self.phase_timer.phase('write'):
+            self.write_plot_frames_for_space_swap()
+
+    def plot_reaim(self, plan):
+        """
+        Re-places the lookAt controls along the eye gaze, in another space and/or at the user defined
+        distance. The gaze is captured once before anything changes and the new positions are
+        computed from it, the AU eyes controls are only written when the plan asks for it.
+        """
+        with self.phase_timer.phase('capture'):
+            self.capture_plot_frames_for_reaim(plan)
+        if plan.user_defined_distance:
+            self.reset_lookat()
+        self.set_lookat_space(plan.space_world_head)
+        with self.phase_timer.phase('write'):
+            self.write_plot_frames_for_reaim(plan)
+
+        cmds.select('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve))
+
+    def plot_segments(self, segments):
+        """
+        Plots a range whose eye mode switches (animated enable_lookat or SpaceWorldHead), or several
+        ranges. Each segment is converted from its own mode, the segments already in the target mode
+        are kept. The converted segments are captured in one sampling pass, then the eyes are switched
+        to the target mode over the converted segments (see set_eye_mode) and the segments are keyed
+        one at a time, between boundary keys, so the curves outside of them keep their shape.
+        """
+        target = self.options.target
+        if not target:
+            return
+        if self.options.user_defined_distance:
+            raise RuntimeError("The eye mode switches in the plot range or several ranges are set, plot them at "
+                               "the maintained distance or plot each range on its own.")
+
+        start_time = time.time()
+        segment_plans = lookat_plan.build_segment_plans(segments, target)
+        lookat_utilities.log.info("Plotting eye mode segments: {0}".format('; '.join(
+            '{0:g}-{1:g} {2}'.format(segment['start'], segment['end'],
+                                     plan.describe() if plan else '{0} kept'.format(segment['mode'] or 'no mode'))
+            for segment, plan in segment_plans)))
+
+        converted = [(segment, plan) for segment, plan in segment_plans if plan]
+        sources = sorted(set(plan.source for _, plan in converted))
+        self.result.update(conversion='segments', source='+'.join(sources))
+        if not converted:
+            return
+        with self.phase_timer.phase('prepare'):
+            segment_times = self.get_segment_plot_times(converted)
+        self.result.update(frames=sum(len(sample_times) for sample_times, _ in segment_times),
+                           keys=sum(len(key_times) for _, key_times in segment_times))
+        if target == lookat_plan.AU_EYES:
+            self.plot_segments_to_au_eyes(converted, segment_times)
+        else:
+            self.plot_segments_to_lookat(converted, segment_times, target)
+        lookat_utilities.log.info("Plotted {0} of {1} eye mode segments in {2:.2f}s".format(
+            len(converted), len(segments), time.time() - start_time))
+
+    def get_segment_plot_times(self, converted):
+        """Returns the (sample times, key times) of each converted (segment, plan), taken from the plot
+        times of all their source controls. The segment's last frame (see get_segment_last_frame) is
+        always keyed, whatever the sampling, so the boundary key after it can't land inside the segment."""
+        source_controls = []
+        for _, plan in converted:
+            source_controls += [control for control in self.get_plan_source_controls(plan)
+                                if control not in source_controls]
+        sample_times, key_times = self.get_plot_times(source_controls)
+
+        segment_times = []
+        for segment, _ in converted:
+            include_end = segment.get('include_end', False)
+            segment_key_times = lookat_sampling.merge_times(
+                lookat_sampling.get_segment_times(key_times, segment['start'], segment['end'], include_end),
+                [self.get_segment_last_frame(segment)])
+            segment_sample_times = lookat_sampling.merge_times(
+                lookat_sampling.get_segment_times(sample_times, segment['start'], segment['end'], include_end),
+                segment_key_times[-1:])
+            segment_times.append((segment_sample_times, segment_key_times))
+        return segment_times
+
+    @staticmethod
+    def get_segment_last_frame(segment):
+        """Returns the last frame keyed in the segment: its end when included, the frame before it
+        otherwise (the next segment starts at the end)"""
+        if segment.get('include_end'):
+            return segment['end']
+        return max(segment['start'], segment['end'] - 1)
+
+    def plot_segments_to_lookat(self, converted, segment_times, target):
+        """
+        Keys the lookAt controls where the eyes look in each converted segment: at the absolute position
+        locators in the AU eyes segments, at the lookAt controls' world positions in the other space's
+        segments.
+        """
+        controls = ['{0}:{1}'.format(self.namespace, control)
+                    for control in [self.look_at_main_control_curve, self.look_at_left_control_curve,
+                                    self.look_at_right_control_curve]]
+        final_translations = ['{0}:{1}'.format(self.namespace, node)
+                              for node in [self.main_lookat_final_translation, self.left_lookat_final_translation,
+                                           self.right_lookat_final_translation]]
+
+        # One sampling pass for every segment, before the switches change.
+        times = lookat_sampling.merge_times(*[sample_times for sample_times, _ in segment_times])
+        with self.phase_timer.phase('capture'):
+            world_positions = lookat_math.matrix_translations(
+                lookat_utilities.sample_world_matrices(controls + final_translations, times))
+
+        curves = ['{0}.{1}'.format(control, attribute) for control in controls for attribute in ['tx', 'ty', 'tz']]
+        for segment, _ in converted:
+            lookat_utilities.insert_boundary_keys(curves, segment['start'], self.get_segment_last_frame(segment))
+        self.set_eye_mode(target, converted)
+
+        # The main control is keyed first, the left and right controls are parented under it.
+        key_times = numpy.concatenate([segment_key_times for _, segment_key_times in segment_times])
+        for index, control in enumerate(controls):
+            positions = []
+            for (_, plan), (sample_times, segment_key_times) in zip(converted, segment_times):
+                source = index + len(controls) if plan.conversion == lookat_plan.FROM_AU_EYES else index
+                sampled = world_positions[source, numpy.searchsorted(times, sample_times)]
+                positions.append(lookat_sampling.interpolate_samples(sample_times, sampled, segment_key_times))
+            world_positions_to_key = numpy.concatenate(positions)[numpy.newaxis]
+            with self.phase_timer.phase('write'):
+                translations = lookat_utilities.world_positions_to_local([control], world_positions_to_key,
+                                                                         key_times)[0]
+                start = 0
+                for _, segment_key_times in segment_times:
+                    end = start + len(segment_key_times)
+                    lookat_utilities.set_translation_keys(control, segment_key_times, translations[start:end])
+                    start = end
+
+        cmds.select(controls[0])
+
+    def plot_segments_to_au_eyes(self, converted, segment_times):
+        """Keys the AU eyes controls in each converted (lookAt driven) segment, solved in one pass"""
+        times = lookat_sampling.merge_times(*[sample_times for sample_times, _ in segment_times])
+        with self.phase_timer.phase('capture'):
+            au_values = self.get_au_values(times)
+
+        for segment, _ in converted:
+            lookat_utilities.insert_boundary_keys(self.get_au_curve_list(), segment['start'],
+                                                  self.get_segment_last_frame(segment))
+        self.set_eye_mode(lookat_plan.AU_EYES, converted)
+
+        for _, target_control, x_attribute, y_attribute in self.get_au_control_tuples():
+            values = numpy.column_stack([au_values[x_attribute], au_values[y_attribute]])
+            for sample_times, key_times in segment_times:
+                segment_values = lookat_sampling.interpolate_samples(
+                    sample_times, values[numpy.searchsorted(times, sample_times)], key_times)
+                with self.phase_timer.phase('write'):
+                    lookat_utilities.set_anim_curve_keys('{0}.tx'.format(target_control), key_times,
+                                                         segment_values[:, 0])
+                    lookat_utilities.set_anim_curve_keys('{0}.ty'.format(target_control), key_times,
+                                                         segment_values[:, 1])
+
+        cmds.select('{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve))
+
+    def capture_plot_frames_for_space_swap(self):
+        startframe, endframe = self.get_timerange()
+
+        control_curve_tuple_list = [
+            ('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
+             '{0}:{1}'.format(self.namespace, self.main_lookat_final_translation)),
+
+            ('{0}:{1}'.format(self.namespace, self.look_at_left_control_curve),
+             '{0}:{1}'.format(self.namespace, self.left_lookat_final_translation)),
+
+            ('{0}:{1}'.format(self.namespace, self.look_at_right_control_curve),
+             '{0}:{1}'.format(self.namespace, self.right_lookat_final_translation))
+        ]
+
+        source_controls = [control_curve_tuple[0] for control_curve_tuple in control_curve_tuple_list]
+        combined_keys_to_plot, self.plot_key_times = self.get_plot_times(source_controls)
+
+        # Record the world position of the "lookAt" controls, for all times in one pass.
+        world_positions = lookat_math.matrix_translations(
+            lookat_utilities.sample_world_matrices(source_controls, combined_keys_to_plot))
+        control_transform_dict = collections.OrderedDict(zip(source_controls, world_positions))
+
+        # Flatten animation curves that we will be replacing
+        flatten_curve_list = [
+            '{0}:lookat_ctl.tx'.format(self.namespace),
+            '{0}:lookat_ctl.ty'.format(self.namespace),
+            '{0}:lookat_ctl.tz'.format(self.namespace),
+            '{0}:L_lookat_ctl.tx'.format(self.namespace),
+            '{0}:L_lookat_ctl.ty'.format(self.namespace),
+            '{0}:L_lookat_ctl.tz'.format(self.namespace),
+            '{0}:R_lookat_ctl.tx'.format(self.namespace),
+            '{0}:R_lookat_ctl.ty'.format(self.namespace),
+            '{0}:R_lookat_ctl.tz'.format(self.namespace)
+        ]
+        lookat_utilities.flatten_anim_curve(flatten_curve_list, startframe, endframe)
+        self.combined_keys_to_plot = combined_keys_to_plot
+        self.control_transform_dict = control_transform_dict
+
+    def write_plot_frames_for_space_swap(self):
+        # The world positions are converted into the new space with the parent matrices sampled
+        # after the space switch. The main control is keyed first as the left and right controls
+        # are parented under it.
+        for control, world_positions in self.control_transform_dict.iteritems():
+            world_positions = lookat_sampling.interpolate_samples(self.combined_keys_to_plot, world_positions,
+                                                                  self.plot_key_times)
+            translations = lookat_utilities.world_positions_to_local([control], world_positions[numpy.newaxis],
+                                                                     self.plot_key_times)[0]
+            lookat_utilities.set_translation_keys(control, self.plot_key_times, translations)
+
+    def capture_plot_frames_for_lookat(self):
+        startframe, endframe = self.get_timerange()
+
+        control_curve_tuple_list = [
+            ('{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve),
+             '{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
+             '{0}:{1}'.format(self.namespace, self.main_lookat_final_translation)),
+
+            ('{0}:{1}'.format(self.namespace, self.au_eyes_left_control_curve),
+             '{0}:{1}'.format(self.namespace, self.look_at_left_control_curve),
+             '{0}:{1}'.format(self.namespace, self.left_lookat_final_translation)),
+
+            ('{0}:{1}'.format(self.namespace, self.au_eyes_right_control_curve),
+             '{0}:{1}'.format(self.namespace, self.look_at_right_control_curve),
+             '{0}:{1}'.format(self.namespace, self.right_lookat_final_translation))
+        ]
+
+        # Get list of keys for all of the "eyes_au" controls
+        source_controls = [control_curve_tuple[0] for control_curve_tuple in control_curve_tuple_list]
+        combined_keys_to_plot, self.plot_key_times = self.get_plot_times(source_controls)
+
+        main_control = control_curve_tuple_list[0][1]
+        lookat_curve_list = ['{0}.{1}'.format(control_curve_tuple[1], attribute)
+                             for control_curve_tuple in control_curve_tuple_list
+                             for attribute in ['tx', 'ty', 'tz']]
+        lookat_utilities.insert_boundary_keys(lookat_curve_list, startframe, endframe)
+
+        if self.options.user_defined_distance:
+            lookat_utilities.set_translation_keys(main_control, combined_keys_to_plot,
+                                                  self.get_aligned_lookat_positions(combined_keys_to_plot))
+
+        # Record final position of "lookAt" controls. The left and right controls are children of
+        # the main one, so the main control is keyed before they are sampled.
+        control_transform_dict = {}
+        for control_curve_tuple in control_curve_tuple_list:
+            target_control = control_curve_tuple[1]
+            final_translation = control_curve_tuple[2]
+            world_positions = lookat_math.matrix_translations(
+                lookat_utilities.sample_world_matrices([final_translation], combined_keys_to_plot))
+            translations = lookat_utilities.world_positions_to_local([target_control], world_positions,
+                                                                     combined_keys_to_plot)[0]
+            if target_control == main_control:
+                lookat_utilities.set_translation_keys(main_control, combined_keys_to_plot, translations)
+            control_transform_dict[target_control] = translations
+
+        # Flatten animation curves that we will be replacing
+        flatten_curve_list = [
+            '{0}:lookat_ctl.tx'.format(self.namespace),
+            '{0}:lookat_ctl.ty'.format(self.namespace),
+            '{0}:lookat_ctl.tz'.format(self.namespace),
+            '{0}:L_lookat_ctl.tx'.format(self.namespace),
+            '{0}:L_lookat_ctl.ty'.format(self.namespace),
+            '{0}:L_lookat_ctl.tz'.format(self.namespace),
+            '{0}:R_lookat_ctl.tx'.format(self.namespace),
+            '{0}:R_lookat_ctl.ty'.format(self.namespace),
+            '{0}:R_lookat_ctl.tz'.format(self.namespace)
+        ]
+        lookat_utilities.flatten_anim_curve(flatten_curve_list, startframe, endframe)
+        self.combined_keys_to_plot = combined_keys_to_plot
+        self.control_transform_dict = control_transform_dict
+
+    def write_plot_frames_to_lookat(self):
+        for target_control, translations in self.control_transform_dict.iteritems():
+            values = lookat_sampling.interpolate_samples(self.combined_keys_to_plot, translations,
+                                                         self.plot_key_times)
+            lookat_utilities.set_translation_keys(target_control, self.plot_key_times, values)
+
+    def capture_plot_frames_for_reaim(self, plan):
+        """
+        Records everything a re-aim needs in one sampling pass, before the rig is changed: the eye
+        gaze (the absolute direction locators), the gaze distances (the absolute position locators)
+        and the world positions and translations of the lookAt controls.
+        """
+        startframe, endframe = self.get_timerange()
+
+        controls = ['{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
+                    '{0}:{1}'.format(self.namespace, self.look_at_left_control_curve),
+                    '{0}:{1}'.format(self.namespace, self.look_at_right_control_curve)]
+        final_translations = ['{0}:{1}'.format(self.namespace, self.main_lookat_final_translation),
+                              '{0}:{1}'.format(self.namespace, self.left_lookat_final_translation),
+                              '{0}:{1}'.format(self.namespace, self.right_lookat_final_translation)]
+        direction_locs = ['{0}:{1}_absolute_direction_loc'.format(self.namespace, side) for side in 'CLR']
+
+        combined_keys_to_plot, self.plot_key_times = self.get_plot_times(controls)
+        times = numpy.asarray(combined_keys_to_plot, dtype=numpy.float64)
+
+        world_matrices = lookat_utilities.sample_world_matrices(direction_locs + controls, times)
+        gaze_distances = lookat_utilities.sample_attributes(['{0}.tz'.format(final_translation)
+                                                             for final_translation in final_translations], times)
+        child_translations = lookat_utilities.sample_attributes(['{0}.{1}'.format(control, attribute)
+                                                                 for control in controls[1:]
+                                                                 for attribute in ['tx', 'ty', 'tz']], times)
+
+        self.reaim_frames = {'controls': controls,
+                             'gaze_matrices': world_matrices[:3],
+                             'gaze_distances': gaze_distances,
+                             'control_positions': lookat_math.matrix_translations(world_matrices[3:]),
+                             'child_translations': child_translations.reshape(2, 3, -1).swapaxes(1, 2)}
+
+        if plan.update_au_eyes:
+            self.reaim_frames['au_values'] = self.get_au_values(times)
+
+        if not plan.user_defined_distance:
+            lookat_utilities.insert_boundary_keys(['{0}.{1}'.format(control, attribute)
+                                                   for control in controls
+                                                   for attribute in ['tx', 'ty', 'tz']], startframe, endframe)
+        self.combined_keys_to_plot = combined_keys_to_plot
+
+    def write_plot_frames_for_reaim(self, plan):
+        """
+        Puts each lookAt control on its captured gaze line. The gaze distance changes by as much as the
+        distance between the eye and the control does: not at all for the main control when the
+        distance is maintained, to the user defined distance locator otherwise. The left and right
+        controls follow the main one, so they are placed once it is keyed.
+        """
+        times = numpy.asarray(self.combined_keys_to_plot, dtype=numpy.float64)
+        frames = self.reaim_frames
+        controls = frames['controls']
+        eye_positions = lookat_math.matrix_translations(frames['gaze_matrices'])
+
+        def get_gaze_positions(index, control_positions):
+            old_distances = numpy.linalg.norm(frames['control_positions'][index] - eye_positions[index], axis=-1)
+            new_distances = numpy.linalg.norm(control_positions - eye_positions[index], axis=-1)
+            distances = frames['gaze_distances'][index] + new_distances - old_distances
+            return lookat_math.aim_positions(frames['gaze_matrices'][index], (0, 0, 1), distances)
+
+        main_positions = frames['control_positions'][0]
+        if plan.user_defined_distance:
+            main_positions = self.get_aligned_lookat_world_positions(times)
+
+        world_positions = [get_gaze_positions(0, main_positions)]
+        main_translations = lookat_utilities.world_positions_to_local(controls[:1], world_positions[0][numpy.newaxis],
+                                                                      times)[0]
+        lookat_utilities.set_translation_keys(controls[0], times, main_translations)
+
+        # Where the left and right controls end up under the re-keyed main control, reset or not.
+        child_translations = frames['child_translations']
+        if plan.user_defined_distance:
+            child_translations = numpy.zeros_like(child_translations)
+        child_positions = lookat_math.transform_points(
+            child_translations, lookat_utilities.sample_matrices(controls[1:], times, 'parentMatrix'))
+        world_positions += [get_gaze_positions(index, child_positions[index - 1]) for index in (1, 2)]
+
+        world_positions = lookat_sampling.interpolate_samples(times, numpy.stack(world_positions, axis=1),
+                                                              self.plot_key_times).swapaxes(0, 1)
+        translations = lookat_utilities.world_positions_to_local(controls, world_positions, self.plot_key_times)
+        for control, control_translations in zip(controls, translations):
+            lookat_utilities.set_translation_keys(control, self.plot_key_times, control_translations)
+
+        if plan.update_au_eyes:
+            startframe, endframe = self.get_timerange()
+            lookat_utilities.insert_boundary_keys(self.get_au_curve_list(), startframe, endframe)
+            self.write_au_values(times, frames['au_values'])
+
+    def get_au_curve_list(self):
+        return ['{0}:{1}.{2}'.format(self.namespace, control, attribute)
+                for control in [self.au_eyes_main_control_curve,
+                                self.au_eyes_left_control_curve,
+                                self.au_eyes_right_control_curve]
+                for attribute in ['tx', 'ty']]
+
+    def get_au_control_tuples(self):
+        """Returns (lookAt control, AU eyes control, x value, y value) tuples"""
+        return [
+            ('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve),
+             '{0}:{1}'.format(self.namespace, self.au_eyes_main_control_curve),
+             'C_TX',
+             'C_TY'),
+            ('{0}:{1}'.format(self.namespace, self.look_at_left_control_curve),
+             '{0}:{1}'.format(self.namespace, self.au_eyes_left_control_curve),
+             'L_TX',
+             'L_TY'),
+            ('{0}:{1}'.format(self.namespace, self.look_at_right_control_curve),
+             '{0}:{1}'.format(self.namespace, self.au_eyes_right_control_curve),
+             'R_TX',
+             'R_TY')
+        ]
+
+    def capture_plot_frames_for_au_eyes(self):
+        startframe, endframe = self.get_timerange()
+
+        # Flatten animation keys that we will be replacing
+        lookat_utilities.flatten_anim_curve(self.get_au_curve_list(), startframe, endframe)
+
+        self.control_curve_tuple_list = self.get_au_control_tuples()
+
+        # Get list of keys for all "au_eyes" controls
+        source_controls = [control_curve_tuple[0] for control_curve_tuple in self.control_curve_tuple_list]
+        self.combined_keys_to_plot, self.plot_key_times = self.get_plot_times(source_controls)
+
+    def write_plot_frames_to_au_eyes(self):
+        times = numpy.asarray(self.combined_keys_to_plot, dtype=numpy.float64)
+        self.write_au_values(times, self.get_au_values(times))
+
+    def get_au_values(self, times):
+        """Returns {plot_to_au_values attribute: values} for all times, solved in memory when the
+        solver matches the rig"""
+        solved_values = self.solve_au_values(times)
+
+        if not self.check_au_values(times, solved_values):
+            # The rig doesn't match the solver (customized network), read the node network instead.
+            lookat_utilities.log.warning("AU eyes solver doesn't match {0}, sampling the node network "
+                                         "instead.".format(self.plot_to_au_values))
+            attributes = ['{0}:{1}.{2}'.format(self.namespace, self.plot_to_au_values, attribute)
+                          for attribute in lookat_solver.AU_CONTROL_VALUES]
+            sampled_values = lookat_utilities.sample_attributes(attributes, times)
+            solved_values = dict(zip(lookat_solver.AU_CONTROL_VALUES, sampled_values))
+        return solved_values
+
+    def write_au_values(self, times, solved_values):
+        """Keys the AU eyes controls on the plot key times from values solved on the given times"""
+        for control_curve_tuple in self.get_au_control_tuples():
+            # Unpack control_curve_tuples
+            target_control = control_curve_tuple[1]
+            x_attribute = control_curve_tuple[2]
+            y_attribute = control_curve_tuple[3]
+            au_values = numpy.column_stack([solved_values[x_attribute], solved_values[y_attribute]])
+            au_values = lookat_sampling.interpolate_samples(times, au_values, self.plot_key_times)
+            lookat_utilities.set_anim_curve_keys('{0}.tx'.format(target_control), self.plot_key_times, au_values[:, 0])
+            lookat_utilities.set_anim_curve_keys('{0}.ty'.format(target_control), self.plot_key_times, au_values[:, 1])
+
+    def get_eye_action_unit_ranges(self):
+        """Returns {action unit: (min, max)} as set on the rig's lookat_custom_range_plug"""
+        range_plug = '{0}:lookat_custom_range_plug'.format(self.namespace)
+        ranges = {}
+        for action_unit in lookat_solver.EYE_ACTION_UNITS:
+            ranges[action_unit] = (cmds.getAttr('{0}.{1}_Min'.format(range_plug, action_unit)),
+                                   cmds.getAttr('{0}.{1}_Max'.format(range_plug, action_unit)))
+        return ranges
+
+    def solve_au_values(self, times):
+        """
+        Computes the plot_to_au_values attributes for all times from the eye aim directions, sampled
+        in one pass. Returns {attribute: values}.
+        """
+        sides = ['L', 'R']
+        nodes = []
+        for side in sides:
+            nodes += ['{0}:{1}_lookat_loc'.format(self.namespace, side),
+                      '{0}:{1}_lookat_ctl'.format(self.namespace, side),
+                      '{0}:{1}_Eye_upVec'.format(self.namespace, side)]
+        world_matrices = lookat_utilities.sample_world_matrices(nodes, times)
+        parent_matrices = lookat_utilities.sample_matrices(nodes[::3], times, 'parentMatrix')
+
+        eye_rotations = {}
+        for index, side in enumerate(sides):
+            loc_matrices, target_matrices, up_matrices = world_matrices[index * 3:index * 3 + 3]
+            eye_rotations[side] = lookat_solver.solve_eye_rotations(loc_matrices, parent_matrices[index],
+                                                                    target_matrices, up_matrices)
+
+        action_units = lookat_solver.solve_action_units(eye_rotations, self.get_eye_action_unit_ranges())
+        return lookat_solver.solve_au_controls(action_units)
+
+    def check_au_values(self, times, solved_values, tolerance=1e-3):
+        """Compares solved au values with the plot_to_au_values node on the first, middle and last time"""
+        check_indices = numpy.unique(numpy.linspace(0, len(times) - 1, min(3, len(times))).astype(int))
+        attributes = ['{0}:{1}.{2}'.format(self.namespace, self.plot_to_au_values, attribute)
+                      for attribute in lookat_solver.AU_CONTROL_VALUES]
+        network_values = lookat_utilities.sample_attributes(attributes, times[check_indices])
+        solved = numpy.array([solved_values[attribute][check_indices]
+                              for attribute in lookat_solver.AU_CONTROL_VALUES])
+        return numpy.allclose(network_values, solved, atol=tolerance)
+
+    def reset_lookat(self):
+        """
+        Clears all animation on the lookAt control and reset's its' position to 0,0,0.
+        """
+        cmds.cutKey('{0}:{1}'.format(self.namespace, self.look_at_main_control_curve))
+        cmds.cutKey('{0}:{1}'.format(self.namespace, self.look_at_left_control_curve))
+        cmds.cutKey('{0}:{1}'.format(self.namespace, self.look_at_right_control_curve))
+
+        # Cut existing keys on the lookAt to force the user defined distance.
+        cmds.setAttr('{0}:{1}.tx'.format(self.namespace, self.look_at_main_control_curve), 0)
+        cmds.setAttr('{0}:{1}.ty'.format(self.namespace, self.look_at_main_control_curve), 0)
+        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.look_at_main_control_curve), 0)
+
+        cmds.setAttr('{0}:{1}.tx'.format(self.namespace, self.look_at_left_control_curve), 0)
+        cmds.setAttr('{0}:{1}.ty'.format(self.namespace, self.look_at_left_control_curve), 0)
+        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.look_at_left_control_curve), 0)
+
+        cmds.setAttr('{0}:{1}.tx'.format(self.namespace, self.look_at_right_control_curve), 0)
+        cmds.setAttr('{0}:{1}.ty'.format(self.namespace, self.look_at_right_control_curve), 0)
+        cmds.setAttr('{0}:{1}.tz'.format(self.namespace, self.look_at_right_control_curve), 0)
+
+    def get_sparse_bake_index(self, control_curve):
+        """
+        Returns a list of sparse keys for plotting a single control curve.
+        """
+        startframe, endframe = self.get_timerange()
+
+        tx_key_index = cmds.keyframe(control_curve, at='tx', query=True)
+        ty_key_index = cmds.keyframe(control_curve, at='ty', query=True)
+        tz_key_index = cmds.keyframe(control_curve, at='tz', query=True)
+
+        compiled_key_index = []
+        if tx_key_index:
+            for key in ty_key_index:
+                if key not in compiled_key_index:
+                    compiled_key_index.append(key)
+        if ty_key_index:
+            for key in tx_key_index:
+                if key not in compiled_key_index:
+                    compiled_key_index.append(key)
+        if tz_key_index:
+            for key in tz_key_index:
+                if key not in compiled_key_index:
+                    compiled_key_index.append(key)
+
+        sparse_bake_index = [float(startframe)] +\
+                            [key for key in compiled_key_index if startframe <= key <= endframe] +\
+                            [float(endframe)]
+        return sparse_bake_index
+
+    def get_plot_times(self, source_controls):
+        """
+        Returns the times to sample a plot on and the times to key it on.
+        SmartBake samples and keys the existing keys of the source controls, otherwise the sampling
+        options decide.
+        """
+        startframe, endframe = self.get_timerange()
+        # Only auto sampling chooses, the choice of an earlier plot mustn't be reported for this one.
+        self.sampling_choice = None
+
+        if self.options.smart_bake:
+            sample_times = lookat_sampling.merge_times(
+                *[self.get_sparse_bake_index(source_control) for source_control in source_controls])
+            return sample_times, sample_times
+
+        if self.options.sampling.mode == lookat_sampling.SAMPLE_AUTO:
+            return self.get_auto_plot_times(source_controls)
+
+        sampling_options = self.options.sampling
+        sample_times = sampling_options.get_sample_times(startframe, endframe)
+        return sample_times, sampling_options.get_key_times(startframe, endframe, sample_times)
+
+    def get_auto_plot_times(self, source_controls):
+        """
+        Chooses sparse, stepped or dense sampling from the translate curves of all the source
+        controls and returns its sample and key times. The controls are captured and keyed together,
+        on the same times, so one sampling is chosen for all of them.
+        """
+        startframe, endframe = self.get_timerange()
+
+        curves = []
+        for source_control in source_controls:
+            for attribute in ['tx', 'ty', 'tz']:
+                times = cmds.keyframe(source_control, at=attribute, query=True, timeChange=True)
+                if times:
+                    values = cmds.keyframe(source_control, at=attribute, query=True, valueChange=True)
+                    curves.append((times, values))
+
+        self.sampling_choice, sampling_options = lookat_sampling.choose_sampling(
+            curves, startframe, endframe, self.options.sampling.key_on_frames)
+        sample_times = sampling_options.get_sample_times(startframe, endframe)
+        return sample_times, sampling_options.get_key_times(startframe, endframe, sample_times)
@@ -0,0 +1,210 @@
+"""
+Sample times for the lookat plotters.
+
+A plot can be evaluated on every frame, on every Nth frame, on sub-frame steps (high-rate capture) or
+on an explicit list of times. When the times a plot is sampled on differ from the times it is keyed
+on, the captured values are resampled with a vectorized linear interpolation.
+
+The "auto" mode picks sparse, stepped or dense sampling for a plot from the density and the motion
+of its source controls' curves, see choose_sampling.
+"""
+import re
+
+import numpy
+
+SAMPLE_EVERY_FRAME = 'every_frame'
+SAMPLE_STEPPED = 'stepped'
+SAMPLE_SUBFRAME = 'subframe'
+SAMPLE_EXPLICIT = 'explicit'
+SAMPLE_AUTO = 'auto'
+
+# Order matches the items of the "cb_sampling" combo box.
+SAMPLING_MODES = [SAMPLE_EVERY_FRAME, SAMPLE_STEPPED, SAMPLE_SUBFRAME, SAMPLE_EXPLICIT, SAMPLE_AUTO]
+
+# Strategies the auto mode chooses from.
+STRATEGY_SPARSE = 'sparse'
+STRATEGY_STEPPED = 'stepped'
+STRATEGY_DENSE = 'dense'
+
+# Curves with at least this many keys per frame are already dense.
+DENSE_KEY_DENSITY = 0.5
+# Largest value change allowed between two auto samples, in the curve's ui units.
+MOTION_TOLERANCE = 1.0
+MAX_AUTO_STEP = 8
+
+
+class SamplingOptions(object):
+    """Describes which times a plot is evaluated and keyed on.
+
+    # Every 4th frame:
+    SamplingOptions(SAMPLE_STEPPED, step=4)
+
+    # 120 fps capture in a 30 fps scene, keyed back onto whole frames:
+    SamplingOptions(SAMPLE_SUBFRAME, step=0.25, key_on_frames=True)
+    """
+
+    def __init__(self, mode=SAMPLE_EVERY_FRAME, step=1.0, times=None, key_on_frames=False):
+        if mode not in SAMPLING_MODES:
+            raise ValueError("Unknown sampling mode: {0}".format(mode))
+        if mode in (SAMPLE_STEPPED, SAMPLE_SUBFRAME) and step <= 0:
+            raise ValueError("The sampling step must be greater than zero.")
+        if mode == SAMPLE_EXPLICIT and not times:
+            raise ValueError("Explicit sampling needs at least one time.")
+
+        self.mode = mode
+        self.step = float(step)
+        self.times = list(times or [])
+        self.key_on_frames = key_on_frames
+
+    def get_sample_times(self, startframe, endframe):
+        """Returns a sorted float array of the times to evaluate between startframe and endframe.
+        The start and end frames are always included so the plot joins the flattened curve ends."""
+        if self.mode == SAMPLE_AUTO:
+            raise ValueError("Auto sampling is chosen per plot, see choose_sampling.")
+        if self.mode == SAMPLE_EVERY_FRAME:
+            times = numpy.arange(startframe, endframe + 1, dtype=numpy.float64)
+        elif self.mode == SAMPLE_EXPLICIT:
+            times = numpy.asarray(self.times, dtype=numpy.float64)
+        else:
+            # Build the grid from a sample count rather than accumulating the step, so sub-frame
+            # steps don't drift away from the frames they should land on.
+            count = int(numpy.floor((endframe - startframe) / self.step + 1e-6)) + 1
+            times = startframe + numpy.arange(count, dtype=numpy.float64) * self.step
+        return merge_times(times, [startframe, endframe], startframe=startframe, endframe=endframe)
+
+    def get_key_times(self, startframe, endframe, sample_times):
+        """Returns the times keys should be written on for the given sample times."""
+        if self.key_on_frames:
+            return numpy.arange(startframe, endframe + 1, dtype=numpy.float64)
+        return numpy.asarray(sample_times, dtype=numpy.float64)
+
+
+def merge_times(*time_lists, **kwargs):
+    """Returns the sorted union of the given time lists as a float array, optionally clipped to
+    startframe/endframe."""
+    startframe = kwargs.get('startframe')
+    endframe = kwargs.get('endframe')
+
+    arrays = [numpy.asarray(times, dtype=numpy.float64).ravel() for times in time_lists]
+    if not arrays:
+        return numpy.empty(0, dtype=numpy.float64)
+    times = numpy.unique(numpy.concatenate(arrays))
+    if startframe is not None:
+        times = times[times >= startframe]
+    if endframe is not None:
+        times = times[times <= endframe]
+    return times
+
+
+def get_segment_times(times, start, end, include_end=False):
+    """Returns the times from start up to end (end excluded unless include_end) as a float array.
+    The start, and the end when included, are always in so the plot joins the curve around it."""
+    times = numpy.asarray(times, dtype=numpy.float64)
+    in_segment = (times >= start) & ((times <= end) if include_end else (times < end))
+    return merge_times([start, end] if include_end else [start], times[in_segment])
+
+
+RANGE_PATTERN = re.compile(r'^(-?\d+)(?:(?:-|:)(-?\d+))?$')
+
+
+def parse_ranges(text):
+    """Parses comma or space separated frame ranges, e.g. "1001-1010, 1040:1052 1060", into merged
+    (start, end) pairs, see merge_ranges."""
+    ranges = []
+    for token in text.replace(',', ' ').split():
+        match = RANGE_PATTERN.match(token)
+        if not match:
+            raise ValueError("Not a frame range: {0}".format(token))
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) is not None else start
+        ranges.append((start, end))
+    return merge_ranges(ranges)
+
+
+def merge_ranges(ranges):
+    """Returns the sorted, disjoint (start, end) ranges covering the given ones, overlapping and
+    touching ranges joined. Ends are included."""
+    merged = []
+    for start, end in sorted(ranges):
+        if start > end:
+            raise ValueError("Frame range ends before it starts: {0}-{1}".format(start, end))
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def format_ranges(ranges):
+    return ', '.join(str(start) if start == end else '{0}-{1}'.format(start, end) for start, end in ranges)
+
+
+def clip_to_ranges(times, ranges):
+    """Returns the times inside any of the (start, end) ranges"""
+    times = numpy.asarray(times, dtype=numpy.float64)
+    inside = numpy.zeros(times.shape, dtype=bool)
+    for start, end in ranges:
+        inside |= (times >= start) & (times <= end)
+    return times[inside]
+
+
+def choose_sampling(curves, startframe, endframe, key_on_frames=False):
+    """Picks the sampling of a plot from the animation curves of its source controls.
+
+    curves is a list of (key times, key values) pairs, one per animated attribute. Returns the
+    strategy and its SamplingOptions:
+        sparse  - the existing keys, when the controls hold still or move little between them
+        dense   - every frame, when the curves are already keyed (almost) every frame
+        stepped - every Nth frame, N chosen so no curve moves more than MOTION_TOLERANCE per sample
+    """
+    frame_count = max(1.0, float(endframe - startframe))
+    key_times = []
+    speed = 0.0
+    for times, values in curves:
+        times = numpy.asarray(times, dtype=numpy.float64)
+        values = numpy.asarray(values, dtype=numpy.float64)
+        in_range = (times >= startframe) & (times <= endframe)
+        key_times.append(times[in_range])
+        if times.size > 1:
+            gaps = numpy.maximum(numpy.diff(times), 1e-6)
+            speed = max(speed, float(numpy.max(numpy.abs(numpy.diff(values)) / gaps)))
+
+    key_times = merge_times(*key_times)
+    if key_times.size / frame_count >= DENSE_KEY_DENSITY:
+        return STRATEGY_DENSE, SamplingOptions(SAMPLE_EVERY_FRAME, key_on_frames=key_on_frames)
+
+    step = MAX_AUTO_STEP if speed == 0 else int(numpy.clip(MOTION_TOLERANCE / speed, 1, MAX_AUTO_STEP))
+    largest_gap = frame_count if key_times.size < 2 else float(numpy.max(numpy.diff(key_times)))
+    if speed * largest_gap <= MOTION_TOLERANCE:
+        times = merge_times(key_times, [startframe, endframe])
+        return STRATEGY_SPARSE, SamplingOptions(SAMPLE_EXPLICIT, times=times.tolist(), key_on_frames=key_on_frames)
+    if step == 1:
+        return STRATEGY_DENSE, SamplingOptions(SAMPLE_EVERY_FRAME, key_on_frames=key_on_frames)
+    return STRATEGY_STEPPED, SamplingOptions(SAMPLE_STEPPED, step=step, key_on_frames=key_on_frames)
+
+
+def parse_times(text):
+    """Parses a comma or space separated string of times, e.g. "1001, 1004.5 1010"."""
+    return [float(token) for token in text.replace(',', ' ').split()]
+
+
+def interpolate_samples(sample_times, values, times):
+    """Linearly interpolates values sampled at sample_times onto times.
+
+    values has one row per sample time and any number of columns; all columns are interpolated in
+    one pass. Times outside of the sampled range hold the first / last sample.
+    """
+    sample_times = numpy.asarray(sample_times, dtype=numpy.float64)
+    values = numpy.asarray(values, dtype=numpy.float64)
+    times = numpy.asarray(times, dtype=numpy.float64)
+
+    if sample_times.size == 1:
+        return numpy.repeat(values[:1], times.size, axis=0)
+
+    upper = numpy.clip(numpy.searchsorted(sample_times, times, side='right'), 1, sample_times.size - 1)
+    lower = upper - 1
+    span = sample_times[upper] - sample_times[lower]
+    weight = numpy.clip((times - sample_times[lower]) / span, 0.0, 1.0)
+    if values.ndim > 1:
+        weight = weight.reshape((-1,) + (1,) * (values.ndim - 1))
+    return values[lower] * (1.0 - weight) + values[upper] * weight
@@ -0,0 +1,190 @@
+"""
+Closed-form version of the lookat -> AU eyes node network of prefabs/lookat.ma.
+
+The network aims L/R_lookat_loc at the lookat controls, remaps their rotations through the
+lookat_custom_range_plug NL/NR_61..64 ranges (l_aim_loc_to_N*_rmp) and combines the resulting
+action units into the au_eyes_ctl translations (plot_to_au_values). The functions below compute the
+same values from sampled matrices with numpy, for any number of frames at once, and don't need maya.
+
+Downstream, the rig blends those action units with the gaze ones (eyes_combined_values), adds the
+convergence and clamps them (hlp_control_lookat_output), then remaps them back to the eye rotations
+(final_rotation_output). solve_eye_outputs computes that stage. solve_lookat chains everything and is
+the kernel of the lookatSolver node (lookat_solver_node), which replaces the whole network in the rig.
+"""
+import numpy
+
+import lookat_math
+
+EYE_ACTION_UNITS = ['NL_61', 'NL_62', 'NL_63', 'NL_64', 'NR_61', 'NR_62', 'NR_63', 'NR_64']
+
+# Attribute of L/R_lookat_loc (in degrees) each action unit is remapped from.
+ACTION_UNIT_ROTATIONS = {'61': 'ry', '62': 'ry', '63': 'rx', '64': 'rx'}
+
+# outputMax of the N*6*_remap nodes feeding plot_to_au_values.
+ACTION_UNIT_CONTROL_RANGE = {'61': 10.0, '62': -10.0, '63': 10.0, '64': -10.0}
+
+# Ranges AssembleLookAt sets on lookat_custom_range_plug.
+DEFAULT_RANGES = {'NL_61': (0, 40), 'NL_62': (0, -40), 'NL_63': (0, -30), 'NL_64': (0, 30),
+                  'NR_61': (0, 40), 'NR_62': (0, -40), 'NR_63': (0, -30), 'NR_64': (0, 30)}
+
+AU_CONTROL_VALUES = ['C_TX', 'C_TY', 'L_TX', 'L_TY', 'R_TX', 'R_TY']
+
+# lookat_output convergence rotation (LeftEye_convergence_RX...) each action unit is remapped from.
+CONVERGENCE_ROTATIONS = {'61': 'rx', '62': 'rx', '63': 'rz', '64': 'rz'}
+
+# final_rotation_output attributes: the sum of both action units remapped to their ranges.
+FINAL_ROTATIONS = {'NL_61_62': ('NL_61', 'NL_62'), 'NL_63_64': ('NL_63', 'NL_64'),
+                   'NR_61_62': ('NR_61', 'NR_62'), 'NR_63_64': ('NR_63', 'NR_64')}
+
+
+def aim_rotations(positions, targets, up_positions):
+    """Returns the (..., 3, 3) world rotations an aimConstraint with aim vector +Z, up vector +Y and
+    an "object" world up type produces for the given (..., 3) positions."""
+    aim = lookat_math.normalize(numpy.asarray(targets) - positions)
+    up = numpy.asarray(up_positions) - positions
+    up = lookat_math.normalize(up - aim * numpy.sum(up * aim, axis=-1)[..., numpy.newaxis])
+    side = numpy.cross(up, aim)
+    return numpy.stack([side, up, aim], axis=-2)
+
+
+def local_rotations(world_rotations, parent_matrices):
+    """Returns world rotations relative to the (scaled) parent matrices"""
+    parent_rotations = lookat_math.as_matrices(parent_matrices)[..., :3, :3]
+    parent_rotations = parent_rotations / numpy.linalg.norm(parent_rotations, axis=-1)[..., numpy.newaxis]
+    return numpy.matmul(world_rotations, numpy.swapaxes(parent_rotations, -1, -2))
+
+
+def euler_zyx(rotations):
+    """Decomposes (..., 3, 3) rotation matrices for the zyx rotate order (the lookat locators' order).
+    Returns rx, ry, rz arrays in degrees."""
+    rotations = numpy.asarray(rotations, dtype=numpy.float64)
+    ry = numpy.arcsin(numpy.clip(rotations[..., 2, 0], -1.0, 1.0))
+    rx = numpy.arctan2(-rotations[..., 2, 1], rotations[..., 2, 2])
+    rz = numpy.arctan2(-rotations[..., 1, 0], rotations[..., 0, 0])
+    return numpy.degrees(rx), numpy.degrees(ry), numpy.degrees(rz)
+
+
+def remap(values, input_min, input_max, output_min=0.0, output_max=1.0):
+    """A remapValue node with a linear 0..1 ramp: clamps and rescales values"""
+    span = float(input_max - input_min)
+    if span == 0:
+        normalized = (numpy.asarray(values) >= input_max).astype(numpy.float64)
+    else:
+        normalized = numpy.clip((numpy.asarray(values, dtype=numpy.float64) - input_min) / span, 0.0, 1.0)
+    return output_min + normalized * (output_max - output_min)
+
+
+def solve_action_units(eye_rotations, ranges=None):
+    """Returns {action unit: values} for the lookat_output NL/NR_61..64 attributes.
+    eye_rotations is {'L': (rx, ry), 'R': (rx, ry)} in degrees."""
+    ranges = ranges or DEFAULT_RANGES
+    action_units = {}
+    for action_unit in EYE_ACTION_UNITS:
+        side, number = action_unit[1], action_unit[-2:]
+        rx, ry = eye_rotations[side]
+        values = ry if ACTION_UNIT_ROTATIONS[number] == 'ry' else rx
+        action_units[action_unit] = remap(values, *ranges[action_unit])
+    return action_units
+
+
+def solve_au_controls(action_units):
+    """Combines the action units into the au_eyes_ctl, L_au_eyes_ctl and R_au_eyes_ctl translations,
+    returns {plot_to_au_values attribute: values}"""
+    scaled = {}
+    for action_unit, values in action_units.items():
+        scaled[action_unit] = numpy.clip(values, 0.0, 1.0) * ACTION_UNIT_CONTROL_RANGE[action_unit[-2:]]
+
+    horizontal = (scaled['NL_61'] + scaled['NR_61']) / 2.0 + (scaled['NL_62'] + scaled['NR_62']) / 2.0
+    vertical = (scaled['NL_63'] + scaled['NR_63']) / 2.0 + (scaled['NL_64'] + scaled['NR_64']) / 2.0
+    return {'C_TX': horizontal,
+            'C_TY': vertical,
+            'L_TX': horizontal - (scaled['NL_61'] + scaled['NL_62']),
+            'L_TY': -(vertical - (scaled['NL_63'] + scaled['NL_64'])),
+            'R_TX': horizontal - (scaled['NR_61'] + scaled['NR_62']),
+            'R_TY': -(vertical - (scaled['NR_63'] + scaled['NR_64']))}
+
+
+def blend(first, second, weight):
+    """A blendColors node: weight 1 gives first, 0 gives second"""
+    return first * weight + second * (1.0 - weight)
+
+
+def solve_eye_outputs(action_units, gaze_action_units, lookat_blend, convergence_rotations, convergence_blend,
+                      ranges=None):
+    """Returns the values of the stage after lookat_output, as {attribute: values} dicts:
+    (eyes_combined_values, hlp_control_lookat_output, final_rotation_output).
+
+    The lookat action units are blended with gaze_action_units by lookat_blend (the
+    eye_contol_switch_remap_crv value), the convergence is added to them and blended in by
+    convergence_blend (the convergence_enabled_remap_crv value). convergence_rotations is
+    {'L': (rx, rz), 'R': ...}, lookat_output's Left/RightEye_convergence_RX/RZ in degrees.
+    """
+    ranges = ranges or DEFAULT_RANGES
+    combined = {}
+    convergence = {}
+    for action_unit in EYE_ACTION_UNITS:
+        combined[action_unit] = blend(action_units[action_unit], gaze_action_units[action_unit], lookat_blend)
+        rx, rz = convergence_rotations[action_unit[1]]
+        values = rx if CONVERGENCE_ROTATIONS[action_unit[-2:]] == 'rx' else rz
+        convergence[action_unit] = remap(values, *ranges[action_unit])
+
+    added = {}
+    for prefix in ['NL_', 'NR_']:
+        # 61 and 62 share one signed range (NL_61_62_add_convergence): 61 is its positive half, 62
+        # its negative half.
+        signed = (remap(combined[prefix + '61'], 0.0, 1.0) - remap(combined[prefix + '62'], 0.0, 1.0) +
+                  remap(convergence[prefix + '61'], 0.0, 1.0) - remap(convergence[prefix + '62'], 0.0, 1.0))
+        added[prefix + '61'] = remap(signed, 0.0, 1.0)
+        added[prefix + '62'] = remap(signed, 0.0, -1.0)
+        for number in ['63', '64']:
+            added[prefix + number] = numpy.clip(convergence[prefix + number] + combined[prefix + number], 0.0, 1.0)
+
+    control_lookat = dict((action_unit, blend(added[action_unit], combined[action_unit], convergence_blend))
+                          for action_unit in EYE_ACTION_UNITS)
+    final_rotations = {}
+    for attribute, pair in FINAL_ROTATIONS.items():
+        final_rotations[attribute] = sum(remap(control_lookat[action_unit], 0.0, 1.0, *ranges[action_unit])
+                                         for action_unit in pair)
+    return combined, control_lookat, final_rotations
+
+
+def solve_eye_rotations(loc_matrices, loc_parent_matrices, target_matrices, up_matrices):
+    """Returns the (rx, ry) degrees of a lookat locator from sampled world matrices of the locator,
+    its parent, its aim target (the lookat control) and its up object."""
+    return solve_aim_rotations(lookat_math.matrix_translations(loc_matrices), loc_parent_matrices,
+                               lookat_math.matrix_translations(target_matrices),
+                               lookat_math.matrix_translations(up_matrices))
+
+
+def solve_aim_rotations(positions, parent_matrices, target_positions, up_positions):
+    """Returns the (rx, ry) degrees of a lookat locator at world positions, aiming at the target
+    positions, relative to its parent matrices"""
+    world = aim_rotations(positions, target_positions, up_positions)
+    rx, ry, _ = euler_zyx(local_rotations(world, parent_matrices))
+    return rx, ry
+
+
+def solve_lookat(eyes, gaze_action_units, lookat_blend, convergence_rotations, convergence_blend, ranges=None):
+    """Solves the whole lookat -> AU eyes network at once, for the lookatSolver node.
+
+    eyes is {'L': (translate, parent_matrix, target_position, up_position), 'R': ...}: the lookat
+    locator's translate in its parent space, its parent matrix and the world positions of its aim
+    target (the lookat control) and up object. The other arguments are solve_eye_outputs'.
+
+    Returns {attribute: values}: the lookat_output action units (NL_61...), the plot_to_au_values
+    translations (C_TX...), and the eyes_combined_values, hlp_control_lookat_output and
+    final_rotation_output values as NL_61_combined, NL_61_control and NL_61_62...
+    """
+    eye_rotations = {}
+    for side, (translate, parent_matrix, target_position, up_position) in eyes.items():
+        position = lookat_math.transform_points(translate, parent_matrix)
+        eye_rotations[side] = solve_aim_rotations(position, parent_matrix, target_position, up_position)
+    action_units = solve_action_units(eye_rotations, ranges)
+    combined, control_lookat, final_rotations = solve_eye_outputs(action_units, gaze_action_units, lookat_blend,
+                                                                  convergence_rotations, convergence_blend, ranges)
+    values = dict(action_units)
+    values.update(solve_au_controls(action_units))
+    values.update(('{0}_combined'.format(action_unit), value) for action_unit, value in combined.items())
+    values.update(('{0}_control'.format(action_unit), value) for action_unit, value in control_lookat.items())
+    values.update(final_rotations)
+    return values
@@ -0,0 +1,170 @@
+"""
+lookatSolver: a dependency node computing the lookat -> AU eyes outputs in one compute.
+
+It replaces the unitConversion / remapValue / plusMinusAverage chains of the prefab that turn the
+lookat locators' aim into the lookat_output NL/NR_61..64 action units and the plot_to_au_values
+control translations, and the blend / convergence / clamp chains after them that drive
+eyes_combined_values, hlp_control_lookat_output and final_rotation_output, so playback dirties and
+evaluates one node instead of dozens. The math is lookat_solver.solve_lookat, which doesn't need maya.
+
+Load it as a plugin (AssembleLookAt does it when it builds the node):
+
+    cmds.loadPlugin('<path>/lookat_solver_node.py')
+"""
+import numpy
+
+from maya import OpenMaya
+from maya import OpenMayaMPx
+
+import lookat_solver
+
+NODE_NAME = 'lookatSolver'
+# Local development range, see the maya node id documentation.
+NODE_ID = OpenMaya.MTypeId(0x0007F1A0)
+
+SIDES = {'L': 'left', 'R': 'right'}
+
+
+def matrix_to_array(matrix):
+    return numpy.array([[matrix(row, column) for column in range(4)] for row in range(4)])
+
+
+class LookAtSolverNode(OpenMayaMPx.MPxNode):
+    """Inputs per side (left/right): the lookat locator's translate and parent matrix, the world
+    matrices of its aim target and up object, the convergence rotations (ConvergenceRX/RZ, degrees).
+    Inputs NL/NR_6x_Min/Max: the action unit ranges, NL/NR_6x_gaze: the gaze action units,
+    lookatBlend / convergenceBlend: the switch curves' values.
+    Outputs: the NL/NR_6x action units, the AU control values, NL/NR_6x_combined,
+    NL/NR_6x_control and the NL/NR_61_62 / 63_64 final rotations."""
+
+    inputs = []
+    side_inputs = {}
+    convergence_inputs = {}
+    range_inputs = {}
+    gaze_inputs = {}
+    blend_inputs = {}
+    outputs = {}
+
+    def compute(self, plug, data):
+        if not any(plug == attribute for attribute in self.outputs.values()):
+            return OpenMaya.kUnknownParameter
+
+        eyes = {}
+        for side, (translate, parent_matrix, target_matrix, up_matrix) in self.side_inputs.items():
+            translate = data.inputValue(translate).asVector()
+            parent_matrix = matrix_to_array(data.inputValue(parent_matrix).asMatrix())
+            target_matrix = matrix_to_array(data.inputValue(target_matrix).asMatrix())
+            up_matrix = matrix_to_array(data.inputValue(up_matrix).asMatrix())
+            eyes[side] = (numpy.array([translate.x, translate.y, translate.z]), parent_matrix,
+                          target_matrix[3, :3], up_matrix[3, :3])
+
+        convergence_rotations = {}
+        for side, (rx, rz) in self.convergence_inputs.items():
+            convergence_rotations[side] = (data.inputValue(rx).asDouble(), data.inputValue(rz).asDouble())
+
+        ranges = {}
+        for action_unit, (minimum, maximum) in self.range_inputs.items():
+            ranges[action_unit] = (data.inputValue(minimum).asDouble(), data.inputValue(maximum).asDouble())
+        gaze_action_units = dict((action_unit, data.inputValue(attribute).asDouble())
+                                 for action_unit, attribute in self.gaze_inputs.items())
+        lookat_blend, convergence_blend = [data.inputValue(self.blend_inputs[name]).asDouble()
+                                           for name in ('lookatBlend', 'convergenceBlend')]
+
+        values = lookat_solver.solve_lookat(eyes, gaze_action_units, lookat_blend, convergence_rotations,
+                                            convergence_blend, ranges)
+        for name, attribute in self.outputs.items():
+            handle = data.outputValue(attribute)
+            handle.setDouble(float(values[name]))
+            handle.setClean()
+        data.setClean(plug)
+        return OpenMaya.kSuccess
+
+
+def creator():
+    return OpenMayaMPx.asMPxPtr(LookAtSolverNode())
+
+
+def create_output(name):
+    numeric = OpenMaya.MFnNumericAttribute()
+    attribute = numeric.create(name, name, OpenMaya.MFnNumericData.kDouble, 0.0)
+    numeric.setWritable(False)
+    numeric.setStorable(False)
+    LookAtSolverNode.addAttribute(attribute)
+    LookAtSolverNode.outputs[name] = attribute
+
+
+def create_double_input(name, default=0.0):
+    numeric = OpenMaya.MFnNumericAttribute()
+    attribute = numeric.create(name, name, OpenMaya.MFnNumericData.kDouble, default)
+    LookAtSolverNode.addAttribute(attribute)
+    LookAtSolverNode.inputs.append(attribute)
+    return attribute
+
+
+def create_matrix_input(name):
+    matrix = OpenMaya.MFnMatrixAttribute()
+    attribute = matrix.create(name, name)
+    matrix.setHidden(True)
+    LookAtSolverNode.addAttribute(attribute)
+    LookAtSolverNode.inputs.append(attribute)
+    return attribute
+
+
+def initializer():
+    # Reloading the plugin runs this again.
+    LookAtSolverNode.inputs = []
+    LookAtSolverNode.side_inputs = {}
+    LookAtSolverNode.convergence_inputs = {}
+    LookAtSolverNode.range_inputs = {}
+    LookAtSolverNode.gaze_inputs = {}
+    LookAtSolverNode.blend_inputs = {}
+    LookAtSolverNode.outputs = {}
+
+    numeric = OpenMaya.MFnNumericAttribute()
+    for side, prefix in sorted(SIDES.items()):
+        translate = numeric.create('{0}Translate'.format(prefix), '{0}Translate'.format(prefix),
+                                   OpenMaya.MFnNumericData.k3Double)
+        LookAtSolverNode.addAttribute(translate)
+        LookAtSolverNode.inputs.append(translate)
+        LookAtSolverNode.side_inputs[side] = (translate,
+                                              create_matrix_input('{0}ParentMatrix'.format(prefix)),
+                                              create_matrix_input('{0}TargetMatrix'.format(prefix)),
+                                              create_matrix_input('{0}UpMatrix'.format(prefix)))
+        LookAtSolverNode.convergence_inputs[side] = (create_double_input('{0}ConvergenceRX'.format(prefix)),
+                                                     create_double_input('{0}ConvergenceRZ'.format(prefix)))
+
+    for action_unit in lookat_solver.EYE_ACTION_UNITS:
+        default_min, default_max = lookat_solver.DEFAULT_RANGES[action_unit]
+        range_attributes = []
+        for suffix, default in (('Min', default_min), ('Max', default_max)):
+            name = '{0}_{1}'.format(action_unit, suffix)
+            attribute = numeric.create(name, name, OpenMaya.MFnNumericData.kDouble, default)
+            numeric.setKeyable(True)
+            LookAtSolverNode.addAttribute(attribute)
+            LookAtSolverNode.inputs.append(attribute)
+            range_attributes.append(attribute)
+        LookAtSolverNode.range_inputs[action_unit] = tuple(range_attributes)
+        LookAtSolverNode.gaze_inputs[action_unit] = create_double_input('{0}_gaze'.format(action_unit))
+    # The lookat is on and the convergence off until the switch curves are connected.
+    LookAtSolverNode.blend_inputs['lookatBlend'] = create_double_input('lookatBlend', 1.0)
+    LookAtSolverNode.blend_inputs['convergenceBlend'] = create_double_input('convergenceBlend')
+
+    for name in lookat_solver.EYE_ACTION_UNITS + lookat_solver.AU_CONTROL_VALUES:
+        create_output(name)
+    for action_unit in lookat_solver.EYE_ACTION_UNITS:
+        create_output('{0}_combined'.format(action_unit))
+        create_output('{0}_control'.format(action_unit))
+    for name in sorted(lookat_solver.FINAL_ROTATIONS):
+        create_output(name)
+
+    for input_attribute in LookAtSolverNode.inputs:
+        for output_attribute in LookAtSolverNode.outputs.values():
+            LookAtSolverNode.attributeAffects(input_attribute, output_attribute)
+
+
+def initializePlugin(plugin):
+    OpenMayaMPx.MFnPlugin(plugin, 'advanced_lookAt', '1.0').registerNode(NODE_NAME, NODE_ID, creator, initializer)
+
+
+def uninitializePlugin(plugin):
+    OpenMayaMPx.MFnPlugin(plugin).deregisterNode(NODE_ID)
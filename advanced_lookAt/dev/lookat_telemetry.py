@@ -0,0 +1,277 @@
+"""
+Local usage telemetry of the lookAt tools: tool opens, plots (conversion, frames, characters, phase
+durations) and failures, appended as json lines to files in a local directory. Doesn't need maya.
+
+Events are queued and written by a background thread, so recording one never waits on the disk.
+A file is rotated once it grows past max_bytes, keeping the last backups files next to it.
+
+    sink = lookat_telemetry.get_sink()
+    sink.record('plot', conversion='space_swap', frames=120, seconds=0.8, phases={'capture': 0.5})
+
+The aggregator reads the files of one or more machines and reports latency percentiles per
+conversion:
+
+    python lookat_telemetry.py [--json] telemetry_dir_or_file [...]
+
+ADVANCED_LOOKAT_TELEMETRY_DIR sets the directory (~/.advanced_lookat/telemetry by default), setting
+ADVANCED_LOOKAT_TELEMETRY to 0 turns the recording off.
+"""
+from __future__ import print_function
+
+import atexit
+import getpass
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+FILE_NAME = 'advanced_lookat_telemetry.jsonl'
+DIRECTORY_VARIABLE = 'ADVANCED_LOOKAT_TELEMETRY_DIR'
+ENABLED_VARIABLE = 'ADVANCED_LOOKAT_TELEMETRY'
+DEFAULT_DIRECTORY = os.path.join('~', '.advanced_lookat', 'telemetry')
+
+MAX_BYTES = 1024 * 1024
+BACKUPS = 5
+
+# Event types
+TOOL_OPEN = 'tool_open'
+PLOT = 'plot'
+
+PERCENTILES = [50, 90, 99]
+
+_sink = None
+
+
+class TelemetrySink(object):
+    """Appends events to a json lines file from a background thread, rotating the file by size"""
+
+    def __init__(self, directory, max_bytes=MAX_BYTES, backups=BACKUPS, enabled=True):
+        self.directory = directory
+        self.filepath = os.path.join(directory, FILE_NAME)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.enabled = enabled
+        self.session = '{0}-{1}'.format(os.getpid(), int(time.time()))
+        self.context = {'user': getpass.getuser(), 'host': socket.gethostname(), 'session': self.session}
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def record(self, event, **fields):
+        """Queues an event, returns at once"""
+        if not self.enabled:
+            return
+        fields.update(self.context, event=event, time=time.time())
+        self.queue.put(fields)
+        self._start()
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='lookat_telemetry')
+                self.thread.daemon = True
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            events = [self.queue.get()]
+            # Write whatever else is waiting in the same go.
+            while True:
+                try:
+                    events.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(events)
+            except (IOError, OSError):
+                # Telemetry never gets in the artists' way.
+                pass
+            finally:
+                for _ in events:
+                    self.queue.task_done()
+
+    def write(self, events):
+        lines = ''.join(json.dumps(event, sort_keys=True) + '\n' for event in events)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        if os.path.isfile(self.filepath) and os.path.getsize(self.filepath) + len(lines) > self.max_bytes:
+            self.rotate()
+        with open(self.filepath, 'a') as telemetry_file:
+            telemetry_file.write(lines)
+
+    def rotate(self):
+        """Shifts the file to .1, .1 to .2 and so on, dropping the oldest"""
+        for index in range(self.backups, 0, -1):
+            source = self.filepath if index == 1 else '{0}.{1}'.format(self.filepath, index - 1)
+            destination = '{0}.{1}'.format(self.filepath, index)
+            if not os.path.isfile(source):
+                continue
+            if os.path.isfile(destination):
+                os.remove(destination)
+            os.rename(source, destination)
+
+    def flush(self):
+        """Waits for the queued events to be written"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+
+class PhaseTimer(object):
+    """Adds up the durations of the named phases of a plot
+
+    timer = PhaseTimer()
+    with timer.phase('capture'):
+        ...
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.start = time.time()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.time() - start
+
+    @property
+    def seconds(self):
+        return time.time() - self.start
+
+
+def get_sink():
+    """Returns the session's sink, set up from the environment on first use"""
+    global _sink
+    if _sink is None:
+        directory = os.path.expanduser(os.environ.get(DIRECTORY_VARIABLE) or DEFAULT_DIRECTORY)
+        _sink = TelemetrySink(directory, enabled=os.environ.get(ENABLED_VARIABLE, '1') != '0')
+        atexit.register(_sink.flush)
+    return _sink
+
+
+def record(event, **fields):
+    get_sink().record(event, **fields)
+
+
+# ----Aggregation-----------------------------------------------------------------------------------
+def find_telemetry_files(paths):
+    """Returns the telemetry files, rotated ones included, in the given files and directories"""
+    filepaths = []
+    for path in paths:
+        if os.path.isfile(path):
+            filepaths.append(path)
+            continue
+        for root, _, filenames in os.walk(path):
+            filepaths.extend(os.path.join(root, filename) for filename in sorted(filenames)
+                             if filename.startswith(FILE_NAME))
+    return filepaths
+
+
+def read_events(filepaths):
+    """Yields the events of the files, skipping lines that don't parse (a write cut short)"""
+    for filepath in filepaths:
+        with open(filepath) as telemetry_file:
+            for line in telemetry_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def percentile(values, percent):
+    """Linearly interpolated percentile of a sorted list"""
+    if not values:
+        return None
+    position = (len(values) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(values):
+    values = sorted(values)
+    summary = {'count': len(values)}
+    for percent in PERCENTILES:
+        summary['p{0}'.format(percent)] = percentile(values, percent)
+    summary['max'] = values[-1] if values else None
+    return summary
+
+
+def aggregate(events):
+    """Returns {'tool_opens', 'users', 'conversions': {conversion: stats}} where the stats of a
+    conversion hold its plot and failure counts and the percentiles of its seconds, frames and
+    phase durations"""
+    report = {'tool_opens': 0, 'users': set(), 'conversions': {}}
+    samples = {}
+    for event in events:
+        report['users'].add(event.get('user'))
+        if event.get('event') == TOOL_OPEN:
+            report['tool_opens'] += 1
+            continue
+        if event.get('event') != PLOT:
+            continue
+        conversion = samples.setdefault(event.get('conversion') or 'unknown',
+                                        {'plots': 0, 'failures': 0, 'seconds': [], 'frames': [], 'phases': {}})
+        conversion['plots'] += 1
+        if event.get('error'):
+            conversion['failures'] += 1
+            continue
+        conversion['seconds'].append(event.get('seconds', 0.0))
+        conversion['frames'].append(event.get('frames', 0))
+        for phase, seconds in (event.get('phases') or {}).items():
+            conversion['phases'].setdefault(phase, []).append(seconds)
+
+    for name, conversion in samples.items():
+        report['conversions'][name] = {'plots': conversion['plots'],
+                                       'failures': conversion['failures'],
+                                       'seconds': summarize(conversion['seconds']),
+                                       'frames': summarize(conversion['frames']),
+                                       'phases': dict((phase, summarize(seconds))
+                                                      for phase, seconds in conversion['phases'].items())}
+    report['users'] = sorted(user for user in report['users'] if user)
+    return report
+
+
+def format_report(report):
+    def format_summary(summary, unit='s'):
+        if not summary['count']:
+            return 'no data'
+        return '  '.join('p{0} {1:.3f}{2}'.format(percent, summary['p{0}'.format(percent)], unit)
+                         for percent in PERCENTILES) + '  max {0:.3f}{1}'.format(summary['max'], unit)
+
+    lines = ['{0} tool opens, {1} users'.format(report['tool_opens'], len(report['users']))]
+    for name, conversion in sorted(report['conversions'].items()):
+        lines.append('{0}: {1} plots, {2} failed'.format(name, conversion['plots'], conversion['failures']))
+        lines.append('    seconds  {0}'.format(format_summary(conversion['seconds'])))
+        lines.append('    frames   {0}'.format(format_summary(conversion['frames'], '')))
+        for phase, summary in sorted(conversion['phases'].items()):
+            lines.append('    {0:<8} {1}'.format(phase, format_summary(summary)))
+    return lines
+
+
+def main(arguments):
+    as_json = '--json' in arguments
+    paths = [argument for argument in arguments if argument != '--json']
+    if not paths:
+        print(__doc__)
+        return 1
+    report = aggregate(read_events(find_telemetry_files(paths)))
+    if as_json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print('\n'.join(format_report(report)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
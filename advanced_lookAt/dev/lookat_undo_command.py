@@ -0,0 +1,65 @@
+"""
+lookatApiUndo: puts anim curve edits made through the API on maya's undo queue.
+
+MFnAnimCurve edits are not undoable on their own. lookat_utilities.AnimCurveEdit records them in an
+MAnimCurveChange (and the curves it creates in an MDGModifier), registers the edit under a token and
+runs this command with the token once they are done; the command only takes the edit to undo and redo
+it. The registry is shared through sys.modules (see lookat_utilities.get_edit_registry), this plugin
+doesn't import lookat_utilities. lookat_utilities loads the plugin on first use, the command isn't
+meant to be called by hand.
+"""
+import sys
+import types
+
+from maya import OpenMayaMPx
+
+COMMAND_NAME = 'lookatApiUndo'
+# lookat_utilities.UNDO_REGISTRY
+REGISTRY_NAME = 'lookat_api_undo_registry'
+
+
+def get_edit_registry():
+    """Returns the {token: edit} dict shared with lookat_utilities"""
+    registry = sys.modules.get(REGISTRY_NAME)
+    if registry is None:
+        registry = types.ModuleType(REGISTRY_NAME)
+        registry.edits = {}
+        sys.modules[REGISTRY_NAME] = registry
+    return registry.edits
+
+
+class ApiUndoCommand(OpenMayaMPx.MPxCommand):
+
+    def __init__(self):
+        super(ApiUndoCommand, self).__init__()
+        self.edit = None
+
+    def doIt(self, args):
+        # The edit is already applied, it only needs to be kept for undo / redo.
+        token = args.asString(0) if args.length() else None
+        self.edit = get_edit_registry().pop(token, None)
+        if self.edit is None:
+            raise RuntimeError("{0}: no anim curve edit registered as {1}".format(COMMAND_NAME, token))
+
+    def undoIt(self):
+        if self.edit is not None:
+            self.edit.undo()
+
+    def redoIt(self):
+        if self.edit is not None:
+            self.edit.redo()
+
+    def isUndoable(self):
+        return self.edit is not None
+
+
+def creator():
+    return OpenMayaMPx.asMPxPtr(ApiUndoCommand())
+
+
+def initializePlugin(plugin):
+    OpenMayaMPx.MFnPlugin(plugin, 'advanced_lookAt', '1.0').registerCommand(COMMAND_NAME, creator)
+
+
+def uninitializePlugin(plugin):
+    OpenMayaMPx.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
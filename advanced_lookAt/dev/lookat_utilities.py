@@ -1,19 +1,57 @@
 # Python Imports
+import fnmatch
+import importlib
 import logging
-import math
 import os
+import sys
+import threading
+import time
+import types
+import uuid
 
 # Maya Imports
 from maya import cmds
 from maya import mel
 from maya import OpenMaya
 from maya import OpenMayaAnim
+from maya import utils
 
 from functools import wraps
 
+
+class LazyModule(object):
+    """Stands in for a module until one of its attributes is used, then imports it. Keeps heavy
+    imports (numpy and the modules built on it) off the tools' startup path.
+
+    numpy = LazyModule('numpy')
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def __repr__(self):
+        return '<LazyModule {0}{1}>'.format(self._name, '' if self._module is None else ' (imported)')
+
+
+numpy = LazyModule('numpy')
+lookat_math = LazyModule('lookat_math')
+path_remap = LazyModule('path_remap')
+
 # from artworks import cadet_util
 
-# log = logging.getLogger("facerig_maya module")
+log = logging.getLogger("facerig_maya module")
+
+# The plugin putting AnimCurveEdits on the undo queue, next to this module.
+UNDO_PLUGIN = 'lookat_undo_command.py'
+UNDO_COMMAND = 'lookatApiUndo'
+# Name of the {token: edit} registry the plugin takes the edits from, see get_edit_registry.
+UNDO_REGISTRY = 'lookat_api_undo_registry'
 # __PACKAGE__ = 'Facerig.Animation.Utilities'
 # __CADET__ = cadet_util.Cadet()
 # __CADET_PKG__ = __CADET__.GetPackage(__PACKAGE__, chdirToDestination=False)
@@ -53,17 +91,60 @@ __FRAMERATES__ = {'game': 15,
 #     return dct
 
 
-def get_scene_references():
-    referenes = {}
-    for ref in cmds.ls(type='reference'):
-        if ref == "sharedReferenceNode":
-            # filter "sharedReferenceNode" one out.
+def get_reference_index():
+    """Returns {reference node: {'namespace', 'filename', 'unresolved_filename', 'loaded'}} for every
+    reference in the scene, gathered in a single pass over the reference nodes."""
+    index = {}
+    iterator = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kReference)
+    while not iterator.isDone():
+        reference_fn = OpenMaya.MFnReference(iterator.thisNode())
+        node = reference_fn.name()
+        iterator.next()
+        # filter "sharedReferenceNode" one out.
+        if node == "sharedReferenceNode":
+            continue
+        try:
+            index[node] = {'namespace': reference_fn.associatedNamespace(False),
+                           'filename': reference_fn.fileName(True, True, True),
+                           'unresolved_filename': reference_fn.fileName(False, True, False),
+                           'loaded': reference_fn.isLoaded()}
+        except RuntimeError:
+            # Reference nodes that aren't associated with a file.
             continue
+    return index
 
-        referenes[ref[:-2]] = cmds.referenceQuery(ref, filename=True)
+
+def get_scene_references():
+    """Returns {reference name: filename}, the reference name being the node name without its
+    "RN" suffix."""
+    referenes = {}
+    for ref, data in get_reference_index().items():
+        name = ref[:-2] if ref.endswith('RN') else ref
+        referenes[name] = data['filename']
     return referenes
 
 
+def get_client_remap_table(client_root, filepaths):
+    """Returns a PathRemapTable that maps the drive of each file path onto the client root, for
+    every drive that differs from the client root drive."""
+    client_root_drive = os.path.splitdrive(client_root)[0].lower()
+    remap_table = path_remap.PathRemapTable()
+    for drive in set(os.path.splitdrive(filepath)[0] for filepath in filepaths):
+        if drive.lower() != client_root_drive:
+            remap_table.add_rule(drive, client_root)
+    return remap_table
+
+
+def get_real_paths(client_root, filepaths):
+    """Batch version of get_real_path. client_root is either a client root path or a
+    path_remap.PathRemapTable with one rule per client root.
+    Returns {filepath: remapped path or an empty string if it doesn't exist}"""
+    remap_table = client_root
+    if not isinstance(client_root, path_remap.PathRemapTable):
+        remap_table = get_client_remap_table(client_root, filepaths)
+    return path_remap.resolve_paths(filepaths, remap_table)
+
+
 def get_real_path(client_root, filepath):
     """Returns string path for files from that are mapped to other drives.
        remaps drive by replacing the drive letter with perforce root directory.
@@ -75,16 +156,7 @@ def get_real_path(client_root, filepath):
         returns an empty string if file doesn't exist
         @return string
     """
-    filepath_split = os.path.splitdrive(filepath)
-
-    client_root_drive = os.path.splitdrive(client_root)[0].lower()
-    filepath_drive = filepath_split[0].lower()
-    if client_root_drive != filepath_drive:
-        real_path = '{0}{1}'.format(client_root, filepath_split[1])
-
-        if os.path.exists(real_path):
-            return real_path
-    return ''
+    return get_real_paths(client_root, [filepath])[filepath]
 
 
 def get_viewport_panels():
@@ -121,18 +193,265 @@ def get_dag_path(node):
     return dag_path
 
 
+def get_plug(attribute):
+    """Returns the MPlug of the given "node.attribute" string"""
+    selection_list = OpenMaya.MSelectionList()
+    selection_list.add(attribute)
+    plug = OpenMaya.MPlug()
+    selection_list.getPlug(0, plug)
+    return plug
+
+
+class AnimCurveEdit(object):
+    """Records anim curve edits made through the API and puts them on maya's undo queue, as one
+    lookatApiUndo command, when the with block ends. Pass edit.change to the MFnAnimCurve calls and
+    the edit to get_anim_curve_fn, which creates missing curves with edit.modifier.
+
+    with AnimCurveEdit() as edit:
+        curve_fn = get_anim_curve_fn(attribute, edit)
+        curve_fn.addKeys(times, values, tangent_type, tangent_type, True, edit.change)
+
+    Other DG edits (disconnecting drivers...) can go on edit.modifier, call its doIt. roll_back
+    reverts everything and keeps the edit off the undo queue.
+    """
+
+    def __init__(self):
+        self.change = OpenMayaAnim.MAnimCurveChange()
+        self.modifier = OpenMaya.MDGModifier()
+        self.rolled_back = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Also after a failure, so what was written can still be undone.
+        if not self.rolled_back:
+            commit_api_edit(self)
+
+    def roll_back(self):
+        """Reverts what the edit did, it won't be put on the undo queue"""
+        self.undo()
+        self.rolled_back = True
+
+    def undo(self):
+        self.change.undoIt()
+        self.modifier.undoIt()
+
+    def redo(self):
+        self.modifier.doIt()
+        self.change.redoIt()
+
+
+def get_edit_registry():
+    """Returns the {token: edit} dict shared with the lookatApiUndo plugin. It lives in sys.modules,
+    not in this module, so reloads and other import paths of either side find the same one."""
+    registry = sys.modules.get(UNDO_REGISTRY)
+    if registry is None:
+        registry = types.ModuleType(UNDO_REGISTRY)
+        registry.edits = {}
+        sys.modules[UNDO_REGISTRY] = registry
+    return registry.edits
+
+
+def commit_api_edit(edit):
+    """Puts an AnimCurveEdit on the undo queue, loading the lookatApiUndo plugin if needed. The
+    command gets the edit's token as its argument and takes the edit out of the registry."""
+    if not cmds.pluginInfo(os.path.splitext(UNDO_PLUGIN)[0], query=True, loaded=True):
+        cmds.loadPlugin(os.path.join(os.path.dirname(os.path.abspath(__file__)), UNDO_PLUGIN), quiet=True)
+    edits = get_edit_registry()
+    token = uuid.uuid4().hex
+    edits[token] = edit
+    try:
+        getattr(cmds, UNDO_COMMAND)(token)
+    finally:
+        # Don't leave the edit behind if the command couldn't run.
+        edits.pop(token, None)
+
+
+def get_anim_curve_fn(attribute, edit=None, curve_type=None):
+    """Returns a MFnAnimCurve for the curve driving the given attribute, creating the curve if the
+    attribute isn't animated yet (undoably when given an AnimCurveEdit). curve_type, an
+    MFnAnimCurve.kAnimCurve* constant, is the type of a created curve, the attribute's default
+    otherwise."""
+    plug = get_plug(attribute)
+    curves = OpenMaya.MObjectArray()
+    if OpenMayaAnim.MAnimUtil.findAnimation(plug, curves) and curves.length():
+        return OpenMayaAnim.MFnAnimCurve(curves[0])
+
+    curve_fn = OpenMayaAnim.MFnAnimCurve()
+    if edit is None:
+        if curve_type is None:
+            curve_fn.create(plug)
+        else:
+            curve_fn.create(plug, curve_type)
+    else:
+        # create only queues the node and its connection on the modifier.
+        if curve_type is None:
+            curve_fn.create(plug, edit.modifier)
+        else:
+            curve_fn.create(plug, curve_type, edit.modifier)
+        edit.modifier.doIt()
+    return curve_fn
+
+
+def get_key_arrays(times, values, to_internal=float, time_scale=1.0):
+    """Returns the (MTimeArray, MDoubleArray) addKeys takes, from times in the current time unit
+    (scaled by time_scale) and values in ui units. The values are converted with numpy and copied in
+    one MScriptUtil call; API 1.0 has no bulk MTimeArray constructor, the times are set into a
+    preallocated array."""
+    values = numpy.asarray(values, dtype=numpy.float64) * to_internal(1.0)
+    util = OpenMaya.MScriptUtil()
+    util.createFromList(values.tolist(), len(values))
+    value_array = OpenMaya.MDoubleArray(util.asDoublePtr(), len(values))
+
+    time_unit = OpenMaya.MTime.uiUnit()
+    key_times = (numpy.asarray(times, dtype=numpy.float64) * time_scale).tolist()
+    time_array = OpenMaya.MTimeArray(len(key_times), OpenMaya.MTime())
+    for index, key_time in enumerate(key_times):
+        time_array.set(OpenMaya.MTime(key_time, time_unit), index)
+    return time_array, value_array
+
+
+def remove_keys(attribute, curve_fn, start, end, edit):
+    """Removes the keys of the attribute's curve between start and end (current time unit, None for
+    all of them) with the curve's MFnAnimCurve, recorded in the AnimCurveEdit"""
+    if start is None:
+        indices = range(curve_fn.numKeys())
+    else:
+        indices = cmds.keyframe(attribute, query=True, time=(start, end), indexValue=True) or []
+    # Last first, removing a key shifts the indices after it.
+    for index in sorted(indices, reverse=True):
+        curve_fn.remove(int(index), edit.change)
+
+
+def get_ui_to_internal(curve_fn):
+    """Returns the function converting ui values to the internal units of an anim curve's values"""
+    curve_type = curve_fn.animCurveType()
+    if curve_type in (OpenMayaAnim.MFnAnimCurve.kAnimCurveTA, OpenMayaAnim.MFnAnimCurve.kAnimCurveUA):
+        return OpenMaya.MAngle.uiToInternal
+    if curve_type in (OpenMayaAnim.MFnAnimCurve.kAnimCurveTL, OpenMayaAnim.MFnAnimCurve.kAnimCurveUL):
+        return OpenMaya.MDistance.uiToInternal
+    return float
+
+
+def set_anim_curve_keys(attribute, times, values, tangent_type=OpenMayaAnim.MFnAnimCurve.kTangentAuto, edit=None):
+    """Writes all the given keys to the attribute's anim curve in a single API call, undoably: the
+    write is recorded in edit, or in an AnimCurveEdit of its own when edit is None.
+    times are in the current time unit and values in ui units; keys between the first and last
+    time are replaced."""
+    if not len(times):
+        return
+    if len(times) != len(values):
+        raise ValueError("{0}: got {1} times for {2} values".format(attribute, len(times), len(values)))
+    if edit is None:
+        with AnimCurveEdit() as edit:
+            set_anim_curve_keys(attribute, times, values, tangent_type, edit)
+        return
+
+    curve_fn = get_anim_curve_fn(attribute, edit)
+    # Clear the span first, addKeys can only merge into or wipe the whole curve.
+    remove_keys(attribute, curve_fn, float(min(times)), float(max(times)), edit)
+    time_array, value_array = get_key_arrays(times, values, get_ui_to_internal(curve_fn))
+    curve_fn.addKeys(time_array, value_array, tangent_type, tangent_type, True, edit.change)
+
+
+def set_translation_keys(node, times, translations):
+    """Keys translate x, y and z of a node from a (len(times), 3) array, one API call per curve and
+    one undo step for the three"""
+    with AnimCurveEdit() as edit:
+        for index, attribute in enumerate(['tx', 'ty', 'tz']):
+            set_anim_curve_keys('{0}.{1}'.format(node, attribute), times, translations[:, index], edit=edit)
+
+
 def get_selected_xform_nodes():
     """Get selected transform nodes"""
     return cmds.ls(selection=True, type="transform", long=True) or []
 
 
+def get_matrix_plug(node, attribute='worldMatrix'):
+    """Returns the element plug of a per-instance matrix attribute (worldMatrix, parentMatrix,
+    parentInverseMatrix, ...) of the given dag node"""
+    dag_path = get_dag_path(node)
+    matrix_plug = OpenMaya.MFnDagNode(dag_path).findPlug(attribute, False)
+    return matrix_plug.elementByLogicalIndex(dag_path.instanceNumber())
+
+
+# (row, column) of the elements of a 4x4 matrix, row major.
+MATRIX_ELEMENTS = [(row, column) for row in range(4) for column in range(4)]
+
+
+def get_time_contexts(times=None):
+    """Returns a MDGContext per time, or the normal context for the current time if times is None"""
+    if times is None:
+        return [OpenMaya.MDGContext.fsNormal]
+    time_unit = OpenMaya.MTime.uiUnit()
+    return [OpenMaya.MDGContext(OpenMaya.MTime(float(key_time), time_unit)) for key_time in times]
+
+
+def sample_matrices(nodes, times=None, attribute='worldMatrix'):
+    """Evaluates a matrix attribute of every node at every time without changing the current time.
+    Returns a numpy array with shape (len(nodes), len(times), 4, 4); times defaults to the current
+    time only."""
+    plugs = [get_matrix_plug(node, attribute) for node in nodes]
+    contexts = get_time_contexts(times)
+
+    # Time is the outer loop so the graph is evaluated once per time for all nodes. The elements are
+    # gathered in one flat list and converted to an array in one go.
+    elements = [matrix(row, column)
+                for matrix in (OpenMaya.MFnMatrixData(plug.asMObject(context)).matrix()
+                               for context in contexts for plug in plugs)
+                for row, column in MATRIX_ELEMENTS]
+    matrices = numpy.array(elements, dtype=numpy.float64).reshape(len(contexts), len(plugs), 4, 4)
+    return matrices.swapaxes(0, 1)
+
+
+def sample_world_matrices(nodes, times=None):
+    """Evaluates the world matrix of every node at every time, see sample_matrices"""
+    return sample_matrices(nodes, times, 'worldMatrix')
+
+
+def sample_attributes(attributes, times=None):
+    """Evaluates numeric "node.attribute" plugs at every time without changing the current time.
+    Returns a (len(attributes), len(times)) numpy array in ui units."""
+    plugs = [get_plug(attribute) for attribute in attributes]
+    contexts = get_time_contexts(times)
+
+    to_ui = []
+    for plug in plugs:
+        attribute = plug.attribute()
+        plug_to_ui = float
+        if attribute.hasFn(OpenMaya.MFn.kUnitAttribute):
+            unit_type = OpenMaya.MFnUnitAttribute(attribute).unitType()
+            if unit_type == OpenMaya.MFnUnitAttribute.kAngle:
+                plug_to_ui = OpenMaya.MAngle.internalToUI
+            elif unit_type == OpenMaya.MFnUnitAttribute.kDistance:
+                plug_to_ui = OpenMaya.MDistance.internalToUI
+        to_ui.append(plug_to_ui)
+
+    values = numpy.empty((len(plugs), len(contexts)))
+    for time_index, context in enumerate(contexts):
+        for plug_index, plug in enumerate(plugs):
+            values[plug_index, time_index] = to_ui[plug_index](plug.asDouble(context))
+    return values
+
+
+def world_positions_to_local(nodes, world_positions, times=None):
+    """Returns the translate values that put each node at the given world positions.
+    world_positions has shape (len(nodes), len(times), 3); the nodes' parent matrices are sampled
+    at every time."""
+    parent_matrices = sample_matrices(nodes, times, 'parentMatrix')
+    return lookat_math.inverse_transform_points(world_positions, parent_matrices)
+
+
+def local_vectors_to_worldspace(nodes, times=None, vec=(0, 1, 0)):
+    """Returns the nodes' given local vector in world space as a (nodes, times, 3) numpy array"""
+    return lookat_math.world_axes(sample_world_matrices(nodes, times), vec)
+
+
 def local_vector_to_worldspace(node, vec=OpenMaya.MVector(0, 1, 0)):
     """returns the objects given local vector in world space"""
-    node_dag_path = get_dag_path(node)
-    matrix = node_dag_path.inclusiveMatrix()
-
-    vec = (vec * matrix).normal()
-    return vec
+    world_vector = local_vectors_to_worldspace([node], vec=(vec.x, vec.y, vec.z))[0, 0]
+    return OpenMaya.MVector(*world_vector)
 
 
 def snap_objects(driver, driven, bake=False, translate=True, rotate=True):
@@ -332,6 +651,16 @@ def get_timeline_range():
     return _min, _max
 
 
+def get_highlighted_range():
+    """Returns the (start, end) frames highlighted on maya's time slider, or None"""
+    time_slider = mel.eval('$tmpVar = $gPlayBackSlider')
+    if not cmds.timeControl(time_slider, query=True, rangeVisible=True):
+        return None
+    start, end = cmds.timeControl(time_slider, query=True, rangeArray=True)
+    # The range array ends one frame after the highlight.
+    return int(start), int(end) - 1
+
+
 def get_current_frame():
     '''Returns integer values of start a and end of maya's timeline'''
     _current = int(OpenMayaAnim.MAnimControl.currentTime().value())
@@ -364,32 +693,37 @@ def disable_viewport(func):
 
 
 # ----Other Functions-------------------------------------------------------------------------------
+def get_aim_positions(nodes, times=None, vec=(0, 1, 0), distance=40):
+    """calculate the worldspace positions of points at a given distance along the given objects
+    local axis. Returns a (nodes, times, 3) numpy array. distance can be a scalar or a per node
+    and/or per time array."""
+    return lookat_math.aim_positions(sample_world_matrices(nodes, times), vec, distance)
+
+
+def get_distances_between(nodes1, nodes2, times=None):
+    """Returns the distances between pairs of objects as a (pairs, times) numpy array"""
+    matrices = sample_world_matrices(list(nodes1) + list(nodes2), times)
+    return lookat_math.distances_between(matrices[:len(nodes1)], matrices[len(nodes1):])
+
+
 def get_aim_position(node, vec=OpenMaya.MVector(0, 1, 0), distance=40):
     """calculate the worldspace position of a point at a given distance along a given objects
     local axis"""
-    pos = cmds.xform(node, query=True, translation=True, worldSpace=True, absolute=True)
-    pos_vector = OpenMaya.MVector(*pos)
-    aim_vector = local_vector_to_worldspace(node, vec)
-
-    aim_pos_vector = pos_vector + (aim_vector * distance)
-    return aim_pos_vector
+    aim_position = get_aim_positions([node], vec=(vec.x, vec.y, vec.z), distance=distance)[0, 0]
+    return OpenMaya.MVector(*aim_position)
 
 
 def get_distance_between(node1, node2):
     '''Returns the distance between the two objects'''
-    node1_pnt = cmds.xform(node1, query=True, translation=True, worldSpace=True, absolute=True)
-    node2_pnt = cmds.xform(node2, query=True, translation=True, worldSpace=True, absolute=True)
-
-    # find the difference in each axis
-    dx = node1_pnt[0] - node2_pnt[0]
-    dy = node1_pnt[1] - node2_pnt[1]
-    dz = node1_pnt[2] - node2_pnt[2]
+    return float(get_distances_between([node1], [node2])[0, 0])
 
-    # calculate distance
-    dist = math.sqrt((dx * dx) + (dy * dy) + (dz * dz))
 
-    # return the calculated distance
-    return dist
+def insert_boundary_keys(curve_list, startframe, endframe):
+    """Inserts keys just outside of the frame range, so the curves keep their shape outside of the
+    range whatever is keyed inside of it."""
+    for curve in curve_list:
+        cmds.setKeyframe(curve, time=startframe - 1, insert=True)
+        cmds.setKeyframe(curve, time=endframe + 1, insert=True,)
 
 
 def flatten_anim_curve(curve_list, startframe, endframe):
@@ -397,9 +731,8 @@ def flatten_anim_curve(curve_list, startframe, endframe):
     (based on the current frame range)"""
 
     # Flattens animation curve at zero and deletes un-needed keys in the play range
+    insert_boundary_keys(curve_list, startframe, endframe)
     for curve in curve_list:
-        cmds.setKeyframe(curve, time=startframe - 1, insert=True)
-        cmds.setKeyframe(curve, time=endframe + 1, insert=True,)
         cmds.cutKey(curve, time=(startframe, endframe))
         cmds.setKeyframe(curve, time=startframe, value=0, outTangentType='linear')
         cmds.setKeyframe(curve, time=endframe, value=0, inTangentType='linear')
@@ -458,16 +791,161 @@ def get_facerig_characters():
     else:
         return get_namespaces()
 
-def get_facerig_controls(namespace, filter_tongue=True):
-    ingnore_ctls = [u'tongue_04_fk_ctl', u'tongue_03_fk_ctl',
-                   u'tongue_02_fk_ctl', u'tongue_01_fk_ctl']
-    controls = []
-    for ctl in cmds.ls('{0}:*_ctl'.format(namespace)):
-        if filter_tongue:
-            if ctl.split(':')[-1] in ingnore_ctls:
-                continue
-        controls.append(ctl)
-    return controls
+# The tongue fk controls get_facerig_controls leaves out by default.
+TONGUE_FK_CONTROLS = frozenset(['tongue_04_fk_ctl', 'tongue_03_fk_ctl', 'tongue_02_fk_ctl', 'tongue_01_fk_ctl'])
+
+# Face regions of the controls, by name pattern without namespace. The first matching region wins,
+# controls matching none are 'other'.
+# Checked in order, the first match wins: brows before eyes, '*eye*' matches the eyebrow controls too.
+CONTROL_REGIONS = [('brows', ['*brow*']),
+                   ('eyes', ['*lookat*', '*au_eyes*', '*eye*', '*lid*', '*pupil*', '*iris*']),
+                   ('tongue', ['*tongue*']),
+                   ('mouth', ['*lip*', '*mouth*', '*jaw*', '*teeth*', '*chin*']),
+                   ('nose', ['*nose*', '*nostril*', '*sneer*']),
+                   ('cheeks', ['*cheek*', '*puff*'])]
+OTHER_REGION = 'other'
+
+_control_registry = None
+
+
+def get_control_region(name):
+    """Returns the face region of a control name, see CONTROL_REGIONS"""
+    short_name = name.rsplit(':', 1)[-1].lower()
+    for region, patterns in CONTROL_REGIONS:
+        if any(fnmatch.fnmatchcase(short_name, pattern) for pattern in patterns):
+            return region
+    return OTHER_REGION
+
+
+class FacerigControls(object):
+    """The _ctl controls of one namespace, listed once: names, MObjectHandles and face regions.
+
+    The controls are resolved in one MSelectionList call and filtered with set lookups, so callers
+    can ask for them as often as they like, see ControlRegistry.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.names = []
+        self.handles = {}
+        self.regions = {}
+        self.tongue_fk = set()
+
+        selection_list = OpenMaya.MSelectionList()
+        try:
+            selection_list.add('{0}:*_ctl'.format(namespace.rstrip(':')))
+        except RuntimeError:
+            # Nothing matches.
+            return
+        strings = OpenMaya.MStringArray()
+        for index in range(selection_list.length()):
+            node = OpenMaya.MObject()
+            selection_list.getDependNode(index, node)
+            selection_list.getSelectionStrings(index, strings)
+            name = strings[0]
+            self.names.append(name)
+            self.handles[name] = OpenMaya.MObjectHandle(node)
+            self.regions.setdefault(get_control_region(name), set()).add(name)
+            if name.rsplit(':', 1)[-1] in TONGUE_FK_CONTROLS:
+                self.tongue_fk.add(name)
+
+    def is_valid(self):
+        """False once one of the controls was deleted"""
+        return all(handle.isValid() for handle in self.handles.values())
+
+    def get_names(self, filter_tongue=True, regions=None):
+        """Returns the control names in scene order, without the tongue fk controls when
+        filter_tongue, only the ones of the given regions when regions is given"""
+        excluded = self.tongue_fk if filter_tongue else set()
+        included = None
+        if regions is not None:
+            included = set()
+            for region in regions:
+                included |= self.regions.get(region, set())
+        return [name for name in self.names
+                if name not in excluded and (included is None or name in included)]
+
+
+class ControlRegistry(object):
+    """Caches the FacerigControls of every namespace asked for. A namespace's entry is dropped when
+    a node is added to it, one of its controls is removed or a control is renamed into or out of it
+    (namespace moves included), so the cached names never go stale. Callbacks only record that.
+    The callbacks are registered on the first get() and removed by stop(): before a scene is opened
+    or a new one is made, and when the tool closes. The next get() registers them again.
+
+    controls = get_control_registry().get('charA')
+    controls.get_names(regions=['eyes', 'brows'])
+    """
+
+    def __init__(self):
+        self.namespaces = {}
+
+    def get(self, namespace):
+        namespace = namespace.strip(':') or ':'
+        controls = self.namespaces.get(namespace)
+        if controls is None or not controls.is_valid():
+            controls = FacerigControls(namespace)
+            self.namespaces[namespace] = controls
+            self.start()
+        return controls
+
+    def start(self):
+        callbacks_pool = CallbacksPool.getInstance()
+        callbacks_pool.add_node_callback(self.node_added, owner=self)
+        callbacks_pool.add_node_callback(self.node_removed, removed=True, owner=self)
+        callbacks_pool.add_name_changed_callback(self.node_renamed, owner=self)
+        for message in [OpenMaya.MSceneMessage.kBeforeOpen, OpenMaya.MSceneMessage.kBeforeNew]:
+            callbacks_pool.add_scene_callback(self.scene_changed, message, owner=self)
+
+    def scene_changed(self, *args):
+        """Scene open / new callback: every namespace goes, so does every callback until the next get()"""
+        self.stop()
+
+    def stop(self):
+        CallbacksPool.getInstance().remove_callbacks(owner=self)
+        self.clear()
+
+    def clear(self):
+        self.namespaces.clear()
+
+    def node_added(self, node, *args):
+        """Node added callback: drops the cache of the node's namespace"""
+        if self.namespaces:
+            self.invalidate(OpenMaya.MFnDependencyNode(node).name())
+
+    def node_removed(self, node, *args):
+        """Node removed callback: drops the cache of the namespace of a removed control"""
+        if self.namespaces:
+            name = OpenMaya.MFnDependencyNode(node).name()
+            if name.endswith('_ctl'):
+                self.invalidate(name)
+
+    def node_renamed(self, node, previous_name, *args):
+        """Name changed callback: drops the caches of the namespaces a control left and joined"""
+        if self.namespaces:
+            name = OpenMaya.MFnDependencyNode(node).name()
+            if name.endswith('_ctl') or previous_name.endswith('_ctl'):
+                self.invalidate(previous_name)
+                self.invalidate(name)
+
+    def invalidate(self, name):
+        namespace = name.rpartition(':')[0].strip(':') or ':'
+        self.namespaces.pop(namespace, None)
+
+
+def get_control_registry():
+    """Returns the session's ControlRegistry"""
+    global _control_registry
+    if _control_registry is None:
+        _control_registry = ControlRegistry()
+    return _control_registry
+
+
+def get_facerig_controls(namespace, filter_tongue=True, regions=None):
+    """Returns the _ctl controls of a namespace, without the tongue fk controls when filter_tongue,
+    only the ones of the given regions (see CONTROL_REGIONS) when regions is given. Listed once per
+    namespace, see ControlRegistry."""
+    return get_control_registry().get(namespace).get_names(filter_tongue, regions)
 
 def get_current_selected_namespace():
     selection = cmds.ls(selection=True)
@@ -527,15 +1005,154 @@ class UndoContext(object):
         cmds.undoInfo(closeChunk=True)
 
 
+class PooledCallback(object):
+    """Wraps a python callback registered through the CallbacksPool. Keeps invocation counts and a
+    latency histogram, and optionally throttles or coalesces high frequency events.
+
+    throttle: minimum number of seconds between two invocations. Events in between are dropped,
+              but the last one of a burst is invoked once the interval is over.
+    coalesce: events are deferred until maya is idle and collapsed into a single invocation that
+              receives the arguments of the latest event.
+    """
+
+    # Upper bounds of the latency histogram buckets, in milliseconds.
+    histogram_buckets = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, float('inf'))
+
+    def __init__(self, method, name, owner=None, throttle=0.0, coalesce=False):
+        self.method = method
+        self.name = name
+        self.owner = owner
+        self.throttle = throttle
+        self.coalesce = coalesce
+
+        self._last_call = 0.0
+        self._pending_args = None
+        self._trailing_args = None
+        self._trailing_scheduled = False
+        # Set when the pool removes the callback: deferred calls still queued then do nothing.
+        self.removed = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clears the invocation statistics"""
+        self.calls = 0
+        self.events = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * len(self.histogram_buckets)
+
+    def __call__(self, *args):
+        self.events += 1
+        if self.throttle:
+            remaining = self.throttle - (time.time() - self._last_call)
+            if remaining > 0:
+                self.schedule_trailing(args, remaining)
+                return
+            # A newer event than the one waiting for the end of the interval.
+            self._trailing_args = None
+        self.dispatch(*args)
+
+    def dispatch(self, *args):
+        if not self.coalesce:
+            self.invoke(*args)
+            return
+
+        # Only the first event of a burst schedules a call, later ones just replace the arguments.
+        schedule = self._pending_args is None
+        self._pending_args = args
+        if schedule:
+            utils.executeDeferred(self._flush)
+
+    def _flush(self):
+        args = self._pending_args
+        self._pending_args = None
+        if args is not None and not self.removed:
+            self.invoke(*args)
+
+    def schedule_trailing(self, args, delay):
+        """Keeps the latest throttled event and invokes it once the throttle interval is over"""
+        self._trailing_args = args
+        if self._trailing_scheduled:
+            return
+        self._trailing_scheduled = True
+        timer = threading.Timer(delay, utils.executeDeferred, [self._flush_trailing])
+        timer.daemon = True
+        timer.start()
+
+    def _flush_trailing(self):
+        self._trailing_scheduled = False
+        args = self._trailing_args
+        self._trailing_args = None
+        if args is None or self.removed:
+            return
+        remaining = self.throttle - (time.time() - self._last_call)
+        if remaining > 0:
+            # Something was invoked in the meantime, wait for its interval to end.
+            self.schedule_trailing(args, remaining)
+            return
+        self.dispatch(*args)
+
+    def invoke(self, *args):
+        """Calls the wrapped method and records how long it took"""
+        start = time.time()
+        self._last_call = start
+        try:
+            return self.method(*args)
+        finally:
+            elapsed = time.time() - start
+            self.calls += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+            elapsed_ms = elapsed * 1000.0
+            for index, bucket in enumerate(self.histogram_buckets):
+                if elapsed_ms <= bucket:
+                    self.histogram[index] += 1
+                    break
+
+    def get_label(self):
+        """Returns a readable name for the wrapped method"""
+        method_name = getattr(self.method, '__name__', repr(self.method))
+        method_owner = getattr(self.method, '__self__', None) or getattr(self.method, 'im_self', None)
+        if method_owner is not None:
+            method_name = '{0}.{1}'.format(type(method_owner).__name__, method_name)
+        return '{0} ({1})'.format(method_name, self.name)
+
+    def get_stats(self):
+        """Returns the invocation statistics as a dictionary"""
+        return {'label': self.get_label(),
+                'event': self.name,
+                'events': self.events,
+                'calls': self.calls,
+                'skipped': self.events - self.calls,
+                'total_ms': self.total_time * 1000.0,
+                'mean_ms': self.total_time * 1000.0 / self.calls if self.calls else 0.0,
+                'max_ms': self.max_time * 1000.0,
+                'histogram': zip(self.histogram_buckets, self.histogram)}
+
+
 class CallbacksPool:
     """Creates a singleton class to keep track of maya callbacks and be
-    able to remove callback with one call.
+    able to remove callbacks with one call, or all callbacks of an owner.
 
     # To add callbacks to a maya scene:
-    CallbacksPool.getInstance().add(self.some_function, "timeChanged")
+    CallbacksPool.getInstance().add(self.some_function, "timeChanged", owner=self)
+
+    # To collapse a burst of events (e.g. scrubbing) into one call once maya is idle:
+    CallbacksPool.getInstance().add(self.some_function, "timeChanged", owner=self, coalesce=True)
+
+    # Scene and node messages:
+    CallbacksPool.getInstance().add_scene_callback(self.some_function, OpenMaya.MSceneMessage.kAfterOpen, owner=self)
+    CallbacksPool.getInstance().add_node_callback(self.some_function, removed=True, owner=self)
+    CallbacksPool.getInstance().add_name_changed_callback(self.some_function, owner=self)
+
+    # To remove the callbacks of an owner:
+    CallbacksPool.getInstance().remove_callbacks(owner=self)
 
     # To remove all callbacks from a maya scene:
     CallbacksPool.getInstance().remove_callbacks()
+
+    # To log the callbacks that cost the most time:
+    CallbacksPool.getInstance().log_stats()
     """
 
     __instance = None
@@ -555,21 +1172,103 @@ class CallbacksPool:
             self.callback_pool = {}
             CallbacksPool.__instance = self
 
-    def add(self, method, name="timeChanged"):
-        '''Creates a callback and adds to the callback  pool dictionary'''
-        idx = OpenMaya.MEventMessage.addEventCallback(name, method)
-        self.callback_pool[idx] = method
-
-    def get(self):
-        """Returns the callbacks pool dictionary """
-        return self.callback_pool
-
-    def remove_callbacks(self):
-        """Removes all callbacks in the singleton class."""
-        log.info('Removing callbacks from scene. {}'.format(len(self.callback_pool.keys())))
-        for idx in self.callback_pool.keys():
-            OpenMaya.MEventMessage.removeCallback(idx)
-        self.callback_pool.clear()
+    def find(self, method, name="timeChanged", owner=None):
+        """Returns the id of an already registered callback or None"""
+        for idx, callback in self.callback_pool.items():
+            if callback.method == method and callback.name == name and callback.owner is owner:
+                return idx
+        return None
+
+    def add(self, method, name="timeChanged", owner=None, throttle=0.0, coalesce=False):
+        '''Creates a callback and adds to the callback pool dictionary. Adding the same method for
+        the same event and owner twice returns the existing callback id.'''
+        idx = self.find(method, name, owner)
+        if idx is not None:
+            return idx
+
+        callback = PooledCallback(method, name, owner=owner, throttle=throttle, coalesce=coalesce)
+        idx = OpenMaya.MEventMessage.addEventCallback(name, callback)
+        self.callback_pool[idx] = callback
+        return idx
+
+    def add_scene_callback(self, method, message, owner=None, throttle=0.0, coalesce=False):
+        """Adds a callback for an OpenMaya.MSceneMessage message, e.g. MSceneMessage.kAfterOpen"""
+        name = 'scene_message_{0}'.format(message)
+        idx = self.find(method, name, owner)
+        if idx is not None:
+            return idx
+
+        callback = PooledCallback(method, name, owner=owner, throttle=throttle, coalesce=coalesce)
+        idx = OpenMaya.MSceneMessage.addCallback(message, callback)
+        self.callback_pool[idx] = callback
+        return idx
+
+    def add_node_callback(self, method, removed=False, node_type="dependNode", owner=None):
+        """Adds a callback called with the MObject of every node of node_type added to (or removed
+        from) the scene. These fire once per node, so method should only record what changed."""
+        name = '{0}_{1}'.format('node_removed' if removed else 'node_added', node_type)
+        idx = self.find(method, name, owner)
+        if idx is not None:
+            return idx
+
+        callback = PooledCallback(method, name, owner=owner)
+        if removed:
+            idx = OpenMaya.MDGMessage.addNodeRemovedCallback(callback, node_type)
+        else:
+            idx = OpenMaya.MDGMessage.addNodeAddedCallback(callback, node_type)
+        self.callback_pool[idx] = callback
+        return idx
+
+    def add_name_changed_callback(self, method, owner=None):
+        """Adds a callback called with (MObject, previous name) whenever a node is renamed, moving
+        it to another namespace included. Fires once per node, like add_node_callback."""
+        name = 'name_changed'
+        idx = self.find(method, name, owner)
+        if idx is not None:
+            return idx
+
+        callback = PooledCallback(method, name, owner=owner)
+        idx = OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject(), callback)
+        self.callback_pool[idx] = callback
+        return idx
+
+    def get(self, owner=None):
+        """Returns the callbacks pool dictionary, optionally only the callbacks of an owner"""
+        if owner is None:
+            return self.callback_pool
+        return dict((idx, callback) for idx, callback in self.callback_pool.items() if callback.owner is owner)
+
+    def remove(self, idx):
+        """Removes a single callback"""
+        callback = self.callback_pool.pop(idx, None)
+        if callback is not None:
+            callback.removed = True
+            OpenMaya.MMessage.removeCallback(idx)
+
+    def remove_callbacks(self, owner=None):
+        """Removes all callbacks in the singleton class, or only the ones registered by owner."""
+        callback_ids = self.get(owner).keys()
+        log.info('Removing callbacks from scene. {}'.format(len(callback_ids)))
+        for idx in callback_ids:
+            self.remove(idx)
+
+    def get_stats(self, owner=None):
+        """Returns the statistics of every callback, most expensive first"""
+        stats = [callback.get_stats() for callback in self.get(owner).values()]
+        return sorted(stats, key=lambda stat: stat['total_ms'], reverse=True)
+
+    def reset_stats(self):
+        """Clears the statistics of every callback"""
+        for callback in self.callback_pool.values():
+            callback.reset_stats()
+
+    def log_stats(self, owner=None):
+        """Logs the statistics of every callback, most expensive first"""
+        for stat in self.get_stats(owner):
+            log.info('{label}: {calls}/{events} calls, {total_ms:.2f} ms total, '
+                     '{mean_ms:.3f} ms mean, {max_ms:.3f} ms max'.format(**stat))
+            log.info('    ' + '  '.join('<={0}ms: {1}'.format(bucket, count)
+                                        for bucket, count in stat['histogram'] if count))
 
 
 def set_maya_prefs(*args, **kwargs):
@@ -0,0 +1,157 @@
+"""
+Node level dependency graph of a parsed Maya ASCII file (see ma_parser), without maya.
+
+Edges go from the node that drives to the node that is driven: one per connectAttr, and one from
+each DAG parent to its children (a parent's matrix drives its children's world matrices). Message
+links and the connections of the scene bookkeeping nodes (editor layouts, managers) carry no data,
+they aren't edges.
+"""
+
+
+class DependencyGraph(object):
+
+    def __init__(self, nodes, edges):
+        """nodes: iterable of hashable nodes, edges: iterable of (source, destination) pairs"""
+        self.nodes = list(nodes)
+        self.downstream = dict((node, set()) for node in self.nodes)
+        self.upstream = dict((node, set()) for node in self.nodes)
+        for source, destination in edges:
+            if source is destination or source not in self.downstream or destination not in self.downstream:
+                continue
+            self.downstream[source].add(destination)
+            self.upstream[destination].add(source)
+
+    @classmethod
+    def from_scene(cls, scene, dag_edges=True):
+        edges = scene.get_node_connections(dependencies_only=True)
+        if dag_edges:
+            edges.extend((node.parent, node) for node in scene.nodes if node.parent is not None)
+        return cls(scene.nodes, edges)
+
+    def subgraph(self, nodes):
+        nodes = set(nodes)
+        edges = [(source, destination) for source in nodes for destination in self.downstream[source]
+                 if destination in nodes]
+        return DependencyGraph([node for node in self.nodes if node in nodes], edges)
+
+    def get_upstream_closure(self, roots):
+        """Returns the roots and every node they depend on"""
+        closure = set()
+        stack = [root for root in roots if root in self.upstream]
+        while stack:
+            node = stack.pop()
+            if node in closure:
+                continue
+            closure.add(node)
+            stack.extend(self.upstream[node] - closure)
+        return closure
+
+    def get_cycles(self):
+        """Returns the strongly connected components with more than one node (Tarjan, iterative)"""
+        return [component for component in self.get_components() if len(component) > 1]
+
+    def get_components(self):
+        """Returns the strongly connected components, each one after the components it depends on"""
+        index_of = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+
+        for start in self.nodes:
+            if start in index_of:
+                continue
+            work = [(start, iter(self.downstream[start]))]
+            index_of[start] = lowlink[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index_of:
+                        index_of[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.downstream[child])))
+                        break
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index_of[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member is node:
+                                break
+                        components.append(component)
+
+        # Tarjan finds the downstream components first.
+        components.reverse()
+        return components
+
+    def get_depths(self, components=None):
+        """Returns {node: depth}, the number of nodes on the longest chain of dependencies ending at the
+        node. Nodes of a cycle share one level."""
+        depths = {}
+        for component in components or self.get_components():
+            members = set(component)
+            depth = 1
+            for node in component:
+                for source in self.upstream[node]:
+                    if source not in members:
+                        depth = max(depth, depths[source] + 1)
+            for node in component:
+                depths[node] = depth
+        return depths
+
+    def get_critical_path(self):
+        """Returns the longest chain of dependencies, most upstream node first. Through a cycle the
+        chain steps to the cycle member the next link comes from."""
+        components = self.get_components()
+        depths = self.get_depths(components)
+        if not depths:
+            return []
+        # Ties are broken by node order so the path is the same from run to run.
+        order = dict((node, index) for index, node in enumerate(self.nodes))
+        component_of = {}
+        for component in components:
+            for node in component:
+                component_of[node] = component
+
+        node = max(self.nodes, key=lambda candidate: depths[candidate])
+        path = [node]
+        while depths[node] > 1:
+            members = component_of[node]
+            sources = [source for member in members for source in self.upstream[member]
+                       if depths[source] == depths[node] - 1]
+            node = min(sources, key=order.get)
+            path.append(node)
+        path.reverse()
+        return path
+
+    def get_level_widths(self):
+        """Returns the number of nodes at each depth, the nodes of a level can evaluate in parallel"""
+        widths = {}
+        for depth in self.get_depths().values():
+            widths[depth] = widths.get(depth, 0) + 1
+        return [widths[depth] for depth in sorted(widths)]
+
+    def get_fan_in(self, node):
+        return len(self.upstream[node])
+
+    def get_fan_out(self, node):
+        return len(self.downstream[node])
+
+    def get_depth(self):
+        """Returns the DG depth: the longest chain of dependencies of the graph"""
+        depths = self.get_depths()
+        return max(depths.values()) if depths else 0
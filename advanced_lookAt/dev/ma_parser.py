@@ -0,0 +1,260 @@
+"""
+Reads and writes Maya ASCII files without maya, for offline tools (prefab pruning, graph reports).
+
+A file is read as a list of statements (commands ending in ';', comments and blank lines are kept as
+they are) so it can be written back unchanged apart from the statements that were dropped. Nodes
+own their createNode statement and the setAttr / addAttr / ... statements that follow it;
+connections are kept as (source plug, destination plug) pairs.
+
+Works with python 2 and 3.
+"""
+import io
+import re
+
+# A double quoted string (with escapes) or a bare word.
+TOKEN_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|([^\s";]+)')
+
+# Files are read and written as latin-1 so any code page survives the round trip untouched.
+ENCODING = 'latin-1'
+
+# Source attributes of the links that only point at a node (sets, layers, editors), no data flows.
+MESSAGE_ATTRIBUTES = ['message', 'msg']
+
+# Scene bookkeeping nodes: editor layouts and the managers that list every node of their kind.
+BOOKKEEPING_NODE_TYPES = ['nodeGraphEditorInfo', 'hyperLayout', 'renderLayerManager', 'displayLayerManager',
+                          'shapeEditorManager', 'poseInterpolatorManager', 'lightLinker']
+
+
+def tokenize(text):
+    """Returns the words of a statement, quoted strings unquoted (escapes are left as they are)"""
+    return [quoted if bare is None or bare == '' else bare
+            for quoted, bare in TOKEN_RE.findall(text)]
+
+
+def quoted_tokens(text):
+    """Returns only the quoted strings of a statement, in order"""
+    return [quoted for quoted, bare in TOKEN_RE.findall(text) if not bare]
+
+
+def plug_node(plug):
+    """Returns the node part of a "node.attribute" plug"""
+    return plug.split('.', 1)[0]
+
+
+def plug_attribute(plug):
+    """Returns the last attribute of a plug without its index, "node.a[0].b[1]" gives b"""
+    return plug.rsplit('.', 1)[-1].split('[', 1)[0]
+
+
+def short_name(path):
+    return path.rsplit('|', 1)[-1]
+
+
+class Statement(object):
+    """One command of the file with its original text (including the trailing newline)"""
+
+    __slots__ = ('text', 'command', 'node')
+
+    def __init__(self, text, command, node=None):
+        self.text = text
+        self.command = command
+        self.node = node
+
+
+def iter_statements(lines):
+    """Yields the text of every statement of a Maya ASCII file, given an iterable of its lines.
+    Comments and blank lines are yielded on their own."""
+    pending = []
+    in_string = False
+    for line in lines:
+        if not pending and (line.startswith('//') or not line.strip()):
+            yield line
+            continue
+
+        if '"' not in line and not in_string:
+            # Fast path: no strings to look out for.
+            pending.append(line)
+            if line.rstrip().endswith(';'):
+                yield ''.join(pending)
+                pending = []
+            continue
+
+        escaped = False
+        for character in line:
+            if escaped:
+                escaped = False
+            elif character == '\\':
+                escaped = in_string
+            elif character == '"':
+                in_string = not in_string
+        pending.append(line)
+        if not in_string and line.rstrip().endswith(';'):
+            yield ''.join(pending)
+            pending = []
+
+    if pending:
+        yield ''.join(pending)
+
+
+def get_command(text):
+    stripped = text.lstrip()
+    if not stripped or stripped.startswith('//'):
+        return None
+    return stripped.split(None, 1)[0].rstrip(';')
+
+
+class MayaNode(object):
+    """A node created by the file (createNode) or edited by it (select -ne)"""
+
+    def __init__(self, name, node_type=None, parent=None, shared=False, created=True):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.shared = shared
+        self.created = created
+        self.children = []
+        self.statements = []
+
+    @property
+    def path(self):
+        if self.parent is None:
+            return '|' + self.name
+        return self.parent.path + '|' + self.name
+
+    def __repr__(self):
+        return '<MayaNode {0} ({1})>'.format(self.name, self.type)
+
+
+def parse_create_node(text):
+    """Returns (type, name, parent, shared) of a createNode statement"""
+    tokens = tokenize(text)
+    node_type = tokens[1]
+    name = parent = None
+    shared = False
+    index = 2
+    while index < len(tokens):
+        token = tokens[index]
+        if token in ('-n', '-name'):
+            name = tokens[index + 1]
+            index += 1
+        elif token in ('-p', '-parent'):
+            parent = tokens[index + 1]
+            index += 1
+        elif token in ('-s', '-shared'):
+            shared = True
+        index += 1
+    return node_type, name, parent, shared
+
+
+class MayaScene(object):
+    """The statements, nodes and connections of a Maya ASCII file"""
+
+    def __init__(self):
+        self.statements = []
+        self.nodes = []
+        self.connections = []
+        self._nodes_by_name = {}
+        self._nodes_by_path = {}
+
+    @classmethod
+    def read(cls, filepath):
+        with io.open(filepath, 'r', encoding=ENCODING, newline='') as ma_file:
+            return cls.from_lines(ma_file)
+
+    @classmethod
+    def from_lines(cls, lines):
+        scene = cls()
+        for text in iter_statements(lines):
+            scene.add_statement(text)
+        return scene
+
+    def add_statement(self, text):
+        command = get_command(text)
+        statement = Statement(text, command)
+        self.statements.append(statement)
+
+        if command == 'createNode':
+            node_type, name, parent, shared = parse_create_node(text)
+            self.current_node = self.add_node(name, node_type, parent, shared)
+            statement.node = self.current_node
+        elif command == 'select':
+            tokens = tokenize(text)
+            # "select -ne :time1;" switches the current node to an existing one.
+            self.current_node = self.get_node(tokens[-1], create=True) if '-ne' in tokens else None
+            statement.node = self.current_node
+        elif command in ('setAttr', 'addAttr', 'rename', 'lockNode', 'deleteAttr'):
+            statement.node = getattr(self, 'current_node', None)
+        elif command == 'connectAttr':
+            source, destination = quoted_tokens(text)[:2]
+            self.connections.append((source, destination, statement))
+        elif command not in (None, 'requires', 'currentUnit', 'fileInfo', 'relationship', 'dataStructure', 'file'):
+            self.current_node = None
+
+        if statement.node is not None:
+            statement.node.statements.append(statement)
+        return statement
+
+    def add_node(self, name, node_type, parent=None, shared=False):
+        parent_node = self.get_node(parent) if parent else None
+        node = MayaNode(name, node_type, parent_node, shared)
+        if parent_node is not None:
+            parent_node.children.append(node)
+        self.nodes.append(node)
+        self._nodes_by_name.setdefault(name, []).append(node)
+        self._nodes_by_path[node.path] = node
+        return node
+
+    def get_node(self, name, create=False):
+        """Finds a node by name, full path ("|a|b") or partial path ("a|b"). A leading ':' (root
+        namespace) is ignored."""
+        if name.startswith(':'):
+            name = name[1:]
+        if name.startswith('|'):
+            node = self._nodes_by_path.get(name)
+        elif '|' in name:
+            matches = [node for node in self._nodes_by_name.get(short_name(name), [])
+                       if node.path.endswith('|' + name)]
+            node = matches[0] if matches else None
+        else:
+            matches = self._nodes_by_name.get(name)
+            node = matches[0] if matches else None
+
+        if node is None and create:
+            node = MayaNode(name, created=False)
+            self.nodes.append(node)
+            self._nodes_by_name.setdefault(name, []).append(node)
+        return node
+
+    def get_node_connections(self, dependencies_only=False):
+        """Returns the connections as (source node, destination node) pairs, connections to nodes the
+        file doesn't know are skipped. With dependencies_only the message links and the connections
+        of the bookkeeping nodes (see BOOKKEEPING_NODE_TYPES) are skipped too, no data flows there."""
+        node_connections = []
+        for source, destination, _ in self.connections:
+            if dependencies_only and plug_attribute(source) in MESSAGE_ATTRIBUTES:
+                continue
+            source_node = self.get_node(plug_node(source))
+            destination_node = self.get_node(plug_node(destination))
+            if source_node is None or destination_node is None:
+                continue
+            if dependencies_only and (source_node.type in BOOKKEEPING_NODE_TYPES or
+                                      destination_node.type in BOOKKEEPING_NODE_TYPES):
+                continue
+            node_connections.append((source_node, destination_node))
+        return node_connections
+
+    def get_type_counts(self, nodes=None):
+        """Returns {node type: count} of the created nodes"""
+        counts = {}
+        for node in self.nodes if nodes is None else nodes:
+            if node.created:
+                counts[node.type] = counts.get(node.type, 0) + 1
+        return counts
+
+    def write(self, filepath, skip_statements=None):
+        """Writes the file back, leaving out the given statements"""
+        skip_statements = skip_statements or set()
+        with io.open(filepath, 'w', encoding=ENCODING, newline='') as ma_file:
+            for statement in self.statements:
+                if id(statement) not in skip_statements:
+                    ma_file.write(statement.text)
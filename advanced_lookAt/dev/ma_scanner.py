@@ -0,0 +1,204 @@
+"""
+Scans Maya ASCII shot files for the eye animation without maya (python 2 or 3), to audit a whole
+show without opening every scene:
+
+    python ma_scanner.py [--processes 8] shots_dir_or_file.ma [...]
+
+Files are memory mapped and scanned with byte regular expressions, so a scene is never loaded: one
+pass finds the connectAttr statements driving the lookat / AU eyes controls and the
+SpaceWorldHead / enable_lookat switches from an anim curve output, a second pass reads those anim
+curves' keys. scan_files spreads the files over worker processes and yields one summary per shot
+as they finish. Run it outside of a maya session, maya can't host the worker processes.
+"""
+from __future__ import print_function
+
+import fnmatch
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+# Controls and attributes whose curves are summarized, without namespace.
+LOOKAT_CONTROLS = ['lookat_ctl', 'L_lookat_ctl', 'R_lookat_ctl', 'au_eyes_ctl', 'L_au_eyes_ctl', 'R_au_eyes_ctl']
+SWITCH_ATTRIBUTES = ['SpaceWorldHead', 'enable_lookat']
+
+CONNECT_RE = re.compile(br'connectAttr(?:\s+-\w+)*\s+"([^"]+)"\s+"([^"]+)"')
+ANIM_CURVE_RE = re.compile(br'createNode\s+(animCurve\w+)\s+-n\s+"([^"]+)"')
+# Key lists: setAttr -s 3 ".ktv[0:2]"  1 0 10 1 20 0; a single key has no size flag:
+# setAttr ".ktv[0]"  1 0;
+KEYS_RE = re.compile(br'setAttr\s+(?:-s\s+\d+\s+)?"\.ktv\[[^\]]*\]"([^;]*);')
+NEXT_NODE = b'\ncreateNode '
+
+# The outputs of an anim curve.
+CURVE_OUTPUTS = ['o', 'output']
+
+ENCODING = 'latin-1'
+
+
+def split_plug(plug):
+    """Returns (namespace, node, attribute) of a "ns:node.attribute" plug, namespace '' for none"""
+    node, _, attribute = plug.partition('.')
+    node = node.rsplit('|', 1)[-1]
+    namespace, _, name = node.rpartition(':')
+    return namespace.lstrip(':'), name, attribute
+
+
+def get_channel(destination):
+    """Returns the summarized channel ("node.attribute" without namespace) a plug belongs to, or None"""
+    namespace, node, attribute = split_plug(destination)
+    if node in LOOKAT_CONTROLS or attribute in SWITCH_ATTRIBUTES:
+        return '{0}.{1}'.format(node, attribute)
+    return None
+
+
+def find_curve_connections(data):
+    """Returns {anim curve name: [destination plug]} for the curves driving a summarized channel"""
+    curves = {}
+    for match in CONNECT_RE.finditer(data):
+        source, destination = [plug.decode(ENCODING) for plug in match.groups()]
+        node, _, attribute = source.partition('.')
+        if attribute not in CURVE_OUTPUTS or get_channel(destination) is None:
+            continue
+        curves.setdefault(node.lstrip(':'), []).append(destination)
+    return curves
+
+
+def read_keys(data, start, end):
+    """Returns the flat [time, value, ...] list of the ktv statements between start and end"""
+    keys = []
+    position = start
+    while True:
+        match = KEYS_RE.search(data, position, end)
+        if match is None:
+            return keys
+        keys.extend(float(number) for number in match.group(1).split())
+        position = match.end()
+
+
+def summarize_curve(curve, curve_type, destinations, keys):
+    times = keys[0::2]
+    values = keys[1::2]
+    namespace, _, _ = split_plug(destinations[0])
+    summary = {'curve': curve,
+               'type': curve_type,
+               'namespace': namespace,
+               'channel': get_channel(destinations[0]),
+               'destinations': destinations,
+               'keys': len(times)}
+    if times:
+        summary.update(start=min(times), end=max(times), min=min(values), max=max(values),
+                       static=max(values) == min(values))
+    return summary
+
+
+def scan_file(filepath):
+    """Returns the summary of one shot: {'file', 'size', 'seconds', 'curves': [curve summaries],
+    'error'}. Curve summaries hold the curve, its type, namespace, channel, destinations, key count
+    and the time and value ranges."""
+    start = time.time()
+    summary = {'file': filepath, 'size': 0, 'curves': [], 'error': None}
+    try:
+        summary['size'] = os.path.getsize(filepath)
+        if summary['size']:
+            with open(filepath, 'rb') as ma_file:
+                data = mmap.mmap(ma_file.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    summary['curves'] = scan_data(data)
+                finally:
+                    data.close()
+    except (IOError, OSError, ValueError) as error:
+        summary['error'] = str(error)
+    summary['seconds'] = time.time() - start
+    return summary
+
+
+def scan_data(data):
+    connections = find_curve_connections(data)
+    if not connections:
+        return []
+    curves = []
+    for match in ANIM_CURVE_RE.finditer(data):
+        name = match.group(2).decode(ENCODING)
+        if name not in connections:
+            continue
+        end = data.find(NEXT_NODE, match.end())
+        keys = read_keys(data, match.end(), len(data) if end == -1 else end)
+        curves.append(summarize_curve(name, match.group(1).decode(ENCODING), connections[name], keys))
+    return curves
+
+
+def find_shot_files(paths, pattern='*.ma'):
+    """Returns the files matching pattern in the given files and directories (recursively)"""
+    filepaths = []
+    for path in paths:
+        if os.path.isfile(path):
+            filepaths.append(path)
+            continue
+        for root, _, filenames in os.walk(path):
+            filepaths.extend(os.path.join(root, filename) for filename in sorted(fnmatch.filter(filenames, pattern)))
+    return filepaths
+
+
+def scan_files(filepaths, processes=None):
+    """Yields the summary of each file as the worker processes finish them (in no particular order)"""
+    filepaths = list(filepaths)
+    if not filepaths:
+        return
+    if processes == 1 or len(filepaths) == 1:
+        for filepath in filepaths:
+            yield scan_file(filepath)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for summary in pool.imap_unordered(scan_file, filepaths, chunksize=1):
+            yield summary
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def format_summary(summary):
+    lines = ['{0} ({1:.1f}MB, {2:.3f}s)'.format(summary['file'], summary['size'] / 1048576.0, summary['seconds'])]
+    if summary['error']:
+        lines.append('  error: {0}'.format(summary['error']))
+    for curve in sorted(summary['curves'], key=lambda curve: (curve['namespace'], curve['channel'])):
+        if not curve['keys']:
+            lines.append('  {0:<16} {1:<36} no keys'.format(curve['namespace'] or ':', curve['channel']))
+            continue
+        lines.append('  {0:<16} {1:<36} {2:>6} keys  {3:g}-{4:g}  values {5:g} to {6:g}{7}'.format(
+            curve['namespace'] or ':', curve['channel'], curve['keys'], curve['start'], curve['end'],
+            curve['min'], curve['max'], '  static' if curve['static'] else ''))
+    return lines
+
+
+def main(arguments):
+    processes = None
+    paths = []
+    arguments = list(arguments)
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--processes':
+            processes = int(arguments.pop(0))
+        else:
+            paths.append(argument)
+    if not paths:
+        print(__doc__)
+        return 1
+
+    start = time.time()
+    count = 0
+    for summary in scan_files(find_shot_files(paths), processes):
+        count += 1
+        print('\n'.join(format_summary(summary)))
+    print('Scanned {0} files in {1:.2f}s'.format(count, time.time() - start))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
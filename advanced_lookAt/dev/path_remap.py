@@ -0,0 +1,134 @@
+"""
+Remaps file paths between client roots and checks whether they exist in batches.
+
+Existence checks on network-mounted depots are expensive, so instead of one stat per file the
+directories of all the requested paths are listed once each, concurrently, and the listings are
+cached until the directory's modification time changes.
+"""
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+
+
+def normalize_path(path):
+    """Returns a forward slash path, as maya stores them"""
+    return path.replace('\\', '/')
+
+
+class PathRemapTable(object):
+    """Maps path prefixes onto other roots, e.g. mapped drives onto perforce client roots.
+
+    table = PathRemapTable()
+    table.add_rule('R:/', 'd:/dev/roboto/')
+    table.add_rule('//depot/roboto/', 'd:/dev/roboto/')
+    table.remap('R:/Data/Raw/rig.mb')  # 'd:/dev/roboto/Data/Raw/rig.mb'
+
+    Prefixes are matched case-insensitively and the longest matching prefix wins.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = []
+        for prefix, root in (rules or []):
+            self.add_rule(prefix, root)
+
+    def add_rule(self, prefix, root):
+        prefix = normalize_path(prefix)
+        self.rules.append((prefix.lower(), prefix, normalize_path(root)))
+        self.rules.sort(key=lambda rule: len(rule[0]), reverse=True)
+
+    def remap(self, filepath):
+        """Returns the remapped path, or None if no rule matches"""
+        filepath = normalize_path(filepath)
+        lower_filepath = filepath.lower()
+        for lower_prefix, prefix, root in self.rules:
+            if lower_filepath.startswith(lower_prefix):
+                return root + filepath[len(prefix):]
+        return None
+
+    def remap_all(self, filepaths):
+        """Returns a {filepath: remapped path or None} dictionary"""
+        return dict((filepath, self.remap(filepath)) for filepath in filepaths)
+
+
+class DirectoryListingCache(object):
+    """Answers "does this file exist" from cached directory listings.
+
+    A listing is reused for as long as the directory's mtime is unchanged, so repeated queries
+    only cost one stat per directory. Listings are read concurrently on a thread pool.
+    """
+
+    def __init__(self, threads=8):
+        self.threads = threads
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def _list_directory(self, directory):
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return directory, None, None
+
+        with self._lock:
+            cached = self._listings.get(directory)
+        if cached and cached[0] == mtime:
+            return directory, mtime, cached[1]
+
+        try:
+            names = frozenset(os.path.normcase(name) for name in os.listdir(directory))
+        except OSError:
+            return directory, None, None
+        return directory, mtime, names
+
+    def refresh(self, directories):
+        """Re-validates the listings of the given directories"""
+        directories = list(set(directories))
+        if len(directories) > 1 and self.threads > 1:
+            pool = ThreadPool(min(self.threads, len(directories)))
+            try:
+                results = pool.map(self._list_directory, directories)
+            finally:
+                pool.close()
+        else:
+            results = [self._list_directory(directory) for directory in directories]
+
+        with self._lock:
+            for directory, mtime, names in results:
+                if names is None:
+                    self._listings.pop(directory, None)
+                else:
+                    self._listings[directory] = (mtime, names)
+
+    def exists_all(self, filepaths):
+        """Returns a {filepath: bool} dictionary, listing each directory at most once"""
+        split_paths = dict((filepath, os.path.split(filepath)) for filepath in filepaths)
+        self.refresh(directory for directory, _ in split_paths.values())
+
+        result = {}
+        for filepath, (directory, name) in split_paths.items():
+            cached = self._listings.get(directory)
+            result[filepath] = bool(cached) and os.path.normcase(name) in cached[1]
+        return result
+
+    def exists(self, filepath):
+        return self.exists_all([filepath])[filepath]
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+
+
+# Shared between calls so repeated lookups only re-stat the directories.
+_directory_cache = DirectoryListingCache()
+
+
+def get_directory_cache():
+    return _directory_cache
+
+
+def resolve_paths(filepaths, remap_table, directory_cache=None):
+    """Remaps every path and checks all of them for existence in one batch.
+    Returns a {filepath: existing remapped path or ''} dictionary."""
+    directory_cache = directory_cache or _directory_cache
+    remapped = remap_table.remap_all(filepaths)
+    exists = directory_cache.exists_all([path for path in remapped.values() if path])
+    return dict((filepath, path if path and exists[path] else '') for filepath, path in remapped.items())
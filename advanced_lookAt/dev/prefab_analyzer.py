@@ -0,0 +1,206 @@
+"""
+Static dependency graph report of lookAt prefabs, without maya (python 2 or 3):
+
+    python prefab_analyzer.py [--dot graph.dot] [--top 10] [--no-dag] prefab.ma [other.ma ...]
+
+For every file it reports the critical path (the longest chain of dependencies: nodes that can only
+evaluate one after the other), how many nodes each depth level holds (what parallel evaluation can
+spread), the fan-in / fan-out hot spots and the cycles, with the constraints in them. --dot writes
+the graph of the first file for graphviz, the critical path and the cycles highlighted.
+
+The graph is node level, like the one maya's evaluation manager schedules: a cycle there becomes a
+cycle cluster whose nodes evaluate serially, even when no single plug depends on itself. A
+constraint and the node it drives (which feeds it its parentInverseMatrix) always form such a pair,
+they are reported as "constraint owner" cycles.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+import ma_graph
+import ma_parser
+
+CONSTRAINT_TYPES = ['aimConstraint', 'pointConstraint', 'orientConstraint', 'parentConstraint',
+                    'scaleConstraint', 'poleVectorConstraint', 'geometryConstraint', 'normalConstraint',
+                    'tangentConstraint']
+
+# graphviz fill colors of the node type families.
+DOT_COLORS = {'transform': '#c6dbef', 'joint': '#c6dbef', 'locator': '#deebf7', 'nurbsCurve': '#deebf7',
+              'remapValue': '#fdd0a2', 'clamp': '#fdd0a2', 'blendColors': '#fdd0a2', 'reverse': '#fdd0a2',
+              'plusMinusAverage': '#fdae6b', 'multiplyDivide': '#fdae6b', 'unitConversion': '#fee6ce',
+              'curveInfo': '#c7e9c0', 'cluster': '#dadaeb', 'tweak': '#dadaeb', 'groupParts': '#dadaeb',
+              'objectSet': '#dadaeb', 'groupId': '#dadaeb'}
+DOT_CONSTRAINT_COLOR = '#fcbba1'
+DOT_DEFAULT_COLOR = '#f0f0f0'
+DOT_CRITICAL_COLOR = '#cb181d'
+
+
+class PrefabAnalysis(object):
+    """The graph figures of one Maya ASCII file"""
+
+    def __init__(self, filepath, dag_edges=True):
+        start = time.time()
+        self.filepath = filepath
+        self.scene = ma_parser.MayaScene.read(filepath)
+        self.graph = ma_graph.DependencyGraph.from_scene(self.scene, dag_edges)
+
+        self.components = self.graph.get_components()
+        self.depths = self.graph.get_depths(self.components)
+        self.cycles = [component for component in self.components if len(component) > 1]
+        self.critical_path = self.graph.get_critical_path()
+        self.level_widths = self.graph.get_level_widths()
+        self.seconds = time.time() - start
+
+    @property
+    def depth(self):
+        return len(self.critical_path)
+
+    @property
+    def edge_count(self):
+        return sum(len(destinations) for destinations in self.graph.downstream.values())
+
+    def get_hot_spots(self, top=10):
+        """Returns the (fan-in, node) and (fan-out, node) lists of the most connected nodes"""
+        nodes = [node for node in self.graph.nodes if node.created]
+        fan_in = sorted(((self.graph.get_fan_in(node), node) for node in nodes),
+                        key=lambda item: (-item[0], item[1].name))[:top]
+        fan_out = sorted(((self.graph.get_fan_out(node), node) for node in nodes),
+                         key=lambda item: (-item[0], item[1].name))[:top]
+        return fan_in, fan_out
+
+    def get_constraint_cycles(self):
+        return [cycle for cycle in self.cycles if any(node.type in CONSTRAINT_TYPES for node in cycle)]
+
+    @staticmethod
+    def is_constraint_owner_cycle(cycle):
+        """True for the two node cycle of a constraint and the transform it's parented under"""
+        if len(cycle) != 2:
+            return False
+        first, second = cycle
+        return ((first.type in CONSTRAINT_TYPES and first.parent is second) or
+                (second.type in CONSTRAINT_TYPES and second.parent is first))
+
+    def format_report(self, top=10):
+        lines = ['{0}'.format(self.filepath),
+                 '  nodes {0}, node edges {1}, parsed and analyzed in {2:.3f}s'.format(
+                     len([node for node in self.graph.nodes if node.created]), self.edge_count, self.seconds)]
+
+        widths = self.level_widths
+        serial_levels = len([width for width in widths if width == 1])
+        lines.append('  critical path depth {0}, {1} levels hold a single node, widest level {2} nodes, '
+                     '{3:.1f} nodes per level on average'.format(self.depth, serial_levels,
+                                                                 max(widths) if widths else 0,
+                                                                 float(sum(widths)) / len(widths) if widths else 0))
+        lines.append('  critical path:')
+        for node in self.critical_path:
+            lines.append('    {0:>4}  {1:<40} {2}'.format(self.depths[node], node.name, node.type))
+
+        fan_in, fan_out = self.get_hot_spots(top)
+        lines.append('  fan-in hot spots:')
+        lines.extend('    {0:>4}  {1:<40} {2}'.format(count, node.name, node.type) for count, node in fan_in)
+        lines.append('  fan-out hot spots:')
+        lines.extend('    {0:>4}  {1:<40} {2}'.format(count, node.name, node.type) for count, node in fan_out)
+
+        constraint_cycles = self.get_constraint_cycles()
+        owner_cycles = [cycle for cycle in constraint_cycles if self.is_constraint_owner_cycle(cycle)]
+        lines.append('  cycles: {0}, through constraints: {1} ({2} constraint owner)'.format(
+            len(self.cycles), len(constraint_cycles), len(owner_cycles)))
+        for cycle in sorted(self.cycles, key=lambda members: (-len(members), sorted(node.name for node in members))):
+            if cycle in owner_cycles:
+                label = 'constraint owner'
+            elif cycle in constraint_cycles:
+                label = 'constraint'
+            else:
+                label = 'cycle'
+            names = ', '.join('{0} ({1})'.format(node.name, node.type)
+                              for node in sorted(cycle, key=lambda node: node.name))
+            lines.append('    [{0}, {1} nodes] {2}'.format(label, len(cycle), names))
+        return lines
+
+    def write_dot(self, filepath):
+        """Writes the graph for graphviz: nodes filled by type, the critical path in red and each
+        cycle in its own cluster"""
+        critical_nodes = set(self.critical_path)
+        critical_edges = set(zip(self.critical_path, self.critical_path[1:]))
+        cycle_of = {}
+        for index, cycle in enumerate(self.cycles):
+            for node in cycle:
+                cycle_of[node] = index
+
+        def node_id(node):
+            # Paths, short names of DAG nodes can repeat.
+            return '"{0}"'.format(node.path.replace('"', '\\"'))
+
+        def node_line(node):
+            if node.type in CONSTRAINT_TYPES:
+                color = DOT_CONSTRAINT_COLOR
+            else:
+                color = DOT_COLORS.get(node.type, DOT_DEFAULT_COLOR)
+            outline = ', color="{0}", penwidth=3'.format(DOT_CRITICAL_COLOR) if node in critical_nodes else ''
+            return '{0} [label="{1}\\n{2}", fillcolor="{3}"{4}];'.format(node_id(node), node.name, node.type,
+                                                                        color, outline)
+
+        nodes = [node for node in self.graph.nodes if node.created]
+        lines = ['digraph prefab {', '    rankdir=LR;', '    node [shape=box, style=filled, fontsize=10];']
+        for node in nodes:
+            if node not in cycle_of:
+                lines.append('    ' + node_line(node))
+        for index, cycle in enumerate(self.cycles):
+            lines.append('    subgraph cluster_cycle_{0} {{'.format(index))
+            lines.append('        label="cycle {0}"; color="{1}";'.format(index, DOT_CRITICAL_COLOR))
+            lines.extend('        ' + node_line(node) for node in cycle if node.created)
+            lines.append('    }')
+        for source in nodes:
+            for destination in sorted(self.graph.downstream[source], key=lambda node: node.name):
+                if not destination.created:
+                    continue
+                style = ' [color="{0}", penwidth=3]'.format(DOT_CRITICAL_COLOR) \
+                    if (source, destination) in critical_edges else ''
+                lines.append('    {0} -> {1}{2};'.format(node_id(source), node_id(destination), style))
+        lines.append('}')
+
+        with open(filepath, 'w') as dot_file:
+            dot_file.write('\n'.join(lines) + '\n')
+
+
+def analyze(filepaths, dot=None, top=10, dag_edges=True, verbose=True):
+    """Analyzes the files, prints their reports and returns the PrefabAnalysis objects"""
+    analyses = []
+    for filepath in filepaths:
+        analysis = PrefabAnalysis(filepath, dag_edges)
+        analyses.append(analysis)
+        if verbose:
+            print('\n'.join(analysis.format_report(top)))
+    if dot and analyses:
+        analyses[0].write_dot(dot)
+        if verbose:
+            print('DOT graph written to {0}'.format(dot))
+    return analyses
+
+
+def main(arguments):
+    dot = None
+    top = 10
+    dag_edges = True
+    filepaths = []
+    arguments = list(arguments)
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--dot':
+            dot = arguments.pop(0)
+        elif argument == '--top':
+            top = int(arguments.pop(0))
+        elif argument == '--no-dag':
+            dag_edges = False
+        else:
+            filepaths.append(argument)
+    if not filepaths:
+        print(__doc__)
+        return 1
+    analyze(filepaths, dot, top, dag_edges)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,197 @@
+"""
+Writes a pruned copy of the lookAt prefab, keeping only the nodes the rig needs, and reports the
+node counts per type, the evaluated nodes and the DG depth before and after. Runs without maya
+(python 2 or 3):
+
+    python prefab_pruner.py [--display] [source.ma] [pruned.ma]
+
+A node is kept when it drives the rig's outputs (final_rotation_output drives the eye joints,
+hlp_control_lookat_output the face rig), the controls and locators the tools read, or the nodes
+lookat_assembly addresses by name. Those roots keep their shapes, the other kept transforms don't.
+With --display the hierarchies the animators see (sightlines, space labels, settings) are kept whole
+too. Everything else is dropped with its connections, and the requires lines of plugins that no
+longer provide a node are dropped too.
+
+The evaluated nodes are the ones a frame of playback pulls: everything upstream of the driven
+outputs and of the drawn shapes.
+"""
+from __future__ import print_function
+
+import os
+import sys
+
+import ma_graph
+import ma_parser
+
+SOURCE_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(SOURCE_ROOT, 'prefabs', 'lookat.ma')
+DEFAULT_OUTPUT = os.path.join(SOURCE_ROOT, 'prefabs', 'lookat_pruned.ma')
+
+# The outputs the assemblers connect to the character.
+DRIVEN_OUTPUTS = ['final_rotation_output', 'hlp_control_lookat_output']
+
+# Controls and nodes LookAtPlotter and the gui read.
+TOOL_READ_NODES = ['lookat_ctl', 'L_lookat_ctl', 'R_lookat_ctl',
+                   'au_eyes_ctl', 'L_au_eyes_ctl', 'R_au_eyes_ctl',
+                   'L_lookat_loc', 'R_lookat_loc',
+                   'C_absolute_position_loc', 'L_absolute_position_loc', 'R_absolute_position_loc',
+                   'C_absolute_direction_loc', 'L_absolute_direction_loc', 'R_absolute_direction_loc',
+                   'user_defined_distance_loc', 'eyes_combined_values', 'plot_to_au_values',
+                   'lookat_custom_range_plug']
+
+# Nodes lookat_assembly places, constrains or connects.
+ASSEMBLY_NODES = ['lookat_rig_grp', 'grp_control_eyes', 'lookat_output', 'lookat_enabled_reverse',
+                  'gaze_output', 'eye_contol_switch_remap_crv', 'convergence_enabled_remap_crv',
+                  'hlp_control_lookat_output',
+                  'au_eyes_ctl_parent_grp', 'au_eyes_ctl_placement_grp', 'au_eyes_ctl_placement_offset',
+                  'L_lookat_loc_grp', 'R_lookat_loc_grp', 'L_Eye_upVec', 'R_Eye_upVec',
+                  'C_absolute_direction_constrained_grp', 'L_absolute_direction_constrained_grp',
+                  'R_absolute_direction_constrained_grp', 'convergence_constrained_grp',
+                  'lookat_system_orient', 'L_lookat_system_orient', 'R_lookat_system_orient',
+                  'EyeCenter_loc', 'EyeCenter_loc_grp', 'EyeCenter_upVec_grp', 'L_Eye_upVec_grp', 'R_Eye_upVec_grp',
+                  'eyes_distance_start', 'left_eye_distance_start', 'right_eye_distance_start',
+                  'L_sightline_extend_grp', 'R_sightline_extend_grp',
+                  'L_sightline_extend_up_vector', 'R_sightline_extend_up_vector',
+                  'LocalSpace_parent_loc_placement']
+
+# DAG hierarchies the animators see (sightlines, space labels, settings), only kept on request.
+DISPLAY_NODES = ['grp_controls_lookat', 'lookat_sightlines', 'lookat_settings']
+
+# Children kept with the root transforms, and drawn on every frame.
+SHAPE_TYPES = ['locator', 'nurbsCurve', 'nurbsSurface', 'mesh', 'clusterHandle']
+
+# Node types of the plugins that don't list them on their requires line.
+PLUGIN_NODE_TYPES = {'stereoCamera': ['stereoRigTransform', 'stereoRigCamera', 'stereoRigFrustum']}
+
+
+def iter_descendants(node):
+    stack = list(node.children)
+    while stack:
+        child = stack.pop()
+        yield child
+        stack.extend(child.children)
+
+
+def get_kept_nodes(scene, graph, roots):
+    """Returns the nodes the roots need: their upstream closure, with the shapes of the root
+    transforms. DAG parents are upstream already (parent -> child edges), shapes are not."""
+    shapes = [child for node in roots for child in node.children if child.type in SHAPE_TYPES]
+    kept = graph.get_upstream_closure(list(roots) + shapes)
+    # Nodes the file only edits (select -ne) exist in every scene.
+    kept.update(node for node in scene.nodes if not node.created)
+    return kept
+
+
+def get_requires_to_drop(scene, kept):
+    """Returns the requires statements of plugins none of the kept nodes need, and the duplicates"""
+    kept_types = set(node.type for node in kept)
+    seen = set()
+    drop = set()
+    for statement in scene.statements:
+        if statement.command != 'requires':
+            continue
+        tokens = ma_parser.tokenize(statement.text)
+        text = statement.text.strip()
+        if text in seen:
+            drop.add(id(statement))
+            continue
+        seen.add(text)
+
+        node_types = [tokens[index + 1] for index, token in enumerate(tokens) if token == '-nodeType']
+        flags = [index for index, token in enumerate(tokens) if token.startswith('-')]
+        # requires [-nodeType type ...] "plugin" "version";
+        plugin = tokens[-2] if len(tokens) >= 3 else None
+        if plugin == 'maya' and not flags:
+            continue
+        node_types = node_types or PLUGIN_NODE_TYPES.get(plugin)
+        if node_types is not None and not kept_types.intersection(node_types):
+            drop.add(id(statement))
+    return drop
+
+
+def get_statements_to_drop(scene, kept):
+    pruned = set(node for node in scene.nodes if node not in kept)
+    drop = set()
+    for node in pruned:
+        drop.update(id(statement) for statement in node.statements)
+    for source, destination, statement in scene.connections:
+        source_node = scene.get_node(ma_parser.plug_node(source))
+        destination_node = scene.get_node(ma_parser.plug_node(destination))
+        if source_node in pruned or destination_node in pruned:
+            drop.add(id(statement))
+    for statement in scene.statements:
+        if statement.command == 'relationship':
+            nodes = [scene.get_node(ma_parser.plug_node(plug)) for plug in ma_parser.quoted_tokens(statement.text)[1:]]
+            if any(node in pruned for node in nodes):
+                drop.add(id(statement))
+    drop |= get_requires_to_drop(scene, kept)
+    return drop
+
+
+def get_evaluated_nodes(scene, graph, nodes):
+    """Returns the nodes a frame of playback evaluates: the upstream closure of the driven outputs
+    and of the drawn shapes among the nodes"""
+    roots = [scene.get_node(name) for name in DRIVEN_OUTPUTS]
+    roots.extend(node for node in nodes if node.created and node.type in SHAPE_TYPES)
+    return graph.get_upstream_closure(roots)
+
+
+def format_report(scene, graph, kept):
+    """Returns the report lines: node counts per type, evaluated nodes and DG depth before and after"""
+    kept_graph = graph.subgraph(kept)
+    before = scene.get_type_counts()
+    after = scene.get_type_counts(kept)
+    evaluated_before = get_evaluated_nodes(scene, graph, scene.nodes)
+    evaluated_after = get_evaluated_nodes(scene, kept_graph, kept)
+
+    lines = ['{0:<28}{1:>8}{2:>8}'.format('node type', 'before', 'after')]
+    for node_type in sorted(before, key=lambda name: (-before[name], name)):
+        lines.append('{0:<28}{1:>8}{2:>8}'.format(node_type, before[node_type], after.get(node_type, 0)))
+    lines.append('-' * 44)
+    lines.append('{0:<28}{1:>8}{2:>8}'.format('nodes', sum(before.values()), sum(after.values())))
+    connections_after = sum(len(graph.downstream[node] & kept) for node in kept)
+    connections_before = sum(len(destinations) for destinations in graph.downstream.values())
+    lines.append('{0:<28}{1:>8}{2:>8}'.format('node edges', connections_before, connections_after))
+    lines.append('{0:<28}{1:>8}{2:>8}'.format('evaluated nodes', len(evaluated_before), len(evaluated_after)))
+    lines.append('{0:<28}{1:>8}{2:>8}'.format('DG depth', graph.get_depth(), kept_graph.get_depth()))
+    lines.append('{0:<28}{1:>8}{2:>8}'.format('cycles', len(graph.get_cycles()), len(kept_graph.get_cycles())))
+    return lines
+
+
+def prune_prefab(source=DEFAULT_SOURCE, output=DEFAULT_OUTPUT, roots=None, display=False, verbose=True):
+    """Writes the pruned prefab and returns the report lines. With display the display hierarchies
+    (sightlines, space labels, settings) are kept whole."""
+    scene = ma_parser.MayaScene.read(source)
+    graph = ma_graph.DependencyGraph.from_scene(scene)
+
+    root_names = roots or DRIVEN_OUTPUTS + TOOL_READ_NODES + ASSEMBLY_NODES
+    root_nodes = [scene.get_node(name) for name in root_names]
+    missing = [name for name, node in zip(root_names, root_nodes) if node is None]
+    for name in DRIVEN_OUTPUTS:
+        if name in missing:
+            raise ValueError("Driven output not found in {0}: {1}".format(source, name))
+
+    root_nodes = [node for node in root_nodes if node is not None]
+    if display:
+        for node in filter(None, [scene.get_node(name) for name in DISPLAY_NODES]):
+            root_nodes.append(node)
+            root_nodes.extend(iter_descendants(node))
+
+    kept = get_kept_nodes(scene, graph, root_nodes)
+    scene.write(output, get_statements_to_drop(scene, kept))
+
+    lines = format_report(scene, graph, kept)
+    if verbose:
+        if missing:
+            print('Not in the prefab: {0}'.format(', '.join(missing)))
+        print('\n'.join(lines))
+        print('Pruned prefab written to {0}'.format(output))
+    return lines
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    display = '--display' in arguments
+    if display:
+        arguments.remove('--display')
+    prune_prefab(*arguments[:2], display=display)